@@ -88,6 +88,13 @@ import gzip
 import codecs
 import traceback
 import weakref
+import pickle
+import copyreg
+import io
+import multiprocessing
+import threading
+import hashlib
+from collections import deque, OrderedDict
 
 from xml.etree import ElementTree
 import xml.etree.cElementTree as ElementTree
@@ -107,6 +114,8 @@ import on.corpora.sense
 import on.corpora.parallel
 import on.corpora.speaker
 import on.corpora.ontology
+import on.corpora.annotation_index
+import on.corpora.compiled
 
 
 import on.common.util
@@ -120,7 +129,7 @@ try:
     import MySQLdb
 except ImportError:
     on.common.log.warning("Unable to import MySQLdb.  Will not be able to write"
-                          + " or read from a database, but otherwise should be"
+                          + " or read from a mysql database, but otherwise should be"
                           + " functional.")
 
 class ontonotes:
@@ -180,8 +189,16 @@ class ontonotes:
       .. automethod:: get_subcorpus
       .. automethod:: get_db_cursor
       .. automethod:: initialize_db
+      .. automethod:: db_indexes
+      .. automethod:: drop_db_indexes
+      .. automethod:: create_db_indexes
+      .. automethod:: upgrade_db
+      .. automethod:: check_db_schema
       .. automethod:: write_type_tables_to_db
       .. automethod:: write_to_db
+      .. automethod:: write_subcorpora_to_db
+      .. automethod:: document_ids_in_db
+      .. automethod:: row_counts_in_db
 
     """
 
@@ -195,9 +212,19 @@ class ontonotes:
     @register_config("corpus", "granularity", allowed_values=["source", "section", "file"])
     @register_config("corpus", "max_files")
     @register_config("corpus", "hide_errors", allowed_values=["true", "false"])
-    @register_config("db", "host", required=True)
-    @register_config("db", "db", required=True)
-    @register_config("db", "user", required=True)
+    @register_config("corpus", "cache_dir",
+                     doc="A directory to keep enriched subcorpora in between runs.  A subcorpus loaded " +
+                         "from files is restored from here instead of being parsed and enriched again " +
+                         "as long as its files and the corpus configuration are unchanged.")
+    @register_config("corpus", "cache_max_mb",
+                     doc="How big cache_dir may grow before the least recently used subcorpora are " +
+                         "removed from it.  Defaults to 2048.")
+    @register_config("db", "backend", allowed_values=["mysql", "sqlite"],
+                     doc="Which database to use: a mysql server (the default) or an sqlite file.")
+    @register_config("db", "host", doc="The mysql server.  Required for mysql.")
+    @register_config("db", "db", required=True,
+                     doc="The name of the database, or for sqlite the file it's kept in.")
+    @register_config("db", "user", doc="Who to connect to the mysql server as.  Required for mysql.")
     def __init__(self, config, data_source="auto", hide_errors=None):
         """ data_source -- one of 'auto', 'files', or 'db'.  If 'auto', go by whether the config
                            file has 'corpus.data_in' or a 'db' section.
@@ -213,6 +240,14 @@ class ontonotes:
         self._loaded_subcorpora_cache = weakref.WeakValueDictionary() # used only by get_subcorpus
         self._dont_lose_subcorpora_list = [] # used only by get_subcorpus
 
+        self._subcorpus_cache = None # used only by get_subcorpus
+
+        self._db_document_ids = None # used only by document_ids_in_db
+        self._db_row_counts = {} # used only by row_counts_in_db
+        if self.config_has_opt("cache_dir"):
+            self._subcorpus_cache = _subcorpus_cache(self, self.config_opt("cache_dir"),
+                                                     int(self.config_opt("cache_max_mb", "2048")))
+
         if data_source == "auto":
             if self.config_has_opt("data_in"):
                 data_source = "files"
@@ -251,6 +286,116 @@ class ontonotes:
             raise Exception(traceback.format_exc())
         return a_subcorpus
 
+    @register_config("corpus", "workers",
+                     doc="How many processes to load subcorpora in when iterating over an ontonotes " +
+                         "instance.  Subcorpora are still returned in order.  Defaults to 1, loading " +
+                         "them one at a time in this process.")
+    def __iter__(self):
+        """ iterate over the subcorpora, with their banks loaded
+
+        If ``corpus.workers`` is more than one, subcorpora are loaded
+        and enriched in a pool of that many processes and handed back
+        here in order, along with what loading them added to the open
+        type tables.  At most ``corpus.workers`` subcorpora are loaded
+        ahead of the one being returned, so memory stays bounded
+        however long the iteration.
+
+        """
+
+        return self._iter_subcorpora(self.subcorpus_id_list)
+
+    def _iter_subcorpora(self, subcorpus_ids):
+        """ the subcorpora with these ids, with their banks loaded, as :meth:`__iter__` gives them """
+
+        workers = int(self.config_opt("workers", "1"))
+
+        if workers <= 1:
+            for a_subcorpus_id in subcorpus_ids:
+                yield self.get_subcorpus(a_subcorpus_id, banks_loaded=True)
+            return
+
+        subcorpus_ids = list(subcorpus_ids)
+        pending = deque() # (subcorpus id, async result), in order
+        next_index = 0
+
+        a_pool = multiprocessing.get_context("fork").Pool(workers, _subcorpus_loader_init, (self,))
+        try:
+            while pending or next_index < len(subcorpus_ids):
+                while next_index < len(subcorpus_ids) and len(pending) < workers:
+                    a_subcorpus_id = subcorpus_ids[next_index]
+                    pending.append((a_subcorpus_id, a_pool.apply_async(_subcorpus_loader_load, (a_subcorpus_id,))))
+                    next_index += 1
+
+                a_subcorpus_id, a_result = pending.popleft()
+                a_pickled_subcorpus, a_type_table_state = a_result.get()
+                if a_pickled_subcorpus is None:
+                    a_subcorpus = self.get_subcorpus(a_subcorpus_id, banks_loaded=True)
+                else:
+                    a_subcorpus = _subcorpus_unpickler(io.BytesIO(a_pickled_subcorpus), self).load()
+                    on.corpora.abstract_type_table.merge_open_state(a_type_table_state)
+                    self._loaded_subcorpora_cache[a_subcorpus_id] = a_subcorpus
+
+                yield a_subcorpus
+        finally:
+            a_pool.terminate()
+
+    def iter_documents(self, banks=None, treebank="parse"):
+        """ iterate over the documents one at a time, each enriched with ``banks``
+
+        ``banks`` is in the format of ``corpus.banks``, either as a
+        string or a list, and defaults to ``corpus.banks``.  For each
+        document of the ``treebank`` bank (``parse`` unless
+        ``banks`` says otherwise), this yields its
+        :class:`on.corpora.tree.tree_document` with the documents of
+        the other banks for it in
+        :attr:`~on.corpora.tree.tree_document.annotation_documents` .
+
+        .. code-block:: python
+
+           for a_tree_document in a_ontonotes.iter_documents(banks="parse sense prop"):
+              pass
+
+        For subcorpora read from files, only the files of one document
+        are read and enriched at a time, and nothing is kept once the
+        next document is asked for, so memory use does not grow with
+        the size of the corpus.  Subcorpora in the db are still loaded
+        whole, then handed out a document at a time.
+
+        """
+
+        if banks is None:
+            banks = self.config_opt("banks", "parse")
+        elif not isinstance(banks, str):
+            banks = " ".join(banks)
+
+        for a_subcorpus_id in self.subcorpus_id_list:
+            a_subcorpus = self.get_subcorpus(a_subcorpus_id)
+
+            if a_subcorpus.backed_by() == "fs":
+                subcorpora = a_subcorpus.split_by_document()
+            else:
+                subcorpora = [a_subcorpus.copy()]
+
+            for a_document_subcorpus in subcorpora:
+                try:
+                    a_document_subcorpus.load_banks(self.config, banks=banks)
+                except Exception:
+                    if a_subcorpus._hide_errors:
+                        on.common.log.report("loading", "hid error SERIOUS", id=a_subcorpus_id)
+                        continue
+                    raise
+
+                if treebank not in a_document_subcorpus:
+                    continue
+
+                for a_tree_document in a_document_subcorpus[treebank]:
+                    for extension in a_document_subcorpus.keys():
+                        a_bank = a_document_subcorpus[extension]
+                        if extension != treebank and a_tree_document.document_id in a_bank:
+                            a_tree_document.annotation_documents[extension] = a_bank.get_document(a_tree_document.document_id)
+
+                    yield a_tree_document
+
     def __len__(self):
         return len(self.subcorpus_id_list)
 
@@ -334,6 +479,11 @@ class ontonotes:
            next requested.  This variable has no effect if
            ``banks_loaded`` or ``use_cache`` is ``False``
 
+        If ``corpus.cache_dir`` is set, subcorpora loaded from files
+        are also kept there between runs, and restored from there
+        instead of loading the banks when nothing they were loaded
+        from has changed.
+
         """
 
         try:
@@ -353,6 +503,9 @@ class ontonotes:
             except KeyError:
                 pass
 
+        if not a_subcorpus_copy and self._subcorpus_cache:
+            a_subcorpus_copy = self._subcorpus_cache.load(a_subcorpus)
+
         if not a_subcorpus_copy:
             a_subcorpus_copy = a_subcorpus.copy()
 
@@ -363,6 +516,9 @@ class ontonotes:
                     on.common.log.report("loading", "hid error SERIOUS", id=a_subcorpus_id)
                 else:
                     raise
+            else:
+                if self._subcorpus_cache:
+                    self._subcorpus_cache.save(a_subcorpus, a_subcorpus_copy)
 
         assert a_subcorpus_copy.id == a_subcorpus_id, "%s, %s" % (a_subcorpus_copy.id, a_subcorpus_id)
 
@@ -379,49 +535,103 @@ class ontonotes:
     ## Get the database cursor
     #
     @staticmethod
+    @register_config("db", "streaming", allowed_values=["true", "false"],
+                     doc="If true, big reads from the db, such as all the trees of a subcorpus, stream " +
+                         "rows from the server over a connection of their own instead of reading them " +
+                         "all into memory first.")
     def db_cursor(config):
-        """ calls get_db_cursor with db.{db,host,user} """
+        """ calls get_db_cursor with db.{db,host,user,streaming,backend} """
+
+        streaming = config.has_option("db", "streaming") and on.common.util.make_bool(config["db", "streaming"])
+        backend = config["db", "backend"] if config.has_option("db", "backend") else "mysql"
+
+        if backend == "sqlite":
+            return ontonotes.get_db_cursor(config["db", "db"], None, None, streaming=streaming, backend=backend)
+
+        if backend != "mysql":
+            raise Exception("db.backend must be mysql or sqlite, not %r" % backend)
+
+        for option in ["host", "user"]:
+            if not config.has_option("db", option):
+                raise Exception("db.%s must be set for the mysql backend" % option)
 
         return ontonotes.get_db_cursor(config["db", "db"],
                                        config["db", "host"],
-                                       config["db", "user"])
+                                       config["db", "user"],
+                                       streaming=streaming)
 
-    @staticmethod
-    def _get_db_cursor(a_db, a_host, a_user, connections={}):
+    _db_pools = {} # one connection pool per database, so we don't open identical connections
+    _db_pools_lock = threading.Lock()
+
+    @classmethod
+    def _get_db_pool(cls, a_db, a_host, a_user, streaming=False, backend="mysql"):
         """ don't use this -- use :meth:``db_cursor`` or
         :meth:``get_db_cursor`` instead
-
-        Note that the connections hash persists between calls.  This
-        is intentional and means we don't open identical connections
         """
 
-        if not (a_db, a_host, a_user) in connections:
-            try:
-                connections[a_db, a_host, a_user] = MySQLdb.connect(host=a_host, db=a_db, user=a_user, charset="utf8")
-            except MySQLdb.Error as e:
-                on.common.log.error("%s\n%s%s\n%s%s" % (
-                    "cannot connect to database server.",
-                    "error code    : ", str(e.args[0]),
-                    "error message : ", str(e.args[1])))
-            on.common.log.debug("connected to %s database" % (a_db), on.common.log.DEBUG, on.common.log.MIN_VERBOSITY)
+        if backend == "sqlite":
+            a_db = os.path.abspath(a_db)
+            key = (a_db, backend, streaming)
+
+            def make_pool():
+                return on.common.util.ConnectionPool(
+                    lambda: on.common.util.sqlite_connect(a_db),
+                    lambda a_connection, streaming: on.common.util.SQLiteCursor(a_connection, buffered=not streaming),
+                    streaming=streaming)
 
-        return connections[a_db, a_host, a_user].cursor(MySQLdb.cursors.DictCursor)
+        elif backend == "mysql":
+            key = (a_db, a_host, a_user, streaming)
+
+            def connect():
+                try:
+                    a_connection = MySQLdb.connect(host=a_host, db=a_db, user=a_user, charset="utf8")
+                except MySQLdb.Error as e:
+                    on.common.log.error("%s\n%s%s\n%s%s" % (
+                        "cannot connect to database server.",
+                        "error code    : ", str(e.args[0]),
+                        "error message : ", str(e.args[1])))
+                on.common.log.debug("connected to %s database" % (a_db), on.common.log.DEBUG, on.common.log.MIN_VERBOSITY)
+                return a_connection
+
+            def cursor_factory(a_connection, streaming):
+                return a_connection.cursor(MySQLdb.cursors.SSDictCursor if streaming else MySQLdb.cursors.DictCursor)
+
+            def make_pool():
+                return on.common.util.ConnectionPool(connect, cursor_factory, streaming=streaming)
+
+        else:
+            raise Exception("db.backend must be 'mysql' or 'sqlite' -- given %r" % backend)
+
+        with cls._db_pools_lock:
+            if key not in cls._db_pools:
+                cls._db_pools[key] = make_pool()
+            return cls._db_pools[key]
 
     @classmethod
-    def get_db_cursor(cls, a_db, a_host, a_user):
+    def get_db_cursor(cls, a_db, a_host, a_user, streaming=False, backend="mysql"):
         """
 
         Parameters:
 
-          - ``a_db`` -- The name of the database to connect to
+          - ``a_db`` -- The name of the database to connect to, or
+            for sqlite the file it's in
           - ``a_host`` -- The name of the server the database is hosted on
           - ``a_user`` -- The username to use.  Needs to have no password.
-
-        Returns a :class:`MySQLdb.cursors.DictCursor`.
+          - ``streaming`` -- Whether :func:`on.common.util.streaming_cursor`
+            should give unbuffered cursors for cursors made from this one.
+          - ``backend`` -- ``mysql`` or ``sqlite`` .  For sqlite
+            ``a_host`` and ``a_user`` are ignored.
+
+        Returns a :class:`MySQLdb.cursors.DictCursor` on the calling
+        thread's connection from a :class:`on.common.util.ConnectionPool`,
+        so threads can each use their own cursor safely.  A connection
+        that stopped answering is replaced.  For sqlite it is instead
+        an :class:`on.common.util.SQLiteCursor`, which takes the same
+        statements.
 
         """
 
-        return cls._get_db_cursor(a_db, a_host, a_user)
+        return cls._get_db_pool(a_db, a_host, a_user, streaming, backend).cursor()
 
     #---- these are some database specific class variables -----#
 
@@ -443,7 +653,8 @@ insert into ontonotes
 ) values (%s)"""
 
     all_normal_classes = [on.corpora.subcorpus,
-                          on.corpora.file, on.corpora.tree.tree,
+                          on.corpora.file, on.corpora.bank_document_hash,
+                          on.corpora.tree.tree,
                           on.corpora.tree.lemma,
                           on.corpora.coreference.coreference_chain,
                           on.corpora.coreference.coreference_link,
@@ -551,6 +762,166 @@ insert into ontonotes
 
             table_names.append(table_name)
 
+    @classmethod
+    def db_indexes(cls):
+        """ the secondary indexes :meth:`initialize_db` makes, as [(table name, index name, columns), ...]
+
+        These are on the columns reading from the db looks rows up by,
+        mostly document ids and the ids of parent rows.
+
+        """
+
+        return [an_index for thing in [on.ontonotes] + cls.all_normal_classes + cls.all_open_type_tables + cls.all_closed_type_tables + cls.all_ontology_type_tables
+                if hasattr(thing, "sql_table_name")
+                for an_index in on.common.util.sql_secondary_indexes(thing.sql_create_statement)]
+
+    @classmethod
+    def db_table_order(cls):
+        """ the names of the tables :meth:`initialize_db` makes, each after the tables its foreign keys reference
+
+        A table's reference to itself, as from a tree node to its
+        parent, is left out.  It's the order for
+        :class:`on.common.util.BufferedCursor` to send rows in.
+
+        """
+
+        references = OrderedDict()
+        for thing in [on.ontonotes] + cls.all_normal_classes + cls.all_open_type_tables + cls.all_closed_type_tables + cls.all_ontology_type_tables:
+            if hasattr(thing, "sql_table_name"):
+                table_name, referenced = on.common.util.sql_foreign_keys(thing.sql_create_statement)
+                references[table_name] = referenced
+
+        for sql_create_stmt in [on.corpora.sense.on_sense_type.pb_sql_create_statement,
+                                on.corpora.sense.on_sense_type.wn_sql_create_statement,
+                                on.corpora.ontology.concept.parent_sql_create_statement,
+                                on.corpora.ontology.concept.relation_sql_create_statement,
+                                on.corpora.ontology.concept.feature_sql_create_statement,
+                                on.corpora.ontology.sense_pool.sense_sql_create_statement]:
+            table_name, referenced = on.common.util.sql_foreign_keys(sql_create_stmt)
+            references[table_name] = referenced
+
+        table_order = []
+        def visit(table_name, visiting):
+            if table_name in table_order or table_name in visiting or table_name not in references:
+                return
+            visiting.add(table_name)
+            for referenced in references[table_name]:
+                visit(referenced, visiting)
+            table_order.append(table_name)
+
+        for table_name in references:
+            visit(table_name, set())
+        return table_order
+
+    @classmethod
+    def drop_db_indexes(cls, cursor):
+        """ drop the secondary indexes from :meth:`db_indexes` , returning the ones dropped
+
+        Inserts don't have to keep dropped indexes up to date, so a
+        big load is faster if they're dropped first and made again
+        after with :meth:`create_db_indexes` .
+
+        """
+
+        dropped = []
+        for table_name, index_name, index_columns in cls.db_indexes():
+            try:
+                cursor.execute("""drop index %s on %s""" % (index_name, table_name))
+            except Exception:
+                on.common.log.status("could not drop index %s on %s" % (index_name, table_name))
+            else:
+                dropped.append((table_name, index_name, index_columns))
+        return dropped
+
+    @classmethod
+    def create_db_indexes(cls, cursor, indexes=None):
+        """ make the secondary indexes in indexes, by default all of :meth:`db_indexes` """
+
+        if indexes is None:
+            indexes = cls.db_indexes()
+
+        on.common.log.status("Creating %s indexes..." % len(indexes))
+        for table_name, index_name, index_columns in indexes:
+            cursor.execute("""create index %s on %s (%s)""" % (index_name, table_name, index_columns))
+
+    ## @var tables and columns added since there were databases made
+    #  without them, as [(table name, column, statements), ...] in the
+    #  order they were added, with a column of None for a whole table.
+    #  The statements add the table or column to an old db, fill it in
+    #  and index it; see :meth:`upgrade_db` .  Ids of tree nodes other
+    #  than roots end with @<tree index>@<document id>.
+    db_upgrades = [
+        ("lemma", "document_id",
+         ["""alter table lemma add document_id varchar(255)""",
+          """update lemma set document_id = substr(leaf_id, instr(leaf_id, '@') + instr(substr(leaf_id, instr(leaf_id, '@') + 1), '@') + 1)""",
+          """create index lemma_document_id on lemma (document_id)"""]),
+        ("bank_document_hash", None,
+         [on.corpora.bank_document_hash.sql_create_statement]),
+        ("token", "document_id",
+         ["""alter table token add document_id varchar(255)""",
+          """update token set document_id = substr(id, instr(id, '@') + instr(substr(id, instr(id, '@') + 1), '@') + 1)""",
+          """create index token_document_id on token (document_id)""",
+
+          # written with token.document_id, tree.document_id went from only the roots to every node
+          """update tree set document_id = substr(id, instr(id, '@') + instr(substr(id, instr(id, '@') + 1), '@') + 1) where parent_id is not null""",
+          """create index syntactic_link_reference_subtree_id on syntactic_link (reference_subtree_id)""",
+          """create index compound_function_tag_id on compound_function_tag (id)"""]),
+    ]
+
+    @staticmethod
+    def db_tables(cursor):
+        """ the names of the tables in the db """
+
+        cursor.execute("""show tables""")
+
+        # each row has just the one column, named for the db in mysql
+        return [list(row.values())[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def db_columns(cursor, table_name):
+        """ the names of the columns ``table_name`` has in the db """
+
+        cursor.execute("""describe %s""" % table_name)
+
+        # mysql calls it Field, sqlite name
+        return [row["Field"] if "Field" in row else row["name"] for row in cursor.fetchall()]
+
+    @classmethod
+    def _db_lacks(cls, cursor, table_name, column):
+        if column is None:
+            return table_name not in cls.db_tables(cursor)
+        return column not in cls.db_columns(cursor, table_name)
+
+    @classmethod
+    def check_db_schema(cls, cursor):
+        """ raise an exception if the db was made before a table or column of :attr:`db_upgrades` was added
+
+        Reading or writing it would fail, or worse, leave out rows.
+
+        """
+
+        for table_name, column, statements in cls.db_upgrades:
+            if cls._db_lacks(cursor, table_name, column):
+                raise Exception("the db has no %s, as it was made by an older version;"
+                                " run init_db.py --upgrade on it, or load into a freshly initialized db" % (
+                                    table_name if column is None else "%s.%s" % (table_name, column)))
+
+    @classmethod
+    def upgrade_db(cls, cursor):
+        """ bring a db made by an older version up to date with :attr:`db_upgrades`
+
+        Each missing table is made, and each missing column added,
+        filled in from the rows already there and indexed.
+
+        """
+
+        for table_name, column, statements in cls.db_upgrades:
+            if cls._db_lacks(cursor, table_name, column):
+                on.common.log.status("Adding %s..." % (table_name if column is None else "%s.%s" % (table_name, column)))
+                with on.common.util.BufferedCursor(cursor) as a_buffered_cursor:
+                    for statement in statements:
+                        a_buffered_cursor.execute(statement)
+
     @staticmethod
     def write_type_tables_to_db(a_cursor, write_closed_type_tables=False):
         """ Call this after loading everything to the database that
@@ -567,7 +938,8 @@ insert into ontonotes
 
 
         sys.stderr.write("writing the type tables to db...")
-        on.corpora.abstract_type_table.write_to_db(a_cursor, write_closed_type_tables=write_closed_type_tables)
+        with on.common.util.BufferedCursor(a_cursor, table_order=on.ontonotes.db_table_order()) as a_buffered_cursor:
+            on.corpora.abstract_type_table.write_to_db(a_buffered_cursor, write_closed_type_tables=write_closed_type_tables)
         sys.stderr.write("done.\n")
 
 
@@ -576,15 +948,103 @@ insert into ontonotes
     #  @param self
     #  @param cursor The database cursor to be used for processing
     def write_to_db(self, a_cursor):
-        insert_ignoring_dups(self, a_cursor, self.id)
+        self.check_db_schema(a_cursor)
+
+        with on.common.util.BufferedCursor(a_cursor, table_order=on.ontonotes.db_table_order()) as a_buffered_cursor:
+            insert_ignoring_dups(self, a_buffered_cursor, self.id)
 
         #---- write contained objects to database ----#
         #---- write the subcorpus table to db ----#
-        for a_subcorpus in self.subcorpus_hash.itervalues():
+        #---- (each subcorpus batches its inserts in its own transaction) ----#
+        for a_subcorpus in self.subcorpus_hash.values():
             a_subcorpus.write_to_db(a_cursor)
 
         self.write_type_tables_to_db(a_cursor)
 
+    def write_subcorpora_to_db(self, a_cursor, writers=1, delta=False, fast_load=False):
+        """ load the banks of each subcorpus and write it to the db, then the type tables
+
+        With one writer the subcorpora are iterated over as usual, so
+        ``corpus.workers`` processes load them ahead of the one being
+        written.  With ``writers`` more than one, that many processes
+        each load and write whole subcorpora, over db connections of
+        their own, so the server takes several subcorpora at once, and
+        ``corpus.workers`` isn't used.  What each
+        adds to the open type tables (``lemma_type``,
+        ``on_sense_type``, ...) is handed back here and written once,
+        with :meth:`write_type_tables_to_db`, after the last subcorpus.
+
+        ``delta`` is passed on to :meth:`on.corpora.subcorpus.write_to_db`.
+
+        With ``fast_load`` the secondary indexes are dropped first
+        (see :meth:`drop_db_indexes`) and made again once everything
+        is written, and mysql is told not to check foreign keys on the
+        connections writing subcorpora.  Building an index once over
+        all the rows is much faster than keeping it up to date through
+        millions of inserts.  With ``delta`` too the indexes are kept,
+        as deleting each changed document's rows looks them up by them.
+
+        Each subcorpus is reported as it is written.  One that fails
+        is reported with its traceback and the rest are still written;
+        once the type tables are, an exception lists those that
+        failed.
+
+        """
+
+        num_written = [0]
+        failed = []
+
+        def report(a_subcorpus_id, error):
+            num_written[0] += 1
+            if error is None:
+                on.common.log.status("wrote %s to db (%s of %s)" % (a_subcorpus_id, num_written[0], len(self)))
+            else:
+                on.common.log.warning("failed to write %s to db (%s of %s):\n%s" % (a_subcorpus_id, num_written[0], len(self), error))
+                failed.append(a_subcorpus_id)
+
+        self.check_db_schema(a_cursor)
+
+        dropped_indexes = self.drop_db_indexes(a_cursor) if fast_load and not delta else []
+        try:
+            if writers <= 1:
+                if fast_load:
+                    a_cursor.execute("""set foreign_key_checks = 0""")
+
+                # an iteration ends at a subcorpus that fails to load, so
+                # then it is started again after that one
+                subcorpus_ids = deque(self.subcorpus_id_list)
+                while subcorpus_ids:
+                    try:
+                        for a_subcorpus in self._iter_subcorpora(list(subcorpus_ids)):
+                            a_subcorpus_id = subcorpus_ids.popleft()
+                            try:
+                                a_subcorpus.write_to_db(a_cursor, delta=delta)
+                            except Exception:
+                                report(a_subcorpus_id, traceback.format_exc())
+                            else:
+                                report(a_subcorpus_id, None)
+                    except Exception:
+                        report(subcorpus_ids.popleft(), traceback.format_exc())
+            else:
+                a_pool = multiprocessing.get_context("fork").Pool(writers, _subcorpus_writer_init, (self, delta, fast_load))
+                try:
+                    for a_subcorpus_id, a_type_table_state, error in a_pool.imap_unordered(_subcorpus_writer_write, self.subcorpus_id_list):
+                        if a_type_table_state is not None:
+                            on.corpora.abstract_type_table.merge_open_state(a_type_table_state)
+                        report(a_subcorpus_id, error)
+                finally:
+                    a_pool.terminate()
+
+            self.write_type_tables_to_db(a_cursor)
+        finally:
+            if fast_load:
+                a_cursor.execute("""set foreign_key_checks = 1""")
+            if dropped_indexes:
+                self.create_db_indexes(a_cursor, dropped_indexes)
+
+        if failed:
+            raise Exception("failed to write %s of %s subcorpora to db: %s" % (len(failed), len(self), " ".join(failed)))
+
     ## Dump the contents of the table that represents the ontonotes
     #  object
     #
@@ -618,6 +1078,7 @@ insert into ontonotes
         """ use :meth:``__init__`` instead (with ``db.*`` set) """
 
         a_cursor = self.db_cursor(self.config)
+        self.check_db_schema(a_cursor)
 
         subcorpora = self.config_opt("load", "").split()
 
@@ -638,16 +1099,51 @@ insert into ontonotes
 
         prefix, suffix = self._interpret_affixes()
 
+        def has_documents(sc_id):
+            """ only read this subcorpus if some document in it matches the prefix/suffix """
+
+            if not prefix and not suffix:
+                return document_counts.get(sc_id, 0) > 0
+
+            return any(on.common.util.matches_an_affix(a_document_id, (prefix, suffix))
+                       for a_document_id in self.document_ids_in_db(a_cursor).get(sc_id, []))
+
+        document_counts = on.corpora.subcorpus.document_counts_in_db(a_cursor)
+
         for sc_id, sc_init_info in on.corpora.subcorpus.subcorpora_in_db(a_cursor, self.id):
-            a_subcorpus = on.corpora.subcorpus(self, sc_init_info, cursor=a_cursor, old_id=sc_id)
-            assert a_subcorpus.id == sc_id
+            if any(sc_id.endswith(make_id_with_ats(sc)) for sc in subcorpora) and has_documents(sc_id):
+                a_subcorpus = on.corpora.subcorpus(self, sc_init_info, cursor=a_cursor, old_id=sc_id)
+                assert a_subcorpus.id == sc_id
+
+                self.add_subcorpus(a_subcorpus)
+
+    def document_ids_in_db(self, a_cursor):
+        """ the ids of the documents of every subcorpus in the db, as
+        a dictionary from subcorpus id
+
+        Read with one query the first time it's needed and kept for
+        the life of this ontonotes object.
+
+        """
+
+        if self._db_document_ids is None:
+            self._db_document_ids = on.corpora.subcorpus.document_ids_in_db(a_cursor)
+        return self._db_document_ids
 
-            if any(a_subcorpus.id.endswith(make_id_with_ats(sc)) for sc in subcorpora):
-                a_cursor.execute("select id from document where subcorpus_id = '%s'" % a_subcorpus.id)
+    def row_counts_in_db(self, a_cursor, table, field="document_id", by_document=False):
+        """ how many rows of ``table`` each subcorpus (or with
+        ``by_document``, each document) in the db has
 
-                if any(on.common.util.matches_an_affix(row["id"], (prefix, suffix)) for row in a_cursor.fetchall()):
-                    """ only read this subcorpus if some document in it matches the prefix/suffix """
-                    self.add_subcorpus(a_subcorpus)
+        See :meth:`on.corpora.subcorpus.row_counts_in_db` .  Each table
+        is counted with one grouped query the first time it's needed
+        and kept for the life of this ontonotes object.
+
+        """
+
+        key = (table, field, by_document)
+        if key not in self._db_row_counts:
+            self._db_row_counts[key] = on.corpora.subcorpus.row_counts_in_db(a_cursor, table, field, by_document)
+        return self._db_row_counts[key]
 
     def _interpret_affixes(self):
         prefix = []
@@ -778,3 +1274,332 @@ insert into ontonotes
                     sys.stderr.write("\n")
 
 
+
+#---- loading subcorpora in worker processes, for ontonotes.__iter__ ----#
+
+def _is_db_handle(obj):
+    return type(obj).__module__.startswith("MySQLdb") or isinstance(obj, on.common.util.SQLiteCursor)
+
+class _subcorpus_pickler(pickle.Pickler):
+    """ pickle a loaded subcorpus without its ontonotes instance or db handles, and without deep recursion
+
+    Those are looked up again on the other side by :class:`_subcorpus_unpickler`.
+
+    Pickled the usual way, every object is saved inside the one that
+    first refers to it, so a tree node takes its children with it,
+    they theirs, and through the annotation on them other trees and
+    their annotation in turn, each a level deeper on the C stack.  For
+    a big enriched subcorpus that is deep enough to crash the process.
+    Instead, objects of :mod:`on.corpora` classes are saved as a
+    reference wherever they occur, and their contents after the object
+    being dumped, as flat lists of ``(index, state, list items, dict
+    items)`` , until none are left.  So nothing is nested deeper than
+    the lists and dictionaries within a single object.
+
+    """
+
+    def __init__(self, a_file, a_ontonotes):
+        pickle.Pickler.__init__(self, a_file, pickle.HIGHEST_PROTOCOL)
+        self.ontonotes = a_ontonotes
+        self._deferred_objects = [] # every object saved as a reference, by index
+        self._deferred_ids = {}     # id(obj) -> its index in _deferred_objects
+        self._deferred = []     # objects saved as a reference whose contents are still to be saved
+        self._kinds = {}        # type -> "db", "deferred" or "", for how its instances are saved
+
+    def persistent_id(self, obj):
+        if obj is self.ontonotes:
+            return "ontonotes"
+
+        a_type = type(obj)
+        kind = self._kinds.get(a_type)
+        if kind is None:
+            kind = self._kinds[a_type] = "db" if _is_db_handle(obj) else "deferred" if a_type.__module__.startswith("on.corpora") else ""
+
+        if not kind:
+            return None
+        if kind == "db":
+            return "db"
+
+        index = self._deferred_ids.get(id(obj))
+        if index is not None:
+            return index
+
+        a_reduction = obj.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+        if not isinstance(a_reduction, tuple) or a_reduction[0] is not copyreg.__newobj__ or a_reduction[1] != (a_type,):
+            return None # made some other way, as the registries are; pickled in place
+
+        index = len(self._deferred_objects)
+        self._deferred_ids[id(obj)] = index
+        self._deferred_objects.append(obj) # which also keeps its id from being reused
+        self._deferred.append((index, a_reduction))
+        return (index, a_type)
+
+    def dump(self, obj):
+        pickle.Pickler.dump(self, obj)
+
+        while self._deferred:
+            deferred, self._deferred = self._deferred, []
+
+            contents = []
+            for index, a_reduction in deferred:
+                state, list_items, dict_items = (tuple(a_reduction[2:]) + (None, None, None))[:3]
+                contents.append((index, state,
+                                 list(list_items) if list_items is not None else None,
+                                 list(dict_items) if dict_items is not None else None))
+
+            pickle.Pickler.dump(self, contents)
+
+        pickle.Pickler.dump(self, [])
+
+class _subcorpus_unpickler(pickle.Unpickler):
+    """ read back what :class:`_subcorpus_pickler` wrote
+
+    Objects saved as a reference are made empty when first met, where
+    the reference has their class, and filled in from their contents
+    as those are read.  The ontonotes
+    instance is the one given, and db handles are one cursor from it.
+
+    """
+
+    def __init__(self, a_file, a_ontonotes):
+        pickle.Unpickler.__init__(self, a_file)
+        self.ontonotes = a_ontonotes
+        self._cursor = None
+        self._deferred = {} # index -> object
+
+    def persistent_load(self, pid):
+        try:
+            return self._deferred[pid] # an object seen before, by index
+        except KeyError:
+            pass
+
+        if pid == "ontonotes":
+            return self.ontonotes
+        if pid == "db":
+            if self._cursor is None:
+                self._cursor = ontonotes.db_cursor(self.ontonotes.config)
+            return self._cursor
+        if isinstance(pid, tuple):
+            index, cls = pid # the first time an object is seen, with its class
+            obj = self._deferred[index] = cls.__new__(cls)
+            return obj
+        raise pickle.UnpicklingError("unknown persistent id %r" % (pid,))
+
+    def load(self):
+        obj = pickle.Unpickler.load(self)
+
+        while True:
+            deferred = pickle.Unpickler.load(self)
+            if not deferred:
+                return obj
+
+            for index, state, list_items, dict_items in deferred:
+                self._fill(self._deferred[index], state, list_items, dict_items)
+
+    @staticmethod
+    def _fill(obj, state, list_items, dict_items):
+        """ what unpickling does with an object's state, list and dict items """
+
+        if state is not None:
+            if hasattr(obj, "__setstate__"):
+                obj.__setstate__(state)
+            else:
+                slot_state = None
+                if isinstance(state, tuple) and len(state) == 2:
+                    state, slot_state = state
+                if state:
+                    obj.__dict__.update(state)
+                if slot_state:
+                    for name, value in slot_state.items():
+                        setattr(obj, name, value)
+
+        if list_items:
+            obj.extend(list_items)
+        if dict_items:
+            for key, value in dict_items:
+                obj[key] = value
+
+#---- keeping loaded subcorpora on disk, for ontonotes.get_subcorpus ----#
+
+class _subcorpus_cache:
+    """ enriched subcorpora pickled to ``corpus.cache_dir``
+
+    Each entry is a zlib compressed pickle (see
+    :class:`_subcorpus_pickler`) in a file named for the subcorpus id
+    and a key hashed from everything loading its banks depends on: the
+    subcorpus id, the ``corpus`` and ``db`` configuration, the name,
+    size and modification time of each of its files, and the same for
+    every frame and sense inventory file.  Those are stat'd once per
+    cache, so a metadata file changed while the cache is in use is
+    only noticed on the next run.
+    An entry with a stale key is never read again; once the directory
+    is over ``max_mb`` the least recently used entries are removed,
+    stale ones first as nothing touches them.
+
+    Only subcorpora read from files are cached; what a db backed one
+    would load can change without anything here noticing.
+
+    """
+
+    FORMAT = "1"
+
+    # corpus options that don't change what a subcorpus loads to
+    IGNORED_OPTIONS = ["data_in", "load", "workers", "cache_dir", "cache_max_mb"]
+
+    def __init__(self, a_ontonotes, cache_dir, max_mb):
+        self.ontonotes = a_ontonotes
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb*1024*1024
+        self._metadata_signatures = {} # top_dir -> on.common.util.metadata_signature(top_dir), for this run
+
+        if not os.path.isdir(self.cache_dir):
+            on.common.util.mkdirs(self.cache_dir)
+
+    def _key(self, a_subcorpus):
+        config = self.ontonotes.config
+
+        a_hash = hashlib.sha1()
+        def add(*vals):
+            a_hash.update(repr(vals).encode("utf-8"))
+
+        add(self.FORMAT, a_subcorpus.id)
+
+        for section in ["corpus", "db"]:
+            if config.has_section(section):
+                for key, val in sorted(config.items(section, raw=True)):
+                    if section != "corpus" or key not in self.IGNORED_OPTIONS:
+                        add(section, key, val)
+
+        for extension in sorted(a_subcorpus.file_hash):
+            for a_file in a_subcorpus.file_hash[extension]:
+                a_stat = os.stat(a_file.physical_filename)
+                add(a_file.physical_filename, a_stat.st_size, a_stat.st_mtime_ns)
+
+        if a_subcorpus.top_dir not in self._metadata_signatures:
+            self._metadata_signatures[a_subcorpus.top_dir] = on.common.util.metadata_signature(a_subcorpus.top_dir)
+        add(self._metadata_signatures[a_subcorpus.top_dir])
+
+        return a_hash.hexdigest()
+
+    def _prefix(self, a_subcorpus):
+        return re.sub(r"[^\w@.-]", "_", a_subcorpus.id) + "-"
+
+    def _fname(self, a_subcorpus):
+        return os.path.join(self.cache_dir, "%s%s.pickle.z" % (self._prefix(a_subcorpus), self._key(a_subcorpus)))
+
+    def load(self, a_subcorpus):
+        """ return the cached enriched copy of a_subcorpus, or None """
+
+        if a_subcorpus.backed_by() != "fs":
+            return None
+
+        fname = self._fname(a_subcorpus)
+        if not os.path.exists(fname):
+            return None
+
+        try:
+            with open(fname, "rb") as inf:
+                a_subcorpus_copy = _subcorpus_unpickler(io.BytesIO(zlib.decompress(inf.read())), self.ontonotes).load()
+            os.utime(fname) # for eviction, this is now the most recently used
+        except Exception:
+            on.common.log.status("Ignoring unreadable cache entry %s for %s" % (fname, a_subcorpus.id))
+            return None
+
+        on.common.log.status("Restored %s from %s" % (a_subcorpus.id, fname))
+        return a_subcorpus_copy
+
+    def save(self, a_subcorpus, a_subcorpus_copy):
+        """ store a_subcorpus_copy, a_subcorpus with its banks loaded """
+
+        if a_subcorpus.backed_by() != "fs":
+            return
+
+        fname = self._fname(a_subcorpus)
+
+        try:
+            a_file = io.BytesIO()
+            _subcorpus_pickler(a_file, self.ontonotes).dump(a_subcorpus_copy)
+
+            tmp_fname = "%s.%s.tmp" % (fname, os.getpid())
+            with open(tmp_fname, "wb") as outf:
+                outf.write(zlib.compress(a_file.getvalue()))
+            os.replace(tmp_fname, fname)
+        except Exception:
+            on.common.log.status("Could not cache %s: %s" % (a_subcorpus.id, traceback.format_exc()))
+            return
+
+        self._evict()
+
+    def _remove(self, fname):
+        try:
+            os.remove(fname)
+        except OSError:
+            pass # another process got there first
+
+    def _evict(self):
+        entries = [] # (last used, size, fname)
+        for fname in listdir_full(self.cache_dir):
+            if fname.endswith(".pickle.z"):
+                try:
+                    a_stat = os.stat(fname)
+                except OSError:
+                    continue
+                entries.append((a_stat.st_mtime, a_stat.st_size, fname))
+
+        total_bytes = sum(size for last_used, size, fname in entries)
+        for last_used, size, fname in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            self._remove(fname)
+            total_bytes -= size
+
+
+_loader_ontonotes = None
+
+def _subcorpus_loader_init(a_ontonotes):
+    global _loader_ontonotes
+
+    # db connections inherited from the parent aren't used; the
+    # connection pools make their own in this process
+    _loader_ontonotes = a_ontonotes
+
+def _subcorpus_loader_load(a_subcorpus_id):
+    """ returns (the pickled subcorpus, what loading it added to the open type tables)
+
+    or (None, None) if it couldn't be pickled, for the caller to load it itself.
+
+    """
+
+    a_type_table_state = on.corpora.abstract_type_table.get_open_state()
+    a_subcorpus = _loader_ontonotes.get_subcorpus(a_subcorpus_id, banks_loaded=True, use_cache=False)
+
+    a_file = io.BytesIO()
+    try:
+        _subcorpus_pickler(a_file, _loader_ontonotes).dump(a_subcorpus)
+    except RecursionError:
+        return None, None
+    return a_file.getvalue(), on.corpora.abstract_type_table.get_open_state_since(a_type_table_state)
+
+#---- writing subcorpora in worker processes, for ontonotes.write_subcorpora_to_db ----#
+
+def _subcorpus_writer_init(a_ontonotes, delta, fast_load):
+    global _writer_ontonotes, _writer_delta
+
+    # as for loading, each process makes db connections of its own
+    _writer_ontonotes = a_ontonotes
+    _writer_delta = delta
+
+    if fast_load:
+        ontonotes.db_cursor(a_ontonotes.config).execute("""set foreign_key_checks = 0""")
+
+def _subcorpus_writer_write(a_subcorpus_id):
+    """ returns (subcorpus id, what it added to the open type tables, traceback if it failed) """
+
+    a_type_table_state = on.corpora.abstract_type_table.get_open_state()
+    try:
+        a_subcorpus = _writer_ontonotes.get_subcorpus(a_subcorpus_id, banks_loaded=True, use_cache=False)
+        a_subcorpus.write_to_db(ontonotes.db_cursor(_writer_ontonotes.config), delta=_writer_delta)
+    except Exception:
+        return a_subcorpus_id, None, traceback.format_exc()
+
+    return a_subcorpus_id, on.corpora.abstract_type_table.get_open_state_since(a_type_table_state), None
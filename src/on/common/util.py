@@ -89,6 +89,11 @@ See:
    - :func:`make_db_ref`
    - :func:`is_not_loaded`
    - :func:`make_not_loaded`
+   - :class:`BufferedCursor`
+   - :class:`ConnectionPool`
+   - :func:`streaming_cursor`
+   - :func:`sqlite_connect`
+   - :class:`SQLiteCursor`
 
  - SGML (``.name`` and ``.coref`` files):
 
@@ -126,6 +131,8 @@ Functions:
   .. autofunction:: register_config
   .. autofunction:: insert_ignoring_dups
   .. autofunction:: matches_an_affix
+  .. autofunction:: diff_align
+  .. autofunction:: myers_matches
   .. autofunction:: output_file_name
   .. autofunction:: validate_file_for_utf_8
   .. autofunction:: validate_paths_for_utf_8
@@ -159,12 +166,20 @@ Functions:
   .. autoclass:: bunch
   .. autofunction:: is_db_ref
   .. autofunction:: make_db_ref
+  .. autofunction:: is_db_ids_ref
+  .. autofunction:: make_db_ids_ref
   .. autofunction:: is_not_loaded
   .. autofunction:: make_not_loaded
   .. autofunction:: esc
   .. autofunction:: make_sgml_safe
   .. autofunction:: make_sgml_unsafe
   .. autoclass:: FancyConfigParser
+  .. autoclass:: BufferedCursor
+  .. autoclass:: ConnectionPool
+  .. autofunction:: streaming_cursor
+  .. autofunction:: sqlite_connect
+  .. autofunction:: sqlite_statements
+  .. autoclass:: SQLiteCursor
 
 """
 
@@ -178,6 +193,7 @@ import os
 import time
 import getopt
 import zlib
+import hashlib
 import gzip
 import bz2
 import base64
@@ -185,8 +201,12 @@ import codecs
 import xml.dom.minidom
 import configparser
 from optparse import OptionParser
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import tempfile
+import threading
+import weakref
+import contextlib
+import sqlite3
 #import commands
 import subprocess
 import xml.etree.ElementTree as ElementTree
@@ -1446,6 +1466,26 @@ def mkdirs(long_path):
 
     os.mkdir(long_path)
 
+def metadata_signature(top_dir):
+    """ a hash of the name, size and modification time of every frame and sense inventory file under ``top_dir``
+
+    ``top_dir`` is a language directory, as a subcorpus's ``top_dir``.
+    The hash changes when any of the files is added, removed or
+    edited in place.  It stats every file, so callers needing it for
+    many subcorpora should work it out once.
+
+    """
+
+    a_hash = hashlib.sha1()
+    for metadata_dir in ["frames", "sense-inventories"]:
+        for curpath, curdirs, curfiles in os.walk(os.path.join(top_dir, "metadata", metadata_dir)):
+            curdirs.sort()
+            for fname in sorted(curfiles):
+                a_stat = os.stat(os.path.join(curpath, fname))
+                a_hash.update(("\0%s\0%s\0%s" % (os.path.join(curpath, fname), a_stat.st_size,
+                                                 a_stat.st_mtime_ns)).encode("utf-8"))
+    return a_hash.hexdigest()
+
 def prop_sgml2plain_string(prop_sgml_string):
     a_plain_string_from_argument_tagged_string = re.sub("^DOMAIN.*?>", "", prop_sgml_string)
     a_plain_string_from_argument_tagged_string = re.sub("<C.*?>", "", a_plain_string_from_argument_tagged_string)
@@ -1755,7 +1795,7 @@ def is_db_ref(a_hash):
 
     """
 
-    return a_hash and a_hash.keys() == ['DB']
+    return a_hash and list(a_hash.keys()) == ['DB']
 
 def make_db_ref(a_cursor):
     """ Create a hash substitute that means 'go look in the db instead'.
@@ -1766,6 +1806,27 @@ def make_db_ref(a_cursor):
 
     return {'DB': a_cursor}
 
+def is_db_ids_ref(a_hash):
+    """ Is this hash the ids of what the database holds?
+
+    A hash equal to ``{'DB_IDS' : a_frozenset}`` stands in for a
+    :func:`is_db_ref` hash: where that would have us check whether the
+    database has a row we instead check whether its id is in the set.
+    Unlike a cursor the set can be handed to other processes.
+
+    """
+
+    return a_hash and list(a_hash.keys()) == ['DB_IDS']
+
+def make_db_ids_ref(ids):
+    """ Create a hash substitute that means 'the database has exactly these ids'
+
+    See :func:`is_db_ids_ref`
+
+    """
+
+    return {'DB_IDS': frozenset(ids)}
+
 def is_not_loaded(a_hash):
     """ Do we have no intention of loading the data a_hash is supposed to contain?
 
@@ -1776,7 +1837,7 @@ def is_not_loaded(a_hash):
     drop senses for being references against lemmas that don't exist.
     """
 
-    return a_hash and a_hash.keys() == ['NotLoaded']
+    return a_hash and list(a_hash.keys()) == ['NotLoaded']
 
 def make_not_loaded():
     """ Create a hash substitute that means 'act as if you had this information'
@@ -1789,14 +1850,22 @@ def make_not_loaded():
 
 
 def esc(*varargs):
-    """ given a number of arguments, return escaped (for mysql) versions of each of them """
+    """ given a number of arguments, return escaped (for mysql) versions of each of them
+
+    Without MySQLdb, as when only using the sqlite backend, strings are
+    escaped the same way here; :class:`SQLiteCursor` understands mysql
+    escapes.
+
+    """
 
     try:
         import MySQLdb
     except ImportError:
-        raise Exception("Can't import MySQLdb -- why are you trying to call this function if you're not working with mysql?")
+        return tuple([re.sub(r"""[\0\n\r\\'"\x1a]""", lambda m: "\\" + _MYSQL_UNESCAPES.get(m.group(0), m.group(0)), str(s))
+                      for s in varargs])
 
-    return tuple([MySQLdb.escape_string(str(s)) for s in varargs])
+    escaped = [MySQLdb.escape_string(str(s)) for s in varargs]
+    return tuple([e.decode("utf-8") if isinstance(e, bytes) else e for e in escaped])
 
 def make_sgml_safe(s, reverse=False, keep_turn=True):
     """ return a version of the string that can be put in an sgml document
@@ -1852,22 +1921,48 @@ def insert_ignoring_dups(inserter, a_cursor, *values):
       insert_ignoring_dups(cls,  a_cursor, id, tag)
       insert_ignoring_dups(self.__class__.weirdly_named_sql_insert_statement, a_cursor, id, tag)
 
-    """
-    import MySQLdb
+    Rows are never held back by a :class:`BufferedCursor`; duplicates
+    are only detectable one insert at a time.  What it already holds
+    is sent first, so rows still reach the db in the order written.
 
+    Only duplicate rows are ignored; any other error the db gives is
+    raised.
+
+    """
+    a_cursor = unbuffered(a_cursor)
 
     if type(inserter) == type(""):
         insert_statement = inserter
     else:
-        if hasattr(inserter, "__class__"):
+        if not isinstance(inserter, type) and hasattr(inserter, "__class__"):
             inserter = inserter.__class__
         insert_statement = inserter.sql_insert_statement
 
+    if isinstance(a_cursor, SQLiteCursor):
+        # values go in as parameters, so unescaped
+        a_cursor.executemany(re.sub(r"^\s*insert\s+into", "insert or ignore into", insert_statement, flags=re.I),
+                             [values])
+        return
+
+    import MySQLdb
+
     try:
         a_cursor.executemany("%s" % insert_statement, [esc(*values)])
-    except MySQLdb.connector.Error as e:
-        if(str(e.args[0]) != "1062"):
-            on.common.log.error("{%s, %s} %s %s" % (insert_statement, values, str(e.args[0]), str(e.args[1])))
+    except MySQLdb.IntegrityError as e:
+        if str(e.args[0]) != "1062": # duplicate entry
+            raise
+
+def unbuffered(a_cursor):
+    """ the real cursor behind a :class:`BufferedCursor` , after sending it what was held back
+
+    Other cursors are given back as they are.
+
+    """
+
+    if isinstance(a_cursor, BufferedCursor):
+        a_cursor.flush()
+        return a_cursor.cursor
+    return a_cursor
 
 def uniq(sequence, id_function=None):
 
@@ -1930,7 +2025,9 @@ def matches_an_affix(s, affixes):
 def make_ansi_bold(s):
     return "\033[1m" + s + "\033[m"
 
-def diff_align(seq_a, seq_b, map_differences=False, use_difflib=False):
+DIFF_ALIGN_ENGINES = ["diff", "difflib", "myers"]
+
+def diff_align(seq_a, seq_b, map_differences=False, use_difflib=False, engine=None):
     """ use diff to align lists a and b
 
     Given two sequences, return a hash from indicies in the first
@@ -1943,13 +2040,32 @@ def diff_align(seq_a, seq_b, map_differences=False, use_difflib=False):
 
     if map_differences, attempt to map substitutions
 
-    is use_difflib, use python's difflib library instead of calling
-    diff.  Calling diff only works if you have diff.  Difflib is less
-    effective when there are many small changes, but more effective
-    when there are large blocks that should match exactly.
+    ``engine`` is one of :data:`DIFF_ALIGN_ENGINES`:
+
+     - ``diff`` (the default) writes both sequences to temporary
+       files and calls diff.  Calling diff only works if you have
+       diff, and tokens are compared on their first 30 characters.
+     - ``difflib`` uses python's difflib library.  Difflib is less
+       effective when there are many small changes, but more
+       effective when there are large blocks that should match
+       exactly.  Setting ``use_difflib`` is the same as choosing
+       this engine.
+     - ``myers`` computes a shortest edit script in process with
+       :func:`myers_matches` and maps substitutions the way ``diff
+       -y`` pairs them.  It compares whole tokens and doesn't start
+       a process per call.  Its matches are always a longest common
+       subsequence, but where several are equally long (a repeated
+       token, say) it may pick a different one than diff does, so
+       the hash can differ from the ``diff`` engine's on such ties.
 
     """
 
+    if engine is None:
+        engine = "difflib" if use_difflib else "diff"
+
+    if engine not in DIFF_ALIGN_ENGINES:
+        raise Exception("Unknown diff_align engine %r; expected one of %s" % (engine, ", ".join(DIFF_ALIGN_ENGINES)))
+
     if not seq_a or not seq_b:
         raise Exception("Empty sequence given to diff_align")
 
@@ -1958,12 +2074,26 @@ def diff_align(seq_a, seq_b, map_differences=False, use_difflib=False):
 
     a_to_b = {}
 
-    if use_difflib:
+    if engine == "difflib":
         sm = difflib.SequenceMatcher(None, seq_a, seq_b)
         for a_start, b_start, match_len in sm.get_matching_blocks():
             for i in range(match_len):
                 a_to_b[a_start + i] = b_start + i
 
+    elif engine == "myers":
+        # diff -y shows each gap between matches as a change hunk,
+        # pairing the deleted and inserted lines up in order as
+        # substitutions
+        a_prev, b_prev = 0, 0
+        for a_idx, b_idx in myers_matches(seq_a, seq_b) + [(len(seq_a), len(seq_b))]:
+            if map_differences:
+                for i in range(min(a_idx - a_prev, b_idx - b_prev)):
+                    a_to_b[a_prev + i] = b_prev + i
+            a_to_b[a_idx] = b_idx
+            a_prev, b_prev = a_idx + 1, b_idx + 1
+
+        del a_to_b[len(seq_a)]
+
     else: # shell out to diff
 
         def clean_token(s):
@@ -1977,20 +2107,18 @@ def diff_align(seq_a, seq_b, map_differences=False, use_difflib=False):
         #a.file = open("a.txt","w")
         #b.file = open("b.txt","w")
         for v in [a, b]:
-            v.file = tempfile.NamedTemporaryFile()
+            v.file = tempfile.NamedTemporaryFile("w", encoding="utf-8")
             v.file.write(v.diff_input)
             v.file.flush()
 
-        status, output = subprocess.run(["diff","-y", "--expand-tabs %s %s" % (a.file.name, b.file.name)])
+        output = subprocess.run(["diff", "-y", "--expand-tabs", a.file.name, b.file.name],
+                                stdout=subprocess.PIPE).stdout.decode("utf-8")
 
         for v in [a, b]:
             v.file.close()
             v.idx = 0
 
-        for a_diff_line in output.split("\n"):
-
-            a_diff_line = a_diff_line.decode()
-
+        for a_diff_line in output.split("\n")[:-1]:
 
             found_insertion =      ">" in a_diff_line
             found_deletion =       "<" in a_diff_line
@@ -2043,11 +2171,127 @@ def diff_align(seq_a, seq_b, map_differences=False, use_difflib=False):
         #    for a,b in a_to_b.itervalues():
         #        print seq_a[a],"->",seq_b[b]
 
-        assert max(a_to_b.iterkeys()) < len(seq_a), (max(a_to_b.iterkeys()), len(seq_a))
-        assert max(a_to_b.itervalues()) < len(seq_b), (max(a_to_b.itervalues()), len(seq_b))
+        assert max(a_to_b.keys()) < len(seq_a), (max(a_to_b.keys()), len(seq_a))
+        assert max(a_to_b.values()) < len(seq_b), (max(a_to_b.values()), len(seq_b))
 
     return a_to_b
 
+def myers_matches(seq_a, seq_b):
+    """ the matching (index in seq_a, index in seq_b) pairs of a shortest edit script
+
+    Myers' O(ND) difference algorithm in its linear space form:
+    common prefixes and suffixes are matched directly, and the rest
+    is split at the middle snake of the edit graph and done again on
+    each half, with an explicit stack rather than recursion.  Pairs
+    are returned sorted.
+
+    """
+
+    # compare small ints rather than arbitrary tokens
+    token_ids = {}
+    a = [token_ids.setdefault(x, len(token_ids)) for x in seq_a]
+    b = [token_ids.setdefault(x, len(token_ids)) for x in seq_b]
+
+    matches = []
+    todo = [(0, len(a), 0, len(b))]
+
+    while todo:
+        a_lo, a_hi, b_lo, b_hi = todo.pop()
+
+        while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+            matches.append((a_lo, b_lo))
+            a_lo += 1
+            b_lo += 1
+
+        while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+            a_hi -= 1
+            b_hi -= 1
+            matches.append((a_hi, b_hi))
+
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+
+        split = _myers_middle_snake(a[a_lo:a_hi], b[b_lo:b_hi])
+        if split:
+            x, y = split
+            todo.append((a_lo, a_lo + x, b_lo, b_lo + y))
+            todo.append((a_lo + x, a_hi, b_lo + y, b_hi))
+
+    matches.sort()
+    return matches
+
+def _myers_middle_snake(a, b):
+    """ where the forward and reverse searches of :func:`myers_matches` meet, or None if a and b share nothing
+
+    a and b must differ in their first and in their last elements.
+
+    """
+
+    n, m = len(a), len(b)
+    max_d = (n + m + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d + 2
+    v1 = [-1] * v_length
+    v2 = [-1] * v_length
+    v1[v_offset + 1] = 0
+    v2[v_offset + 1] = 0
+    delta = n - m
+
+    # if the total number of elements is odd, the front path collides
+    # with the reverse path, otherwise the reverse collides with the front
+    front = (delta % 2 != 0)
+
+    # offsets for the start and end of the k loops, to skip diagonals
+    # that have run off the edge of the edit graph
+    k1_start = k1_end = k2_start = k2_end = 0
+
+    for d in range(max_d):
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < n and y1 < m and a[x1] == b[y1]:
+                x1 += 1
+                y1 += 1
+            v1[k1_offset] = x1
+            if x1 > n:
+                k1_end += 2
+            elif y1 > m:
+                k1_start += 2
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and v2[k2_offset] != -1:
+                    if x1 >= n - v2[k2_offset]:
+                        return x1, y1
+
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < n and y2 < m and a[n - x2 - 1] == b[m - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            v2[k2_offset] = x2
+            if x2 > n:
+                k2_end += 2
+            elif y2 > m:
+                k2_start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    y1 = v_offset + x1 - k1_offset
+                    if x1 >= n - x2:
+                        return x1, y1
+
+    return None
+
 def assert_equal(a, b):
     assert a == b
     return a
@@ -2862,6 +3106,594 @@ class DummyCursor():
         pass
 
 
+class BufferedCursor(object):
+    """ a write buffer in front of a MySQLdb cursor
+
+    Rows given to :meth:`executemany` are held, grouped by insert
+    statement, and sent to the real cursor in multi-row batches once
+    ``batch_size`` rows have built up, instead of one round trip per
+    row.  Anything else -- :meth:`execute`, ``fetchall``,
+    ``rowcount``, ... -- first flushes the buffer and then goes to the
+    real cursor, so reads see everything written before them.
+
+    Buffered statements are sent in ``table_order`` , a list of table
+    names with each table after the ones its foreign keys reference,
+    as from :meth:`on.ontonotes.db_table_order` , so parent rows reach
+    the db before the rows that point at them even when they were
+    written in different flushes.  Statements on tables not in it go
+    last, and without one statements are sent in the order they were
+    first seen.  Rows of one statement keep the order they were
+    written in.
+
+    Used as a context manager it makes a transaction: on a clean exit
+    the buffer is flushed and the connection committed, and on an
+    exception the buffered rows are discarded and the connection
+    rolled back.  A batch the db refuses raises, as the rows would
+    have written one at a time.
+
+    .. code-block:: python
+
+      with BufferedCursor(a_cursor, table_order=on.ontonotes.db_table_order()) as a_buffered_cursor:
+          a_subcorpus.write_to_db(a_buffered_cursor)
+
+    """
+
+    def __init__(self, a_cursor, batch_size=1000, table_order=None):
+        self.cursor = a_cursor
+        self.batch_size = batch_size
+        self._table_order = dict((table_name, i) for i, table_name in enumerate(table_order or []))
+        self._rows = OrderedDict() # insert statement -> rows, in the order statements were first seen
+        self._num_rows = 0
+
+    def executemany(self, statement, rows):
+        rows = list(rows)
+        if statement not in self._rows:
+            self._rows[statement] = []
+            self._sort_statements()
+        self._rows[statement].extend(rows)
+        self._num_rows += len(rows)
+
+        if self._num_rows >= self.batch_size:
+            self.flush()
+
+    def _sort_statements(self):
+        def table_rank(statement):
+            m = re.match(r"\s*insert\s+(?:ignore\s+)?into\s+(\w+)", statement, re.I)
+            return self._table_order.get(m and m.group(1), len(self._table_order))
+
+        # sorted() is stable, so ties keep the order first seen
+        for statement in sorted(self._rows, key=table_rank):
+            self._rows.move_to_end(statement)
+
+    def execute(self, *args, **kwargs):
+        self.flush()
+        return self.cursor.execute(*args, **kwargs)
+
+    def flush(self):
+        """ send all buffered rows to the real cursor
+
+        Statements stay known after a flush, so ones first seen in an
+        earlier flush keep their place ahead of later ones.
+
+        """
+
+        try:
+            for statement, rows in self._rows.items():
+                if rows:
+                    self.cursor.executemany(statement, rows)
+        finally:
+            for rows in self._rows.values():
+                del rows[:]
+            self._num_rows = 0
+
+    def __getattr__(self, name):
+        self.flush()
+        return getattr(self.cursor, name)
+
+    def __iter__(self):
+        self.flush()
+        return iter(self.cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        connection = getattr(self.cursor, "connection", None)
+
+        if exc_type is None:
+            try:
+                self.flush()
+            except Exception:
+                if connection is not None:
+                    connection.rollback()
+                raise
+            if connection is not None:
+                connection.commit()
+        else:
+            for rows in self._rows.values():
+                del rows[:]
+            self._num_rows = 0
+            if connection is not None:
+                connection.rollback()
+
+        return False
+
+
+class ConnectionPool(object):
+    """ connections to one database, shared by the threads and processes that use it
+
+    ``connect`` makes a new connection, and ``cursor_factory(a_connection,
+    streaming)`` gives a cursor on one: rows as dictionaries, and with
+    ``streaming`` read from the server as they are iterated over
+    instead of all at once.
+
+    Each thread is given a connection of its own with
+    :meth:`thread_connection`, which it keeps.  Other connections are
+    had with :meth:`checkout` and given back with :meth:`checkin` ,
+    where up to ``max_idle`` wait to be reused.  A connection is
+    pinged before it is handed out, and replaced by a new one if it
+    no longer answers.  Connections are only weakly referenced from
+    :meth:`of`'s registry, so one is closed once nothing holds it, as
+    when the thread it was given to ends.
+
+    A process forked after connections were made can't use them, so
+    the first use of the pool in the child starts over with
+    connections of its own.  The inherited ones are held on to without
+    being used; letting them be collected would close them for the
+    parent too.
+
+    If ``streaming`` is set, :func:`streaming_cursor` gives unbuffered
+    cursors on cursors from this pool.
+
+    """
+
+    _connections = weakref.WeakKeyDictionary() # connection -> the pool it came from
+
+    def __init__(self, connect, cursor_factory, max_idle=4, streaming=False):
+        self.connect = connect
+        self.cursor_factory = cursor_factory
+        self.max_idle = max_idle
+        self.streaming = streaming
+
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._idle = []
+        self._local = threading.local()
+        self._inherited = []
+
+    def _check_process(self):
+        # with self._lock held
+        if self._pid != os.getpid():
+            self._inherited.extend(self._idle)
+            self._inherited.append(self._local)
+            self._idle = []
+            self._local = threading.local()
+            self._pid = os.getpid()
+
+    @staticmethod
+    def _alive(a_connection):
+        try:
+            if hasattr(a_connection, "ping"):
+                a_connection.ping()
+            else:
+                a_connection.cursor().execute("select 1")
+            return True
+        except Exception:
+            return False
+
+    def _new_connection(self):
+        a_connection = self.connect()
+        with self._lock:
+            ConnectionPool._connections[a_connection] = self
+        return a_connection
+
+    def _discard(self, a_connection):
+        with self._lock:
+            ConnectionPool._connections.pop(a_connection, None)
+        try:
+            a_connection.close()
+        except Exception:
+            pass
+
+    def checkout(self):
+        """ a connection no other thread is using, until it's given back with :meth:`checkin` """
+
+        while True:
+            with self._lock:
+                self._check_process()
+                a_connection = self._idle.pop() if self._idle else None
+
+            if a_connection is None:
+                return self._new_connection()
+            if self._alive(a_connection):
+                return a_connection
+
+            on.common.log.debug("dropping a db connection that stopped answering", on.common.log.DEBUG, on.common.log.MIN_VERBOSITY)
+            self._discard(a_connection)
+
+    def checkin(self, a_connection):
+        """ give back a connection from :meth:`checkout` """
+
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.max_idle:
+                self._idle.append(a_connection)
+                return
+
+        self._discard(a_connection)
+
+    @contextlib.contextmanager
+    def connection(self):
+        """ a connection from :meth:`checkout` for the duration of a ``with`` block """
+
+        a_connection = self.checkout()
+        try:
+            yield a_connection
+        finally:
+            self.checkin(a_connection)
+
+    def thread_connection(self):
+        """ this thread's connection, reconnecting if it stopped answering """
+
+        with self._lock:
+            self._check_process()
+            a_local = self._local
+
+        a_connection = getattr(a_local, "connection", None)
+        if a_connection is not None and not self._alive(a_connection):
+            on.common.log.debug("reconnecting to the db", on.common.log.DEBUG, on.common.log.MIN_VERBOSITY)
+            self._discard(a_connection)
+            a_connection = None
+
+        if a_connection is None:
+            a_connection = a_local.connection = self._new_connection()
+
+        return a_connection
+
+    def cursor(self):
+        """ a cursor on this thread's connection """
+
+        return self.cursor_factory(self.thread_connection(), False)
+
+    @classmethod
+    def of(cls, a_cursor):
+        """ the pool a cursor's connection came from, or None """
+
+        if isinstance(a_cursor, BufferedCursor):
+            a_cursor = a_cursor.cursor
+
+        a_connection = getattr(a_cursor, "connection", None)
+        if a_connection is None:
+            return None
+
+        # compared with == rather than is, as some MySQLdb versions
+        # give cursors a weakref.proxy to their connection
+        for b_connection, a_pool in list(cls._connections.items()):
+            if b_connection == a_connection:
+                return a_pool
+        return None
+
+
+@contextlib.contextmanager
+def streaming_cursor(a_cursor):
+    """ a cursor to stream the rows of a big select through
+
+    If ``a_cursor`` came from a :class:`ConnectionPool` with
+    ``streaming`` set, this is an unbuffered cursor on a connection of
+    its own, so rows are read from the server as they're iterated
+    over instead of all being held in memory first, and ``a_cursor``
+    stays free for other queries meanwhile.  Otherwise it is just
+    ``a_cursor`` .
+
+    .. code-block:: python
+
+      with streaming_cursor(a_cursor) as a_streaming_cursor:
+          a_streaming_cursor.execute("select * from tree")
+          for row in a_streaming_cursor:
+              ...
+
+    """
+
+    a_pool = ConnectionPool.of(a_cursor)
+    if a_pool is None or not a_pool.streaming:
+        yield a_cursor
+        return
+
+    with a_pool.connection() as a_connection:
+        a_streaming_cursor = a_pool.cursor_factory(a_connection, True)
+        try:
+            yield a_streaming_cursor
+        finally:
+            # reads whatever rows are left, freeing the connection
+            a_streaming_cursor.close()
+
+
+
+#---- the sqlite backend ----#
+
+class _SQLiteConnection(sqlite3.Connection):
+    """ a sqlite connection that, unlike ``sqlite3.Connection`` , can be weakly referenced """
+
+def sqlite_connect(fname):
+    """ connect to the sqlite database in ``fname`` for use through :class:`SQLiteCursor`
+
+    The database is put in write-ahead-log mode, so readers in other
+    connections and processes don't block the writer or each other,
+    and syncs to disk only at checkpoints rather than every commit.
+
+    """
+
+    a_connection = sqlite3.connect(fname, timeout=600, factory=_SQLiteConnection)
+    a_connection.row_factory = _sqlite_dict_row
+    a_connection.create_function("regexp", 2, _sqlite_regexp)
+    a_connection.execute("pragma journal_mode = wal")
+    a_connection.execute("pragma synchronous = normal")
+    return a_connection
+
+def _sqlite_dict_row(a_cursor, row):
+    return dict(zip([column[0] for column in a_cursor.description], row))
+
+def _sqlite_regexp(pattern, value):
+    return value is not None and re.search(pattern, value) is not None
+
+_MYSQL_ESCAPES = {"0": "\0", "n": "\n", "r": "\r", "t": "\t", "b": "\b", "Z": "\x1a"}
+_MYSQL_UNESCAPES = {"\0": "0", "\n": "n", "\r": "r", "\x1a": "Z"}
+
+def _sqlite_split_literals(statement):
+    """ split ``statement`` into [(is_literal, text), ...], with the string literals unescaped """
+
+    pieces = []
+    start = i = 0
+    while i < len(statement):
+        quote = statement[i]
+        if quote not in "'\"":
+            i += 1
+            continue
+
+        pieces.append((False, statement[start:i]))
+
+        literal = []
+        i += 1
+        while i < len(statement):
+            c = statement[i]
+            if c == "\\" and i + 1 < len(statement):
+                escaped = statement[i+1]
+                if escaped in "%_":
+                    literal.append(c) # kept, as mysql keeps it, for like patterns
+                literal.append(_MYSQL_ESCAPES.get(escaped, escaped))
+                i += 2
+            elif c == quote and statement[i+1:i+2] == quote:
+                literal.append(quote)
+                i += 2
+            elif c == quote:
+                i += 1
+                break
+            else:
+                literal.append(c)
+                i += 1
+        else:
+            raise Exception("unterminated string in sql: %s" % statement)
+
+        pieces.append((True, "".join(literal)))
+        start = i
+
+    pieces.append((False, statement[start:]))
+    return pieces
+
+def _sqlite_split_columns(body):
+    """ split the body of a create table statement on its top level commas """
+
+    items, depth, current = [], 0, []
+    for c in body:
+        if c == "," and depth == 0:
+            items.append("".join(current).strip())
+            current = []
+            continue
+        depth += {"(": 1, ")": -1}.get(c, 0)
+        current.append(c)
+    items.append("".join(current).strip())
+    return [item for item in items if item]
+
+def _sql_index_item(item):
+    """ (unique, name, columns) if this item of a create table statement is a key, otherwise None """
+
+    m = re.match(r"(unique )?(?:key|index)(?: (\w+))? ?\((.*)\)$", re.sub(r"\s+", " ", item.strip()), re.I)
+    return m and m.groups()
+
+def sql_foreign_keys(statement):
+    """ the tables a mysql ``create table`` statement's foreign keys reference
+
+    Returns (table name, [referenced table name, ...]), as in
+    ``("lemma", ["tree", "document"])``.
+
+    """
+
+    table_name = re.match(r"\s*create\s+table\s+(\w+)", statement, re.I).group(1)
+    return table_name, uniq(re.findall(r"foreign\s+key\s*\([^)]*\)\s*references\s+(\w+)", statement, re.I))
+
+def sql_secondary_indexes(statement):
+    """ the indexes a mysql ``create table`` statement declares, other than unique keys
+
+    Returns [(table name, index name, columns), ...], as in
+    ``("tree", "tree_document_id", "document_id")``.  Unnamed indexes
+    are named ``table__columns``.  Index names are given to
+    ``create index`` as they are, and sqlite wants them unique across
+    the database, so they should start with their table name.
+
+    """
+
+    table_name = re.match(r"\s*create\s+table\s+(\w+)", statement, re.I).group(1)
+    body = statement[statement.index("(")+1:statement.rindex(")")]
+
+    indexes = []
+    for item in _sqlite_split_columns(body):
+        index = _sql_index_item(item)
+        if index and not index[0]:
+            unique, name, index_columns = index
+            indexes.append((table_name, name or "%s__%s" % (table_name, "_".join(re.findall(r"\w+", index_columns))), index_columns))
+    return indexes
+
+def _sqlite_column(item):
+    """ a column or foreign key of a mysql ``create table`` statement, for sqlite """
+
+    item = re.sub(r" ?character set \w+", "", item, flags=re.I)
+
+    # mysql compares text case insensitively unless told to be binary
+    if re.match(r"\w+ (var)?char|\w+ (long|medium)?text", item, re.I):
+        collation = re.search(r" ?collate (\w+)", item, re.I)
+        item = re.sub(r" ?collate \w+", "", item, flags=re.I)
+        if not collation or not collation.group(1).lower().endswith("_bin"):
+            item = re.sub(r"^(\w+ \w+(?: ?\(\d+\))?)", r"\1 collate nocase", item)
+
+    return re.sub(r"references (\w+)\.(\w+)", r"references \1(\2)", item, flags=re.I)
+
+def _sqlite_create_table(statement):
+    table_name = re.match(r"\s*create\s+table\s+(\w+)", statement, re.I).group(1)
+    body = statement[statement.index("(")+1:statement.rindex(")")]
+
+    columns = []
+    for item in _sqlite_split_columns(body):
+        item = re.sub(r"\s+", " ", item)
+
+        index = _sql_index_item(item)
+        if index:
+            if index[0]:
+                columns.append("unique (%s)" % index[2])
+            continue
+
+        columns.append(_sqlite_column(item))
+
+    return ["create table %s (\n  %s\n)" % (table_name, ",\n  ".join(columns))] + [
+        "create index %s on %s (%s)" % (name, table_name, index_columns)
+        for table_name, name, index_columns in sql_secondary_indexes(statement)]
+
+def sqlite_statements(statement, with_parameters=False):
+    """ translate a mysql statement to the sqlite statements that do the same
+
+    String literals are re-quoted for sqlite, parameter markers are
+    changed from ``%s`` to ``?`` if ``with_parameters`` , ``create
+    table`` statements lose their mysql options and have their
+    indexes split off into ``create index`` statements, a column
+    added with ``alter table`` is changed the same way, ``drop index
+    ... on`` loses its table, and setting ``foreign_key_checks`` does
+    nothing.
+
+    """
+
+    pieces = []
+    for is_literal, text in _sqlite_split_literals(statement):
+        if is_literal:
+            pieces.append("'%s'" % text.replace("'", "''"))
+        else:
+            if with_parameters:
+                text = re.sub(r"%\((\w+)\)s", r":\1", text).replace("%s", "?").replace("%%", "%")
+            pieces.append(text)
+
+    statement = "".join(pieces).strip().rstrip(";").strip()
+
+    statement = re.sub(r"\s*default character set \w+\s*$", "", statement, flags=re.I)
+    statement = re.sub(r"^insert\s+ignore\s+into\b", "insert or ignore into", statement, flags=re.I)
+
+    if re.match(r"show\s+tables$", statement, re.I):
+        return ["select name from sqlite_master where type = 'table'"]
+    if re.match(r"(describe|desc)\s+\w+$", statement, re.I):
+        return ["pragma table_info(%s)" % statement.split()[1]]
+    if re.match(r"create\s+table\b", statement, re.I):
+        return _sqlite_create_table(statement)
+    if re.match(r"alter\s+table\s+\w+\s+add\s", statement, re.I):
+        table_name, column = re.match(r"alter\s+table\s+(\w+)\s+add\s+(.*)$", statement, re.I | re.S).groups()
+        return ["alter table %s add %s" % (table_name, _sqlite_column(re.sub(r"\s+", " ", column)))]
+    if re.match(r"drop\s+index\s+\w+\s+on\s+\w+$", statement, re.I):
+        return ["drop index if exists %s" % statement.split()[2]]
+    if re.match(r"set\s+foreign_key_checks\s*=\s*[01]$", statement, re.I):
+        # sqlite only checks foreign keys when asked to, and we never do
+        return ["pragma foreign_keys"]
+
+    return [statement]
+
+class SQLiteCursor(object):
+    """ a cursor on an sqlite database that reads and writes like a MySQLdb DictCursor
+
+    Statements are written for mysql throughout, so each one is
+    translated with :func:`sqlite_statements` before it's run.  Rows
+    are dictionaries.  Like a MySQLdb cursor, a ``buffered`` one reads
+    every row of a select when it's executed, so ``rowcount`` is known;
+    otherwise rows are read as they are fetched.
+
+    The connection should come from :func:`sqlite_connect` .
+
+    """
+
+    def __init__(self, a_connection, buffered=True):
+        self.connection = a_connection
+        self.buffered = buffered
+        self.rowcount = -1
+        self._cursor = a_connection.cursor()
+        self._rows = None
+
+    @staticmethod
+    def _parameters(args):
+        if args is None:
+            return ()
+        if isinstance(args, (tuple, list, dict)):
+            return args
+        return (args,)
+
+    def execute(self, statement, args=None):
+        statements = sqlite_statements(statement, with_parameters=args is not None)
+        for a_statement in statements:
+            self._cursor.execute(a_statement, self._parameters(args) if a_statement is statements[0] else ())
+
+        if self._cursor.description is not None and self.buffered:
+            self._rows = self._cursor.fetchall()
+            self._rows.reverse()
+            self.rowcount = len(self._rows)
+        else:
+            self._rows = None
+            self.rowcount = self._cursor.rowcount
+
+        return self.rowcount
+
+    def executemany(self, statement, rows):
+        [a_statement] = sqlite_statements(statement, with_parameters=True)
+        self._cursor.executemany(a_statement, [self._parameters(row) for row in rows])
+        self._rows = None
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def fetchone(self):
+        if self._rows is None:
+            return self._cursor.fetchone()
+        return self._rows.pop() if self._rows else None
+
+    def fetchmany(self, size=1):
+        rows = []
+        for i in range(size):
+            row = self.fetchone()
+            if row is None:
+                break
+            rows.append(row)
+        return rows
+
+    def fetchall(self):
+        if self._rows is None:
+            return self._cursor.fetchall()
+        rows, self._rows = self._rows[::-1], []
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._rows = None
+        self._cursor.close()
 
 
 def pad_items_in_list(a_list, a_character=None):
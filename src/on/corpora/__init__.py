@@ -63,6 +63,7 @@
 .. autoclass:: abstract_bank
 .. autoclass:: document_bank
 .. autoclass:: file
+.. autoclass:: bank_document_hash
 .. autoclass:: document
 .. autoclass:: sentence
 .. autoclass:: token
@@ -75,6 +76,8 @@
 .. automodule:: on.corpora.ontology
 .. automodule:: on.corpora.speaker
 .. automodule:: on.corpora.parallel
+.. automodule:: on.corpora.annotation_index
+.. automodule:: on.corpora.compiled
 
 """
 
@@ -83,13 +86,18 @@ from __future__ import with_statement
 import os
 import os.path
 import codecs
+import hashlib
 from difflib import SequenceMatcher
 import itertools
+import bisect
+
+import sqlite3
 
 try:
     import MySQLdb
+    _db_errors = (sqlite3.Error, MySQLdb.Error)
 except ImportError:
-    pass
+    _db_errors = (sqlite3.Error,)
 
 import string
 import sys
@@ -173,7 +181,7 @@ class abstract_type_table:
         for a_type_table in on.ontonotes.all_open_type_tables:
             try:
                 a_type_table.write_to_db(a_cursor)
-            except MySQLdb.Error:
+            except _db_errors:
                 pass
 
             sys.stderr.write(".")
@@ -188,6 +196,58 @@ class abstract_type_table:
                         on.common.log.report("populate_type_tables", "duplicate", db_table_name=db_table_name, a_value=value)
                 sys.stderr.write(".")
 
+    @staticmethod
+    def get_open_state():
+        """ copy what the open type tables have collected so far
+
+        The open type tables gather their types (and anything else
+        written with them, such as sense names or ita counts) in
+        dictionaries on the class.  This returns a copy of those
+        dictionaries, by type table and attribute name, so that what
+        one process collects can be handed to another with
+        :meth:`get_open_state_since` and :meth:`merge_open_state`.
+
+        """
+
+        return dict((a_type_table.__name__, dict((name, value.copy()) for name, value in vars(a_type_table).items()
+                                                  if isinstance(value, dict)))
+                    for a_type_table in on.ontonotes.all_open_type_tables)
+
+    @staticmethod
+    def get_open_state_since(an_old_state):
+        """ what the open type tables have collected since :meth:`get_open_state` returned an_old_state
+
+        Counts come back as how much they went up by.
+
+        """
+
+        a_state = abstract_type_table.get_open_state()
+        for a_type_table_name, attributes in a_state.items():
+            for name, value in attributes.items():
+                old_value = an_old_state.get(a_type_table_name, {}).get(name, {})
+
+                if isinstance(value, defaultdict) and value.default_factory is int:
+                    attributes[name] = dict((key, count - old_value.get(key, 0)) for key, count in value.items()
+                                            if count != old_value.get(key, 0))
+                else:
+                    attributes[name] = dict((key, val) for key, val in value.items()
+                                            if key not in old_value or old_value[key] != val)
+        return a_state
+
+    @staticmethod
+    def merge_open_state(a_state):
+        """ add what another process collected in the open type tables, from :meth:`get_open_state_since`, to ours """
+
+        for a_type_table in on.ontonotes.all_open_type_tables:
+            for name, value in a_state.get(a_type_table.__name__, {}).items():
+                attribute = getattr(a_type_table, name)
+
+                if isinstance(attribute, defaultdict) and attribute.default_factory is int:
+                    for key, count in value.items():
+                        attribute[key] += count
+                else:
+                    attribute.update(value)
+
 class abstract_open_type_table:
 
     def __init__(self, a_id, data_pointer=None):
@@ -255,11 +315,34 @@ class abstract_bank(object):
      - :class:`on.corpora.speaker.speaker_bank`
      - :class:`on.corpora.parallel.parallel_bank`
 
+    A ``from_db`` should read each table once for the whole subcorpus
+    rather than once per document; :meth:`document_ids_from_db` and
+    :meth:`rows_from_db` do the querying, leaving only the building of
+    documents from rows.
+
+    .. automethod:: document_ids_from_db
+    .. automethod:: rows_from_db
+
+    For rewriting only some documents, as ``load_to_db`` does in delta
+    mode, each bank lists in ``sql_document_rows`` where a document's
+    rows are, so :meth:`delete_document_from_db` can remove them before
+    ``write_to_db`` is given the ``document_ids`` to write again.
+
+    .. automethod:: delete_document_from_db
+
     """
 
+    ## @var the rows each document has in the db, as (table, where clause) pairs with
+    #  children before their parents.  Where clauses can use %(document_id)s, and a
+    #  table without a document id column finds its rows through its parent's, so
+    #  that every delete is an index lookup.
+    sql_document_rows = []
+
     def __init__(self, a_subcorpus, tag, extension):
         self._document_hash = {}
-        self._document_id_list= []
+        self._document_ids = []             # use _document_id_list, which sorts this first if needed
+        self._document_ids_sorted = True
+        self._document_id_set = set()       # for membership tests
         self.subcorpus = a_subcorpus
         self.tag = tag
 
@@ -272,12 +355,35 @@ class abstract_bank(object):
     def id(self):
         return '%s@%s' % (self.tag, self.subcorpus.id)
 
+    @property
+    def _document_id_list(self):
+        """ the ids of all our documents, sorted
+
+        Appending doesn't keep the ids sorted; we sort them the next
+        time they're needed in order.
+
+        """
+
+        if not self._document_ids_sorted:
+            self._document_ids.sort()
+            self._document_ids_sorted = True
+        return self._document_ids
+
+    def _add_document_id(self, document_id):
+        if self._document_ids and self._document_ids[-1] > document_id:
+            self._document_ids_sorted = False
+        self._document_ids.append(document_id)
+        self._document_id_set.add(document_id)
+
+    def _remove_document_id(self, document_id):
+        self._document_ids.remove(document_id)
+        self._document_id_set.discard(document_id)
+
     def append(self, a_document):
-        if a_document.document_id in self._document_id_list:
+        if a_document.document_id in self._document_id_set:
             raise Exception("Already contain " + a_document.document_id)
 
-        self._document_id_list.append(a_document.document_id)
-        self._document_id_list.sort()
+        self._add_document_id(a_document.document_id)
         self._document_hash[a_document.document_id] = a_document
 
 
@@ -285,7 +391,10 @@ class abstract_bank(object):
         del self[self.index(a_document_id_or_instance)]
 
     def index(self, a_document_id_or_instance):
-        return self._document_id_list.index(self.__document_id(a_document_id_or_instance))
+        document_id = self.__document_id(a_document_id_or_instance)
+        if document_id not in self._document_id_set:
+            raise ValueError("%r is not in %s" % (document_id, self.id))
+        return bisect.bisect_left(self._document_id_list, document_id)
 
     def get_document(self, a_document_id_or_instance):
         """ given either a document or a document_id, return the document with a matching id
@@ -308,17 +417,19 @@ class abstract_bank(object):
 
         Returns true iff get_document would complete without a key_error
         """
-        return self.__document_id(a_document_id_or_instance) in self._document_id_list
+        return self.__document_id(a_document_id_or_instance) in self._document_id_set
 
     def __delitem__(self, index):
-        del self._document_hash[self._document_id_list[index]]
-        del self._document_id_list[index]
+        document_id = self._document_id_list[index]
+        del self._document_hash[document_id]
+        del self._document_ids[index]
+        self._document_id_set.discard(document_id)
 
     def __getitem__(self, index):
         return self._document_hash[self._document_id_list[index]]
 
     def __len__(self):
-        return len( self._document_hash )
+        return len( self._document_ids )
 
     def __repr__(self):
         return "%s instance, id=%s, documents:" % (self.info_name(), self.id) + "\n" + on.common.util.repr_helper(enumerate(self._document_id_list))
@@ -343,6 +454,54 @@ class abstract_bank(object):
     def from_db(cls, a_subcorpus, tag, a_cursor, affixes=None):
         raise NotImplementedError("from_db in " + cls.info_name())
 
+    @staticmethod
+    def document_ids_from_db(a_subcorpus, a_cursor, affixes=None):
+        """ the ids of the documents of a_subcorpus in the db that match the affixes """
+
+        a_cursor.execute("""select document.id from document where subcorpus_id = '%s';""" % (a_subcorpus.id))
+
+        return [document_row["id"] for document_row in a_cursor.fetchall()
+                if on.common.util.matches_an_affix(document_row["id"], affixes)]
+
+    @staticmethod
+    def rows_from_db(a_subcorpus, a_cursor, table, document_id_column=None, joins="", order_by="", key=None):
+        """ every row of ``table`` for the documents of a_subcorpus, read with one query
+
+        Returns a dictionary from document id to the list of that
+        document's rows, in the order the db gives them or by
+        ``order_by``.  With ``key`` the rows are grouped by that column
+        instead, as by proposition id for the predicates.
+
+        ``document_id_column`` is the column holding each row's
+        document id, by default ``table.document_id``.  A table that
+        only reaches its document through other tables names them in
+        ``joins``:
+
+        .. code-block:: python
+
+          rows_from_db(a_subcorpus, a_cursor, "coreference_link",
+                       document_id_column="coreference_chain.document_id",
+                       joins="join coreference_chain on coreference_link.coreference_chain_id = coreference_chain.id",
+                       key="coreference_chain_id")
+
+        """
+
+        if not document_id_column:
+            document_id_column = "%s.document_id" % table
+
+        rows_by_key = defaultdict(list)
+        with on.common.util.streaming_cursor(a_cursor) as a_streaming_cursor:
+            a_streaming_cursor.execute("""select %s.*, document.id as bank_document_id from %s %s
+                                          join document on %s = document.id
+                                          where document.subcorpus_id = '%s'%s;""" % (
+                table, table, joins, document_id_column, a_subcorpus.id,
+                " order by %s" % order_by if order_by else ""))
+
+            for a_row in a_streaming_cursor:
+                rows_by_key[a_row[key or "bank_document_id"]].append(a_row)
+
+        return rows_by_key
+
     def enrich_treebank(self, a_treebank):
         todo = "%s with %s" % (a_treebank.extension, self.extension)
 
@@ -357,18 +516,37 @@ class abstract_bank(object):
             a_document.tree_document = a_treebank.get_document(a_document)
 
 
-    def write_to_db(self, a_cursor):
+    def write_to_db(self, a_cursor, document_ids=None):
+        """ write this bank and its documents, or if document_ids is
+        given only the documents with those ids, to the db """
+
         sys.stderr.write("writing %s to db..." % self.info_name())
 
         if hasattr(self, "sql_insert_statement"):
             insert_ignoring_dups(self, a_cursor, self.id, self.subcorpus.id, self.tag)
 
-        for a_document in self:
+        for a_document in (self if document_ids is None else self._documents_with_ids(document_ids)):
             sys.stderr.write(".")
             a_document.write_to_db(a_cursor)
 
         sys.stderr.write("\n")
 
+    def _documents_with_ids(self, document_ids):
+        for a_document_id in list(self._document_id_list):
+            if a_document_id in document_ids:
+                try:
+                    yield self.get_document(a_document_id)
+                except KeyError:
+                    pass # dropped when it was lazily read
+
+    @classmethod
+    def delete_document_from_db(cls, a_document_id, a_cursor):
+        """ delete the rows of one document of this kind of bank from the db """
+
+        for table, condition in cls.sql_document_rows:
+            a_cursor.execute("delete from %s where %s" % (table, condition),
+                             {"document_id": a_document_id})
+
     def copy_to_different_trees(self, alignments_from_to, alignments_to_from,
                                 to_treebank, from_treebank, existant_to_bank=None,
                                 ignore_errors=False):
@@ -776,6 +954,47 @@ class subcorpus(dict):
 
         return a_subcorpus
 
+    def copy_with_documents(self, document_ids):
+        """ a copy of this subcorpus with only the files of the documents in ``document_ids``
+
+        Only meaningful for subcorpora read from files; see
+        :meth:`backed_by`.
+
+        """
+
+        document_ids = set(document_ids)
+
+        a_subcorpus = subcorpus(self.ontonotes, self.physical_root_dir, cursor="a fake cursor", old_id=self.id)
+        for extension in self.file_hash:
+            a_subcorpus.file_hash[extension] = [a_file for a_file in self.file_hash[extension]
+                                                if a_file.document_id in document_ids]
+        return a_subcorpus
+
+    def split_by_document(self, document_ids=None):
+        """ generate, for each document, a copy of this subcorpus with only that document's files
+
+        If ``document_ids`` is given, only for those documents that are
+        in this subcorpus.  Only meaningful for subcorpora read from
+        files; see :meth:`backed_by`.
+
+        """
+
+        files_by_document = defaultdict(lambda: defaultdict(list)) # document_id -> extension -> files
+        for extension in self.file_hash:
+            for a_file in self.file_hash[extension]:
+                files_by_document[a_file.document_id][extension].append(a_file)
+
+        all_document_ids = set(files_by_document)
+        if document_ids is not None:
+            all_document_ids &= set(document_ids)
+
+        for document_id in sorted(all_document_ids):
+            # not self.copy(), which would copy every file of the subcorpus each time
+            a_subcorpus = subcorpus(self.ontonotes, self.physical_root_dir, cursor="a fake cursor", old_id=self.id)
+            for extension in self.file_hash:
+                a_subcorpus.file_hash[extension] = files_by_document[document_id][extension]
+            yield a_subcorpus
+
     @register_config("corpus", "banks",
                      doc="Any extension is allowed as long as it is standard or ends in " +
                          "'_' followed by one of the standard ones. " +
@@ -788,7 +1007,30 @@ class subcorpus(dict):
     @register_config("corpus", "prop-ignore-errors", allowed_values=["true", "false"])
     @register_config("corpus", "ignore-inventories", allow_multiple=True,
                      allowed_values=["senses", "frames", "senses,frames", "frames,senses"])
-    def load_banks(self, config):
+    @register_config("corpus", "parse-engine", allowed_values=["regex", "iterative"],
+                     doc="How to build trees from parse strings.  'regex' (the default) is the " +
+                         "original recursive parser; 'iterative' is a single pass parser that is " +
+                         "linear in the length of the parse.")
+    @register_config("corpus", "lazy-trees", allowed_values=["true", "false"],
+                     doc="If true, treebanks read from files only parse a document's trees the " +
+                         "first time that document is used.")
+    @register_config("corpus", "max-resident-documents",
+                     doc="With lazy-trees, the most parsed documents a treebank keeps before " +
+                         "dropping the least recently used.  Unbounded if unset or 0.  Only for " +
+                         "loading treebanks alone, as enriched documents can't be dropped.")
+    @register_config("corpus", "compiled-dir",
+                     doc="Where tools/compile_treebanks.py put compiled treebanks.  If set, treebanks " +
+                         "read from files are built from there instead for the documents that haven't " +
+                         "changed since they were compiled.")
+    @register_config("corpus", "frames-index",
+                     doc="Where to keep the index of frame files that proposition banks read from files " +
+                         "look frames up in.  Defaults to metadata/.frames-index.json in the language's " +
+                         "directory.")
+    @register_config("corpus", "sense-inventories-index",
+                     doc="Where to keep the manifest of sense inventory files that sense banks read from " +
+                         "files look inventories up in.  Defaults to metadata/.sense-inventories-index.json " +
+                         "in the language's directory.")
+    def load_banks(self, config, banks=None):
         """ Load the individual bank data for the subcorpus to memory
 
         Once a subcorpus is initialized we know what documents it
@@ -796,7 +1038,7 @@ class subcorpus(dict):
         files (as in cnn_0013.parse, cnn_0013.sense, ...).  We often
         only want to load some of these, so specify which extensions
         (prop, parse, coref) you want with the corpus.banks config
-        variable
+        variable, or pass ``banks`` in the same format to override it.
 
         This code will, for each bank, load the files and then enrich
         the treebank with appropriate links.  For example, enriching
@@ -835,7 +1077,10 @@ class subcorpus(dict):
             return "%s_%s" % (tag, std_ext)
 
         extension_details = [] # extension, stdext, tag, align_tag (None for parses)
-        for extension in config_opt("banks", "parse").replace(","," ").split():
+        if banks is None:
+            banks = config_opt("banks", "parse")
+
+        for extension in banks.replace(","," ").split():
 
             first_half = extension.split(":")[0]
             tag, ext = parse_extension(first_half)
@@ -879,6 +1124,15 @@ class subcorpus(dict):
         if "senses" in config_opt("ignore-inventories", "").replace(","," ").split():
             sense_inventory_hash = on.common.util.make_not_loaded()
 
+        parse_engine = config_opt("parse-engine", "regex")
+        lazy_trees = on.common.util.make_bool(config_opt("lazy-trees", "false"))
+        max_resident_documents = int(config_opt("max-resident-documents", "0"))
+        if lazy_trees and max_resident_documents and [detail for detail in extension_details if detail[2] != "parse"]:
+            raise Exception("corpus.max-resident-documents only works when loading treebanks alone, "
+                            "as documents it drops would lose their annotation; asked to load %s" % (
+                                ", ".join([detail[0] for detail in extension_details])))
+        compiled_dir = config_opt("compiled-dir", "")
+
         on.common.log.status("Loading banks for %s: %s ..." % (self.id, ", ".join([detail[0] for detail in extension_details])))
 
         for refer_extension, real_extension, stdext, tag, s_tag in extension_details:
@@ -891,9 +1145,19 @@ class subcorpus(dict):
                 raise Exception("Asked to load %r multiple times" % refer_extension)
 
             if self.backed_by() == "db":
-                self[refer_extension] = on.corpora.tree.treebank.from_db(self, tag, a_cursor, affixes=affixes)
+                self[refer_extension] = on.corpora.tree.treebank.from_db(self, tag, a_cursor, affixes=affixes,
+                                                                         parse_engine=parse_engine)
             else:
-                self[refer_extension] = on.corpora.tree.treebank(self, tag, file_input_extension=real_extension)
+                a_compiled_treebank = None
+                if compiled_dir:
+                    compiled_fname = on.corpora.compiled.compiled_treebank.fname(compiled_dir, self.id, real_extension)
+                    if os.path.exists(compiled_fname):
+                        a_compiled_treebank = on.corpora.compiled.compiled_treebank(compiled_fname)
+
+                self[refer_extension] = on.corpora.tree.treebank(self, tag, file_input_extension=real_extension,
+                                                                 parse_engine=parse_engine, lazy=lazy_trees,
+                                                                 max_resident_documents=max_resident_documents,
+                                                                 compiled=a_compiled_treebank)
 
             document_extension = refer_extension.replace("parse", "document")
 
@@ -933,9 +1197,11 @@ class subcorpus(dict):
                 frame_set_hash_for_sense = frame_set_hash or on.common.util.make_not_loaded()
                 a_bank = a_bank_class(self, tag, indexing=config_opt("wsd-indexing", "word"),
                                       a_sense_inv_hash=sense_inventory_hash,
-                                      a_frame_set_hash=frame_set_hash_for_sense)
+                                      a_frame_set_hash=frame_set_hash_for_sense,
+                                      sense_inventories_index=config_opt("sense-inventories-index", "") or None)
             elif stdext == "prop":
-                a_bank = a_bank_class(self, tag, a_frame_set_hash=frame_set_hash)
+                a_bank = a_bank_class(self, tag, a_frame_set_hash=frame_set_hash,
+                                      frames_index=config_opt("frames-index", "") or None)
                 prop_ignore_errors = config_opt("prop-ignore-errors", "false")
                 enrich_treebank_kwargs["ignore_errors"] = (prop_ignore_errors == "true")
             elif stdext == "name":
@@ -1024,6 +1290,9 @@ class subcorpus(dict):
     def __setitem__(self, key, value):
         self.banks[key] = value
 
+    def __contains__(self, key):
+        return key in self.banks
+
     def keys(self):
         return self.banks.keys()
 
@@ -1144,7 +1413,7 @@ insert into subcorpus
 ) values (%s, %s, %s, %s, %s, %s, %s)
 """
 
-    def write_to_db(self, a_cursor, only_these_banks=[]):
+    def write_to_db(self, a_cursor, only_these_banks=[], delta=False):
         """ Write the subcorpus and all files and banks within to the database.
 
         Generally it's better to use :meth:`on.ontonotes.write_to_db`
@@ -1157,9 +1426,21 @@ insert into subcorpus
         Parameters:
          - a_cursor -- The ouput of :func:`on.ontonotes.get_db_cursor`
          - only_these_banks -- if set, load only these extensions to the db
+         - delta -- if set, the subcorpus has been written before, and
+           only the documents whose files changed since (by their
+           :class:`bank_document_hash`) are deleted and written again
+
+        Inserts go through an :class:`on.common.util.BufferedCursor`,
+        so they are sent in batches and committed together once the
+        whole subcorpus is written.
 
         """
 
+        if not isinstance(a_cursor, on.common.util.BufferedCursor):
+            #---- batch the inserts, in one transaction per subcorpus ----#
+            with on.common.util.BufferedCursor(a_cursor, table_order=on.ontonotes.db_table_order()) as a_buffered_cursor:
+                return self.write_to_db(a_buffered_cursor, only_these_banks, delta)
+
         #---- insert the value in the table ----#
         insert_ignoring_dups(self, a_cursor,
                              self.id, self.base_dir,
@@ -1167,17 +1448,90 @@ insert into subcorpus
                              self.language_id, self.encoding_id,
                              self.ontonotes_id)
 
+        if not only_these_banks:
+            only_these_banks = list(self.banks.keys())
+
+        #---- work out which documents need writing ----#
+        hashes = self.bank_document_hashes(only_these_banks)
+        document_ids = set(d_id for d_id, a_bank in hashes)
+
+        if delta:
+            old_hashes = dict((key, content_hash) for key, content_hash in bank_document_hash.from_db(self.id, a_cursor).items()
+                              if key[1] in only_these_banks)
+
+            #---- the other banks annotate the trees, so a change to any file of a document rewrites all of it ----#
+            document_ids = set(d_id for d_id, a_bank in set(hashes) | set(old_hashes)
+                               if hashes.get((d_id, a_bank)) != old_hashes.get((d_id, a_bank)))
+
+            on.common.log.status("%s documents changed in %s" % (len(document_ids), self.id))
+
+            #---- delete them, other banks before the documents and trees they refer to ----#
+            def deletion_order(a_bank):
+                return (isinstance(self[a_bank], on.corpora.tree.treebank),
+                        isinstance(self[a_bank], document_bank))
+
+            for a_document_id in sorted(document_ids):
+                for a_bank in sorted(only_these_banks, key=deletion_order):
+                    self[a_bank].delete_document_from_db(a_document_id, a_cursor)
+                    bank_document_hash.delete_from_db(a_document_id, a_bank, a_cursor)
+
+                file.delete_document_from_db(a_document_id, a_cursor)
+
         #---- also write the file table ----#
         for key in self.file_hash:
             for ffile in self.file_hash[key]:
-                ffile.write_to_db(a_cursor)
+                if not delta or "%s@%s" % (ffile.document_id, self.id) in document_ids:
+                    ffile.write_to_db(a_cursor)
 
         #---- write all the banks to the database ----#
-        if not only_these_banks:
-            only_these_banks = self.banks.keys()
-
         for a_bank in only_these_banks:
-            self[a_bank].write_to_db(a_cursor)
+            self[a_bank].write_to_db(a_cursor, document_ids=document_ids if delta else None)
+
+        bank_document_hash.write_to_db(self.id, dict((key, content_hash) for key, content_hash in hashes.items()
+                                                     if key[0] in document_ids), a_cursor)
+
+        a_cursor.flush()
+
+    def bank_document_hashes(self, banks=None):
+        """ hash the file each document of each bank is read from
+
+        Returns a dictionary from (document id, bank extension) to a
+        hash of the contents of the document's file for that bank.  A
+        document bank, having no files of its own, goes by the files
+        of the treebanks.  Only file contents go in, so after changing
+        options that affect how files are read, write everything
+        again rather than only what :class:`bank_document_hash` says
+        changed.
+
+        """
+
+        def file_hashes(extension):
+            file_hashes = {}
+            for a_file in self.file_hash.get(extension, []):
+                with open(a_file.physical_filename, "rb") as f:
+                    file_hashes["%s@%s" % (a_file.document_id, self.id)] = hashlib.sha1(f.read()).hexdigest()
+            return file_hashes
+
+        if banks is None:
+            banks = list(self.banks.keys())
+
+        hashes = {}
+        for a_bank in banks:
+            if not isinstance(self[a_bank], document_bank):
+                for a_document_id, content_hash in file_hashes(a_bank).items():
+                    hashes[(a_document_id, a_bank)] = content_hash
+                continue
+
+            tree_file_hashes = [file_hashes(a_treebank) for a_treebank in sorted(self.banks)
+                                if isinstance(self[a_treebank], on.corpora.tree.treebank)]
+
+            for a_document_id in set(d_id for a_tree_file_hashes in tree_file_hashes for d_id in a_tree_file_hashes):
+                a_hash = hashlib.sha1()
+                for a_tree_file_hashes in tree_file_hashes:
+                    a_hash.update(a_tree_file_hashes.get(a_document_id, "").encode("utf-8"))
+                hashes[(a_document_id, a_bank)] = a_hash.hexdigest()
+
+        return hashes
 
 
     @staticmethod
@@ -1202,7 +1556,13 @@ insert into subcorpus
         It usually only ever makes sense to try to do something
         with a table if there's anything in it.  So you use this
         function and if there isn't anything then it returns 0.
-        Otherwise it returns the number of documents """
+        Otherwise it returns the number of documents
+
+        The counts come from grouped queries over the whole db, which
+        the :class:`on.ontonotes` keeps for the run, so only the first
+        subcorpus to ask about a bank pays for a query.
+
+        """
 
         def table_name():
             """ yield the name of a table which will have records for each
@@ -1225,20 +1585,14 @@ insert into subcorpus
         table = table_name()
         field = field_name()
 
-        count = 0
-
-        a_cursor.execute("""select id from document where subcorpus_id = '%s';""" % (self.id))
-        document_rows = a_cursor.fetchall()
-
-        for document_row in document_rows:
-            a_document_id = document_row["id"]
-            if not on.common.util.matches_an_affix(a_document_id, affixes):
-                continue
+        if not affixes or not any(affixes):
+            return self.ontonotes.row_counts_in_db(a_cursor, table, field).get(self.id, 0)
 
-            a_cursor.execute("""select count(id) from %s where %s = '%s';""" % (table, field, a_document_id))
-            count += a_cursor.fetchall()[0]["count(id)"]
+        row_counts = self.ontonotes.row_counts_in_db(a_cursor, table, field, by_document=True)
 
-        return count
+        return sum(row_counts.get(a_document_id, 0)
+                   for a_document_id in self.ontonotes.document_ids_in_db(a_cursor).get(self.id, [])
+                   if on.common.util.matches_an_affix(a_document_id, affixes))
 
     @staticmethod
     def subcorpora_in_db(cursor, ontonotes_id):
@@ -1247,6 +1601,53 @@ insert into subcorpus
         return [(row["id"], "%s/%s" % (row["base_dir"], row["root_dir"]))
                 for row in cursor.fetchall()]
 
+    @staticmethod
+    def document_counts_in_db(cursor):
+        """ how many documents each subcorpus in the db has, as a
+        dictionary from subcorpus id, read with one grouped query """
+
+        cursor.execute("""select subcorpus_id, count(id) as num_documents from document group by subcorpus_id""")
+
+        return dict((row["subcorpus_id"], int(row["num_documents"]))
+                    for row in cursor.fetchall())
+
+    @staticmethod
+    def document_ids_in_db(cursor):
+        """ the ids of the documents of each subcorpus in the db, as a
+        dictionary from subcorpus id, read with one query """
+
+        document_ids = defaultdict(list)
+        cursor.execute("""select subcorpus_id, id from document""")
+        for row in cursor.fetchall():
+            document_ids[row["subcorpus_id"]].append(row["id"])
+
+        return document_ids
+
+    @staticmethod
+    def row_counts_in_db(cursor, table, field="document_id", by_document=False):
+        """ how many rows of ``table`` there are for each subcorpus in
+        the db, read with one grouped query
+
+        ``field`` is the column of ``table`` that holds the document
+        id.  With ``by_document`` the rows are counted per document id
+        instead of per subcorpus id.
+
+        """
+
+        if by_document:
+            cursor.execute("""select %s as document_id, count(id) as num_rows from %s group by %s""" % (
+                field, table, field))
+
+            return dict((row["document_id"], int(row["num_rows"]))
+                        for row in cursor.fetchall())
+
+        cursor.execute("""select document.subcorpus_id, count(%s.id) as num_rows
+                          from %s join document on %s.%s = document.id
+                          group by document.subcorpus_id""" % (table, table, table, field))
+
+        return dict((row["subcorpus_id"], int(row["num_rows"]))
+                    for row in cursor.fetchall())
+
 class token:
     """A token.  Just a word and a part of speech"""
 
@@ -1269,7 +1670,10 @@ create table token
 (
   id varchar(255) not null primary key,
   word varchar(255) not null,
-  part_of_speech varchar(255) not null
+  part_of_speech varchar(255) not null,
+  document_id varchar(255),
+  foreign key (document_id) references document.id,
+  index token_document_id (document_id)
 )
 
 default character set utf8;
@@ -1281,15 +1685,17 @@ default character set utf8;
 (
   id,
   word,
-  part_of_speech
-) values (%s, %s, %s)
+  part_of_speech,
+  document_id
+) values (%s, %s, %s, %s)
 """
 
-    def write_to_db(self, cursor):
+    def write_to_db(self, cursor, document_id):
         data = []
         a_tuple = (self.id,
                    self.word,
-                   self.part_of_speech)
+                   self.part_of_speech,
+                   document_id)
 
         data.append(a_tuple)
 
@@ -1350,7 +1756,8 @@ create table sentence
   sentence_index int not null,
   document_id varchar(255) not null,
   string longtext not null,
-  no_trace_string longtext not null
+  no_trace_string longtext not null,
+  index sentence_document_id (document_id)
 )
 default character set utf8;
 """
@@ -1383,7 +1790,7 @@ default character set utf8;
 
         for a_token_id in self.token_ids:
             a_token = self.token_hash[a_token_id]
-            a_token.write_to_db(cursor)
+            a_token.write_to_db(cursor, self.document_id)
 
 
 
@@ -1449,7 +1856,8 @@ create table document
   lang_id varchar(16) not null,
   genre varchar(16) not null,
   source varchar(16) not null,
-  text longtext not null
+  text longtext not null,
+  index document_subcorpus_id (subcorpus_id)
 )
 default character set utf8;
 """
@@ -1516,7 +1924,8 @@ class file:
   physical_filename varchar(255) not null,
   document_id varchar(255) not null,
   file_type varchar(255) not null,
-  subcorpus_id varchar(255) not null
+  subcorpus_id varchar(255) not null,
+  index file_document_id (document_id)
 )
 default character set utf8;
 """
@@ -1540,16 +1949,150 @@ default character set utf8;
         #---- insert the value in the table ----#
         cursor.executemany("%s" % (self.__class__.sql_insert_statement), data)
 
+    @staticmethod
+    def delete_document_from_db(a_document_id, cursor):
+        """ delete the rows of all files of a document, given its full id """
+
+        document_id, subcorpus_id = a_document_id.split("@", 1)
+        cursor.execute("""delete from file where document_id = %(document_id)s and subcorpus_id = %(subcorpus_id)s""",
+                       {"document_id": document_id, "subcorpus_id": subcorpus_id})
+
+
+
+class bank_document_hash:
+    """ What each document of each bank was when last written to the db
+
+    :meth:`subcorpus.write_to_db` records here a hash of the files each
+    document of each bank was read from (see
+    :meth:`subcorpus.bank_document_hashes`).  When it's asked to write
+    only what changed, it compares these to the files as they are now,
+    and deletes and rewrites only the documents whose hash differs.
+
+    """
+
+    sql_table_name = "bank_document_hash"
+    sql_create_statement = \
+"""
+create table bank_document_hash
+(
+  document_id varchar(255) not null,
+  bank varchar(64) not null,
+  subcorpus_id varchar(255) not null,
+  content_hash varchar(40) not null,
+  primary key (document_id, bank),
+  foreign key (subcorpus_id) references subcorpus.id,
+  index bank_document_hash_subcorpus_id (subcorpus_id)
+)
+default character set utf8;
+"""
+
+    sql_insert_statement = \
+"""insert into bank_document_hash
+(
+  document_id,
+  bank,
+  subcorpus_id,
+  content_hash
+) values (%s, %s, %s, %s)
+"""
+
+    @staticmethod
+    def from_db(a_subcorpus_id, a_cursor):
+        """ the recorded hashes for a subcorpus, as a dictionary from (document id, bank extension) """
+
+        a_cursor.execute("""select document_id, bank, content_hash from bank_document_hash where subcorpus_id = '%s';""" % (
+            a_subcorpus_id))
+
+        return dict(((row["document_id"], row["bank"]), row["content_hash"]) for row in a_cursor.fetchall())
+
+    @classmethod
+    def write_to_db(cls, a_subcorpus_id, hashes, a_cursor):
+        """ record hashes, a dictionary from (document id, bank extension) """
+
+        a_cursor.executemany("%s" % cls.sql_insert_statement,
+                             [(document_id, bank, a_subcorpus_id, content_hash)
+                              for (document_id, bank), content_hash in sorted(hashes.items())])
+
+    @staticmethod
+    def delete_from_db(document_id, bank, a_cursor):
+        a_cursor.execute("""delete from bank_document_hash where document_id = %s and bank = %s""", (document_id, bank))
+
 
 
 class document_bank(abstract_bank):
     def __init__(self, a_treebank, tag, lang_id, genre, source):
         abstract_bank.__init__(self, a_treebank.subcorpus, tag, "document")
 
+        self.lang_id = lang_id
+        self.genre = genre
+        self.source = source
+
+        # with a lazy treebank, only make each document when it's first
+        # used, so as not to parse every tree document up front
+        self._lazy_treebank = None
+        if getattr(a_treebank, "lazy", False):
+            self._lazy_treebank = a_treebank
+            for document_id in a_treebank._document_id_list:
+                self._add_document_id(document_id)
+            return
+
         for a_tree_document in a_treebank:
             self.append(document(a_tree_document, lang_id, genre, source) )
 
+    def _materialize(self, document_id):
+        """ return the document for document_id, making it first from the lazy treebank if needed """
+
+        if document_id in self._document_hash:
+            return self._document_hash[document_id]
+
+        if self._lazy_treebank is None or document_id not in self._document_id_set:
+            raise KeyError(document_id)
+
+        try:
+            a_tree_document = self._lazy_treebank.get_document(document_id)
+        except KeyError:
+            self._remove_document_id(document_id) # the treebank dropped it
+            raise
+
+        a_document = document(a_tree_document, self.lang_id, self.genre, self.source)
+        if not self._lazy_treebank.max_resident_documents:
+            self._document_hash[document_id] = a_document
+        return a_document
+
+    def get_document(self, a_document_id_or_instance):
+        if self._lazy_treebank is None:
+            return abstract_bank.get_document(self, a_document_id_or_instance)
+
+        if hasattr(a_document_id_or_instance, "document_id"):
+            a_document_id_or_instance = a_document_id_or_instance.document_id
+        return self._materialize(a_document_id_or_instance)
+
+    def __getitem__(self, index):
+        if self._lazy_treebank is None:
+            return abstract_bank.__getitem__(self, index)
+
+        while True:
+            document_id = self._document_id_list[index]
+            try:
+                return self._materialize(document_id)
+            except KeyError:
+                if document_id in self._document_id_set:
+                    raise
+                # dropped by the treebank; index now refers to the next document
+
+    def __delitem__(self, index):
+        if self._lazy_treebank is None:
+            return abstract_bank.__delitem__(self, index)
+
+        document_id = self._document_id_list[index]
+        self._document_hash.pop(document_id, None)
+        del self._document_ids[index]
+        self._document_id_set.discard(document_id)
+
     sql_table_name = "document_bank"
+    sql_document_rows = [("token", "document_id = %(document_id)s"),
+                         ("sentence", "document_id = %(document_id)s"),
+                         ("document", "id = %(document_id)s")]
 
     ## @var SQL create statement for the syntactic_link table
     #
@@ -0,0 +1,472 @@
+# COPYRIGHT  2007-2011 BY BBN TECHNOLOGIES CORP.
+
+# BY USING THIS SOFTWARE THE USER EXPRESSLY AGREES: (1) TO BE BOUND BY
+# THE TERMS OF THIS AGREEMENT; (2) THAT YOU ARE AUTHORIZED TO AGREE TO
+# THESE TERMS ON BEHALF OF YOURSELF AND YOUR ORGANIZATION; (3) IF YOU OR
+# YOUR ORGANIZATION DO NOT AGREE WITH THE TERMS OF THIS AGREEMENT, DO
+# NOT CONTINUE.  RETURN THE SOFTWARE AND ALL OTHER MATERIALS, INCLUDING
+# ANY DOCUMENTATION TO BBN TECHNOLOGIES CORP.
+
+# BBN GRANTS A NONEXCLUSIVE, ROYALTY-FREE RIGHT TO USE THIS SOFTWARE
+# KNOWN AS THE OntoNotes DB Tool v. 0.9 (HEREINAFTER THE "SOFTWARE")
+# SOLELY FOR RESEARCH PURPOSES. PROVIDED, YOU MUST AGREE TO ABIDE BY THE
+# LICENSE AND TERMS STATED HEREIN. TITLE TO THE SOFTWARE AND ITS
+# DOCUMENTATION AND ALL APPLICABLE COPYRIGHTS, TRADE SECRETS, PATENTS
+# AND OTHER INTELLECTUAL RIGHTS IN IT ARE AND REMAIN WITH BBN AND SHALL
+# NOT BE USED, REVEALED, DISCLOSED IN MARKETING OR ADVERTISEMENT OR ANY
+# OTHER ACTIVITY NOT EXPLICITLY PERMITTED IN WRITING.
+
+# NO WARRANTY. THE SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY
+# KIND.  THE SOFTWARE IS PROVIDED FOR RESEARCH PURPOSES ONLY. AS SUCH,
+# IT MAY CONTAIN ERRORS, WHICH COULD CAUSE FAILURES OR LOSS OF DATA. TO
+# THE MAXIMUM EXTENT PERMITTED BY LAW, BBN MAKES NO WARRANTIES, EXPRESS
+# OR IMPLIED AS TO THE SOFTWARE, ITS CAPABILITIES OR FUNCTIONALITY,
+# INCLUDING WITHOUT LIMITATION THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, NONINFRINGEMENT, OR
+# ANY USE OF THE SOFTWARE. THE USER ASSUMES THE ENTIRE COST OF ALL
+# NECESSARY REPAIR OR CORRECTION, EVEN IF BBN HAS BEEN ADVISED OF THE
+# POSSIBILITY OF SUCH A DEFECT OR DAMAGES. BBN MAKES NO WARRANTY THAT
+# THE SOFTWARE WILL MEET THE USER REQUIREMENTS, OR WILL BE
+# UNINTERRUPTED, TIMELY, SECURE, OR ERROR-FREE.
+
+# LIMITATION OF LIABILITY. THE ENTIRE RISK AS TO THE RESULTS AND
+# PERFORMANCE OF THE SOFTWARE IS ASSUMED BY THE USER. TO THE MAXIMUM
+# EXTENT PERMITTED BY APPLICABLE LAW, BBN SHALL NOT BE LIABLE WITH
+# RESPECT TO ANY SUBJECT MATTER OF THIS AGREEMENT UNDER ANY CONTRACT,
+# NEGLIGENCE, STRICT LIABILITY OR OTHER THEORY FOR ANY DIRECT,
+# CONSEQUENTIAL, RELIANCE, INCIDENTAL, SPECIAL, DIRECT OR INDIRECT
+# DAMAGES WHATSOEVER (INCLUDING WITHOUT LIMITATION, DAMAGES FOR LOSS OF
+# BUSINESS PROFITS, OR BUSINESS INFORMATION, OR FOR BUSINESS
+# INTERRUPTION, PERSONAL INJURY OR ANY OTHER LOSSES) RELATING TO (A)
+# LOSS OR INACCURACY OF DATA OR COST OF PROCUREMENT OF SUBSTITUTE
+# SYSTEM, SERVICES OR TECHNOLOGY, (B) THE USE OR INABILITY TO USE THE
+# SOFTWARE; (C) UNAUTHORIZED ACCESS TO OR ALTERATION OF YOUR
+# TRANSMISSIONS OR DATA; (D) ANY PERSONAL INJURY OR INJURY TO PROPERTY;
+# OR (E) ANY OTHER USE OF THE SOFTWARE EVEN IF BBN HAS BEEN FIRST
+# ADVISED OF THE POSSIBILITY OF ANY SUCH DAMAGES OR LOSSES.
+
+# WITHOUT LIMITATION OF THE FOREGOING, THE USER AGREES TO COMMIT NO ACT
+# WHICH, DIRECTLY OR INDIRECTLY, WOULD VIOLATE ANY U.S. LAW, REGULATION,
+# OR TREATY, OR ANY OTHER INTERNATIONAL TREATY OR AGREEMENT TO WHICH THE
+# UNITED STATES ADHERES OR WITH WHICH THE UNITED STATES COMPLIES,
+# RELATING TO THE EXPORT OR RE-EXPORT OF ANY COMMODITIES, SOFTWARE, OR
+# TECHNICAL DATA.
+
+"""
+----------------------------------------------------------------------------------
+:mod:`annotation_index` -- Corpus-wide Inverted Index of Annotations
+----------------------------------------------------------------------------------
+
+See:
+
+ - :class:`annotation_index`
+
+Answering questions like "all leaves of lemma X with sense Y" or "all
+ARG2s of frameset Z" otherwise means loading and enriching every
+subcorpus and walking every tree.  An :class:`annotation_index` does
+that walk once and keeps, for each annotated value, the list of places
+it occurs in an sqlite file on disk:
+
+.. code-block:: python
+
+   a_index = on.corpora.annotation_index.annotation_index("/path/to/index.db")
+   a_index.update(a_ontonotes, banks="parse sense prop name")
+
+   for a_pointer in a_index.query(lemma="join", sense="join-v.1"):
+      print(a_pointer)    # (document_id, tree_index, token_index)
+
+   for a_pointer, a_leaf in a_index.leaves(a_ontonotes, a_index.query(argument="join.01:ARG1")):
+      print(a_leaf.parent.get_word_string())
+
+The indexed fields are:
+
+ ==========  ===========================================  ====================
+ field       value                                        example
+ ==========  ===========================================  ====================
+ word        the word of each non-trace leaf              ``join``
+ lemma       the lemma of a leaf, its sense or predicate  ``join``
+ pos         the part of speech of each non-trace leaf    ``VB``
+ sense       ``lemma-pos.sense`` of a sense annotation    ``join-v.1``
+ frameset    ``lemma.pb_sense_num`` of a predicate        ``join.01``
+ argument    the argument type, alone and qualified by    ``ARG1``,
+             the frameset of its proposition              ``join.01:ARG1``
+ name        the type of a named entity                   ``PERSON``
+ ==========  ===========================================  ====================
+
+Each occurrence is recorded at the token index (traces included, as in
+:meth:`on.corpora.tree.tree.pointer`) of its first leaf, along with the
+token index of its last leaf for the multi-word ones: names, predicates
+and arguments.
+
+:meth:`annotation_index.update` only reads and enriches the documents
+whose files changed since they were last indexed, and drops the ones
+that are gone.  A change to any frame or sense inventory file
+re-indexes every document.  Documents in subcorpora loaded from the db have no
+files to compare, so they are re-indexed every time.
+
+.. autoclass:: annotation_index
+
+"""
+
+from __future__ import with_statement
+
+import os
+import hashlib
+import sqlite3
+
+import on
+import on.common.log
+import on.common.util
+
+class annotation_index(object):
+    """ A persistent inverted index from annotation values to where they occur
+
+    ``fname`` is the sqlite file to keep the index in; it is created if
+    it doesn't exist.
+
+    .. attribute:: FIELDS
+
+       The fields that can be queried; see :mod:`on.corpora.annotation_index`
+
+    """
+
+    FIELDS = ["word", "lemma", "pos", "sense", "frameset", "argument", "name"]
+
+    FORMAT = "1"
+
+    SQL_CREATE = ["""create table if not exists annotation_index_meta
+                     (name text primary key, value text)""",
+                  """create table if not exists annotation_index_document
+                     (document_id text primary key, subcorpus_id text not null,
+                      signature text, banks text not null)""",
+                  """create table if not exists annotation_index_posting
+                     (field text not null, value text not null, document_id text not null,
+                      tree_index integer not null, token_index integer not null,
+                      end_token_index integer not null)""",
+                  """create index if not exists annotation_index_posting_value
+                     on annotation_index_posting (field, value)""",
+                  """create index if not exists annotation_index_posting_document
+                     on annotation_index_posting (document_id)""",
+                  """create index if not exists annotation_index_document_subcorpus
+                     on annotation_index_document (subcorpus_id)"""]
+
+    def __init__(self, fname):
+        self.fname = fname
+        self.connection = sqlite3.connect(fname)
+
+        with self.connection:
+            for a_statement in self.SQL_CREATE:
+                self.connection.execute(a_statement)
+
+            a_row = self.connection.execute("select value from annotation_index_meta where name = 'format'").fetchone()
+            if a_row is None:
+                self.connection.execute("insert into annotation_index_meta values ('format', ?)", (self.FORMAT,))
+            elif a_row[0] != self.FORMAT:
+                raise Exception("%s is an annotation index in format %s; this code reads format %s" % (
+                    fname, a_row[0], self.FORMAT))
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        """ the number of documents indexed """
+        return self.connection.execute("select count(*) from annotation_index_document").fetchone()[0]
+
+    def __contains__(self, document_id):
+        return self.connection.execute("select 1 from annotation_index_document where document_id = ?",
+                                       (document_id,)).fetchone() is not None
+
+    #---- building ----#
+
+    @staticmethod
+    def signature(a_subcorpus, banks, metadata_signature=None):
+        """ a hash of the files of a subcorpus read from files, or None
+
+        Changes whenever any of the files or any frame or sense
+        inventory file is touched, or when asked for with different
+        ``banks``.  ``metadata_signature`` is
+        :func:`on.common.util.metadata_signature` of the subcorpus's
+        ``top_dir`` , if already worked out.
+
+        """
+
+        if a_subcorpus.backed_by() != "fs":
+            return None
+
+        if metadata_signature is None:
+            metadata_signature = on.common.util.metadata_signature(a_subcorpus.top_dir)
+
+        a_hash = hashlib.sha1(banks.encode("utf-8"))
+        a_hash.update(("\0%s" % metadata_signature).encode("utf-8"))
+        for extension in sorted(a_subcorpus.file_hash):
+            for a_file in a_subcorpus.file_hash[extension]:
+                a_stat = os.stat(a_file.physical_filename)
+                a_hash.update(("\0%s\0%s\0%s" % (a_file.physical_filename, a_stat.st_size,
+                                                 a_stat.st_mtime_ns)).encode("utf-8"))
+        return a_hash.hexdigest()
+
+    @staticmethod
+    def postings(a_tree_document):
+        """ generate ``(field, value, tree_index, token_index, end_token_index)`` for an enriched tree document """
+
+        for tree_id in a_tree_document.tree_ids:
+            a_tree = a_tree_document.get_tree(tree_id)
+            tree_index = a_tree.get_sentence_index()
+            seen = set()
+
+            def posting(field, value, start_leaf, end_leaf=None):
+                a_posting = (field, value, tree_index, start_leaf.get_token_index(),
+                             (end_leaf or start_leaf).get_token_index())
+                if value and a_posting not in seen:
+                    seen.add(a_posting)
+                    return [a_posting]
+                return []
+
+            for a_leaf in a_tree.leaves():
+                if a_leaf.is_trace():
+                    continue
+
+                for a_posting in (posting("word", a_leaf.word, a_leaf) +
+                                  posting("pos", a_leaf.tag, a_leaf) +
+                                  posting("lemma", a_leaf.lemma, a_leaf)):
+                    yield a_posting
+
+                a_on_sense = a_leaf.on_sense
+                if a_on_sense and a_on_sense.valid:
+                    for a_posting in (posting("lemma", a_on_sense.lemma, a_leaf) +
+                                      posting("sense", "%s-%s.%s" % (a_on_sense.lemma, a_on_sense.pos,
+                                                                     a_on_sense.sense), a_leaf)):
+                        yield a_posting
+
+                for a_name_entity in a_leaf.start_named_entity_list:
+                    if a_name_entity.valid:
+                        for a_posting in posting("name", a_name_entity.type,
+                                                 a_name_entity.start_leaf, a_name_entity.end_leaf):
+                            yield a_posting
+
+            for a_subtree in a_tree.subtrees():
+                a_proposition = a_subtree.proposition
+                if not a_proposition or not a_proposition.valid:
+                    continue
+                if a_proposition.get_primary_predicate().subtree is not a_subtree:
+                    continue
+
+                frameset = "%s.%s" % (a_proposition.lemma, a_proposition.pb_sense_num)
+                predicate_leaves = a_subtree.leaves()
+
+                for a_posting in (posting("lemma", a_proposition.lemma, predicate_leaves[0]) +
+                                  posting("frameset", frameset, predicate_leaves[0], predicate_leaves[-1])):
+                    yield a_posting
+
+                for a_argument_analogue in a_proposition.argument_analogues:
+                    core_subtree, r_subtrees, c_subtrees = a_argument_analogue.get_subtree_tuple()
+                    if not core_subtree:
+                        continue
+
+                    for prefix, subtrees in [("", [core_subtree]), ("R-", r_subtrees), ("C-", c_subtrees)]:
+                        a_type = prefix + a_argument_analogue.type
+                        for a_argument_subtree in subtrees:
+                            argument_leaves = a_argument_subtree.leaves()
+                            for value in [a_type, "%s:%s" % (frameset, a_type)]:
+                                for a_posting in posting("argument", value, argument_leaves[0], argument_leaves[-1]):
+                                    yield a_posting
+
+    def add_document(self, a_tree_document, subcorpus_id, signature=None, banks=""):
+        """ (re)index one enriched tree document """
+
+        self.remove_document(a_tree_document.document_id, commit=False)
+
+        self.connection.execute("insert into annotation_index_document values (?, ?, ?, ?)",
+                                (a_tree_document.document_id, subcorpus_id, signature, banks))
+        self.connection.executemany("insert into annotation_index_posting values (?, ?, ?, ?, ?, ?)",
+                                    ((field, value, a_tree_document.document_id, tree_index, token_index, end_token_index)
+                                     for field, value, tree_index, token_index, end_token_index
+                                     in self.postings(a_tree_document)))
+
+    def remove_document(self, document_id, commit=True):
+        self.connection.execute("delete from annotation_index_posting where document_id = ?", (document_id,))
+        self.connection.execute("delete from annotation_index_document where document_id = ?", (document_id,))
+        if commit:
+            self.connection.commit()
+
+    def update(self, a_ontonotes, banks=None, treebank="parse"):
+        """ bring the index up to date with the subcorpora of ``a_ontonotes``
+
+        ``banks`` is as for :meth:`on.ontonotes.iter_documents` .
+        Documents indexed with the same ``banks`` whose files haven't
+        changed since are skipped without being read, documents that
+        are no longer in an indexed subcorpus are dropped, and the
+        rest are read and enriched one at a time and (re)indexed.
+
+        Returns the number of documents (re)indexed, left alone, and
+        dropped.
+
+        """
+
+        if banks is None:
+            banks = a_ontonotes.config_opt("banks", "parse")
+        elif not isinstance(banks, str):
+            banks = " ".join(banks)
+        banks = " ".join(banks.replace(",", " ").split())
+
+        indexed = unchanged = removed = 0
+        metadata_signatures = {} # top_dir -> on.common.util.metadata_signature(top_dir)
+
+        for a_subcorpus_id in a_ontonotes.subcorpus_id_list:
+            a_subcorpus = a_ontonotes.get_subcorpus(a_subcorpus_id)
+
+            known = dict(self.connection.execute(
+                "select document_id, signature from annotation_index_document where subcorpus_id = ?",
+                (a_subcorpus_id,)).fetchall())
+            seen = set()
+
+            if a_subcorpus.backed_by() == "fs":
+                subcorpora = a_subcorpus.split_by_document()
+            else:
+                subcorpora = [a_subcorpus.copy()]
+
+            if a_subcorpus.backed_by() == "fs" and a_subcorpus.top_dir not in metadata_signatures:
+                metadata_signatures[a_subcorpus.top_dir] = on.common.util.metadata_signature(a_subcorpus.top_dir)
+
+            for a_document_subcorpus in subcorpora:
+                signature = self.signature(a_document_subcorpus, banks, metadata_signatures.get(a_subcorpus.top_dir))
+
+                document_ids = set("%s@%s" % (a_file.document_id, a_subcorpus_id)
+                                   for extension in a_document_subcorpus.file_hash
+                                   for a_file in a_document_subcorpus.file_hash[extension])
+
+                if signature is not None and all(known.get(document_id) == signature for document_id in document_ids):
+                    seen.update(document_ids)
+                    unchanged += len(document_ids)
+                    continue
+
+                try:
+                    a_document_subcorpus.load_banks(a_ontonotes.config, banks=banks)
+                except Exception:
+                    if a_subcorpus._hide_errors:
+                        on.common.log.report("index", "hid error SERIOUS", id=a_subcorpus_id)
+                        seen.update(document_ids) # keep what we had for them
+                        continue
+                    raise
+
+                if treebank not in a_document_subcorpus:
+                    continue
+
+                with self.connection:
+                    for a_tree_document in a_document_subcorpus[treebank]:
+                        self.add_document(a_tree_document, a_subcorpus_id, signature, banks)
+                        seen.add(a_tree_document.document_id)
+                        indexed += 1
+
+            with self.connection:
+                for document_id in set(known) - seen:
+                    self.remove_document(document_id, commit=False)
+                    removed += 1
+
+        return indexed, unchanged, removed
+
+    #---- querying ----#
+
+    def _check_field(self, field):
+        if field not in self.FIELDS:
+            raise Exception("annotation_index: unknown field %r; known fields are %s" % (field, ", ".join(self.FIELDS)))
+
+    def lookup(self, field, value):
+        """ the sorted list of ``(document_id, tree_index, token_index, end_token_index)`` where ``field`` is ``value`` """
+
+        self._check_field(field)
+        return self.connection.execute(
+            """select document_id, tree_index, token_index, end_token_index from annotation_index_posting
+               where field = ? and value = ? order by document_id, tree_index, token_index, end_token_index""",
+            (field, value)).fetchall()
+
+    def query(self, **constraints):
+        """ the sorted list of ``(document_id, tree_index, token_index)`` matching all the constraints
+
+        Each keyword argument is one of :attr:`FIELDS` with the value
+        it must have, and all of them must start at the same leaf:
+
+        .. code-block:: python
+
+           a_index.query(lemma="join", sense="join-v.1")
+           a_index.query(argument="ARG2")
+           a_index.query(pos="NNP", name="PERSON")
+
+        The results are in the format of
+        :meth:`on.corpora.tree.tree.pointer`.
+
+        """
+
+        if not constraints:
+            raise Exception("annotation_index.query needs at least one constraint")
+
+        selects, args = [], []
+        for field in sorted(constraints):
+            self._check_field(field)
+            selects.append("""select document_id, tree_index, token_index from annotation_index_posting
+                              where field = ? and value = ?""")
+            args.extend([field, constraints[field]])
+
+        return self.connection.execute(" intersect ".join(selects) + " order by 1, 2, 3", args).fetchall()
+
+    def values(self, field):
+        """ the sorted list of ``(value, count)`` for all values of ``field`` """
+
+        self._check_field(field)
+        return self.connection.execute(
+            """select value, count(*) from annotation_index_posting
+               where field = ? group by value order by value""", (field,)).fetchall()
+
+    def trees(self, a_ontonotes, pointers, banks=None, treebank="parse"):
+        """ generate ``(pointer, tree)`` for the root trees of query results
+
+        Only the documents the ``pointers`` are in are read, and
+        enriched with ``banks``, which defaults to the ones the document
+        was indexed with.  The documents of one subcorpus indexed with
+        the same banks are read together, so each subcorpus is loaded
+        once.  Results come a subcorpus at a time, and by document
+        within one.  ``pointers`` are as returned by :meth:`query` or
+        :meth:`lookup`.
+
+        """
+
+        by_document = {}
+        for a_pointer in pointers:
+            by_document.setdefault(a_pointer[0], []).append(a_pointer)
+
+        by_subcorpus = {} # (subcorpus_id, banks) -> document_ids
+        for document_id in by_document:
+            a_row = self.connection.execute("select subcorpus_id, banks from annotation_index_document where document_id = ?",
+                                            (document_id,)).fetchone()
+            if a_row is None:
+                raise Exception("annotation_index: document %s is not indexed" % document_id)
+
+            subcorpus_id, document_banks = a_row
+            by_subcorpus.setdefault((subcorpus_id, banks or document_banks or None), []).append(document_id)
+
+        for subcorpus_id, subcorpus_banks in sorted(by_subcorpus, key=lambda k: (k[0], k[1] or "")):
+            document_ids = sorted(by_subcorpus[subcorpus_id, subcorpus_banks])
+            a_subcorpus = a_ontonotes.get_subcorpus(subcorpus_id)
+
+            if a_subcorpus.backed_by() == "fs":
+                a_subcorpus = a_subcorpus.copy_with_documents(
+                    document_id[:-len("@" + subcorpus_id)] for document_id in document_ids)
+            else:
+                a_subcorpus = a_subcorpus.copy()
+
+            a_subcorpus.load_banks(a_ontonotes.config, banks=subcorpus_banks)
+
+            for document_id in document_ids:
+                try:
+                    a_tree_document = a_subcorpus[treebank].get_document(document_id)
+                except KeyError:
+                    raise Exception("annotation_index: document %s is no longer in %s" % (document_id, subcorpus_id))
+
+                for a_pointer in by_document[document_id]:
+                    yield a_pointer, a_tree_document[a_pointer[1]]
+
+    def leaves(self, a_ontonotes, pointers, banks=None, treebank="parse"):
+        """ like :meth:`trees`, but generate ``(pointer, leaf)`` for the leaf each pointer starts at """
+
+        for a_pointer, a_tree in self.trees(a_ontonotes, pointers, banks, treebank):
+            yield a_pointer, a_tree.get_leaf_by_token_index(a_pointer[2])
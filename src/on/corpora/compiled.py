@@ -0,0 +1,444 @@
+# COPYRIGHT  2007-2011 BY BBN TECHNOLOGIES CORP.
+
+# BY USING THIS SOFTWARE THE USER EXPRESSLY AGREES: (1) TO BE BOUND BY
+# THE TERMS OF THIS AGREEMENT; (2) THAT YOU ARE AUTHORIZED TO AGREE TO
+# THESE TERMS ON BEHALF OF YOURSELF AND YOUR ORGANIZATION; (3) IF YOU OR
+# YOUR ORGANIZATION DO NOT AGREE WITH THE TERMS OF THIS AGREEMENT, DO
+# NOT CONTINUE.  RETURN THE SOFTWARE AND ALL OTHER MATERIALS, INCLUDING
+# ANY DOCUMENTATION TO BBN TECHNOLOGIES CORP.
+
+# BBN GRANTS A NONEXCLUSIVE, ROYALTY-FREE RIGHT TO USE THIS SOFTWARE
+# KNOWN AS THE OntoNotes DB Tool v. 0.9 (HEREINAFTER THE "SOFTWARE")
+# SOLELY FOR RESEARCH PURPOSES. PROVIDED, YOU MUST AGREE TO ABIDE BY THE
+# LICENSE AND TERMS STATED HEREIN. TITLE TO THE SOFTWARE AND ITS
+# DOCUMENTATION AND ALL APPLICABLE COPYRIGHTS, TRADE SECRETS, PATENTS
+# AND OTHER INTELLECTUAL RIGHTS IN IT ARE AND REMAIN WITH BBN AND SHALL
+# NOT BE USED, REVEALED, DISCLOSED IN MARKETING OR ADVERTISEMENT OR ANY
+# OTHER ACTIVITY NOT EXPLICITLY PERMITTED IN WRITING.
+
+# NO WARRANTY. THE SOFTWARE IS PROVIDED "AS IS" WITHOUT WARRANTY OF ANY
+# KIND.  THE SOFTWARE IS PROVIDED FOR RESEARCH PURPOSES ONLY. AS SUCH,
+# IT MAY CONTAIN ERRORS, WHICH COULD CAUSE FAILURES OR LOSS OF DATA. TO
+# THE MAXIMUM EXTENT PERMITTED BY LAW, BBN MAKES NO WARRANTIES, EXPRESS
+# OR IMPLIED AS TO THE SOFTWARE, ITS CAPABILITIES OR FUNCTIONALITY,
+# INCLUDING WITHOUT LIMITATION THE IMPLIED WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE, NONINFRINGEMENT, OR
+# ANY USE OF THE SOFTWARE. THE USER ASSUMES THE ENTIRE COST OF ALL
+# NECESSARY REPAIR OR CORRECTION, EVEN IF BBN HAS BEEN ADVISED OF THE
+# POSSIBILITY OF SUCH A DEFECT OR DAMAGES. BBN MAKES NO WARRANTY THAT
+# THE SOFTWARE WILL MEET THE USER REQUIREMENTS, OR WILL BE
+# UNINTERRUPTED, TIMELY, SECURE, OR ERROR-FREE.
+
+# LIMITATION OF LIABILITY. THE ENTIRE RISK AS TO THE RESULTS AND
+# PERFORMANCE OF THE SOFTWARE IS ASSUMED BY THE USER. TO THE MAXIMUM
+# EXTENT PERMITTED BY APPLICABLE LAW, BBN SHALL NOT BE LIABLE WITH
+# RESPECT TO ANY SUBJECT MATTER OF THIS AGREEMENT UNDER ANY CONTRACT,
+# NEGLIGENCE, STRICT LIABILITY OR OTHER THEORY FOR ANY DIRECT,
+# CONSEQUENTIAL, RELIANCE, INCIDENTAL, SPECIAL, DIRECT OR INDIRECT
+# DAMAGES WHATSOEVER (INCLUDING WITHOUT LIMITATION, DAMAGES FOR LOSS OF
+# BUSINESS PROFITS, OR BUSINESS INFORMATION, OR FOR BUSINESS
+# INTERRUPTION, PERSONAL INJURY OR ANY OTHER LOSSES) RELATING TO (A)
+# LOSS OR INACCURACY OF DATA OR COST OF PROCUREMENT OF SUBSTITUTE
+# SYSTEM, SERVICES OR TECHNOLOGY, (B) THE USE OR INABILITY TO USE THE
+# SOFTWARE; (C) UNAUTHORIZED ACCESS TO OR ALTERATION OF YOUR
+# TRANSMISSIONS OR DATA; (D) ANY PERSONAL INJURY OR INJURY TO PROPERTY;
+# OR (E) ANY OTHER USE OF THE SOFTWARE EVEN IF BBN HAS BEEN FIRST
+# ADVISED OF THE POSSIBILITY OF ANY SUCH DAMAGES OR LOSSES.
+
+# WITHOUT LIMITATION OF THE FOREGOING, THE USER AGREES TO COMMIT NO ACT
+# WHICH, DIRECTLY OR INDIRECTLY, WOULD VIOLATE ANY U.S. LAW, REGULATION,
+# OR TREATY, OR ANY OTHER INTERNATIONAL TREATY OR AGREEMENT TO WHICH THE
+# UNITED STATES ADHERES OR WITH WHICH THE UNITED STATES COMPLIES,
+# RELATING TO THE EXPORT OR RE-EXPORT OF ANY COMMODITIES, SOFTWARE, OR
+# TECHNICAL DATA.
+
+"""
+----------------------------------------------------------------------------------
+:mod:`compiled` -- Memory-mapped Compiled Treebanks
+----------------------------------------------------------------------------------
+
+See:
+
+ - :class:`compiled_treebank`
+
+Reading a treebank means reading every ``.parse`` file and running
+:meth:`on.corpora.tree.tree.from_string` on every sentence.  A compiled
+treebank stores the trees of a whole subcorpus instead as flat arrays
+in one file, so it can be ``mmap``\ ed and opened without parsing
+anything.  For every node there is its parent, the range of its
+children, its token start and end, the ids of its tag and word in a
+table of the distinct strings, and, for traces, the node they refer
+to.  Trees are rebuilt from these arrays one document at a time, as
+they're asked for.
+
+Compile the treebanks of the subcorpora in a configuration with
+``tools/compile_treebanks.py`` into ``corpus.compiled-dir``; after that
+:meth:`on.corpora.subcorpus.load_banks` reads treebanks from there
+when it can:
+
+.. code-block:: ini
+
+   [corpus]
+   data_in: /path/to/the/data
+   compiled-dir: /path/to/compiled
+   lazy-trees: true
+
+With ``lazy-trees`` set, loading a subcorpus only opens its compiled
+file, and each document's trees are built when first used.  Documents
+whose ``.parse`` file changed since they were compiled, or that were
+not compiled at all, are read from their files as usual.
+
+The trees built are the ones :meth:`~on.corpora.tree.tree.from_string`
+would build, and then go through the rest of the usual
+:class:`on.corpora.tree.tree_document` setup.
+
+.. autoclass:: compiled_treebank
+
+"""
+
+from __future__ import with_statement
+
+import os
+import sys
+import mmap
+import json
+import array
+import struct
+
+import on
+import on.common.log
+import on.corpora.tree
+
+class compiled_treebank(object):
+    """ A compiled treebank file, opened for reading
+
+    Use :meth:`write` to make one from a :class:`on.corpora.tree.treebank` .
+
+    .. automethod:: write
+
+    """
+
+    MAGIC = b"ONTONOTES COMPILED TREEBANK\n"
+    FORMAT = 1
+
+    # column name -> array typecode; ``q`` for byte offsets and file stats, ``i`` for the rest
+    COLUMNS = [("string_offsets", "q"),
+               ("string_data", "B"),
+
+               ("document_id", "i"),          # the file level document id, as in nw/wsj/00/wsj_0001
+               ("document_filename", "i"),
+               ("document_size", "q"),        # of the .parse file when compiled
+               ("document_mtime_ns", "q"),
+               ("document_first_tree", "i"),
+               ("document_num_trees", "i"),
+               ("document_has_sentence_ids", "i"),
+               ("document_first_timing", "i"),
+               ("document_num_timings", "i"),
+
+               ("tree_first_node", "i"),
+               ("tree_num_nodes", "i"),
+               ("tree_parse", "i"),           # the parse string, as in treebank.tree_hash
+               ("tree_sentence_id", "i"),
+               ("tree_paragraph_id", "i"),
+               ("tree_headline_flag", "i"),
+
+               ("timing_start", "i"),         # chinese segment start and end times
+               ("timing_end", "i"),
+
+               # nodes of a tree are in breadth first order, so the
+               # children of a node are consecutive; node indices are
+               # relative to the first node of their tree
+               ("node_parent", "i"),
+               ("node_first_child", "i"),
+               ("node_num_children", "i"),
+               ("node_start", "i"),
+               ("node_end", "i"),
+               ("node_tag", "i"),
+               ("node_word", "i"),            # -1 for non-leaves
+               ("node_identity_subtree", "i")] # -1 unless a trace
+
+    def __init__(self, fname):
+        self.fname = fname
+
+        with open(fname, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(self.MAGIC)] != self.MAGIC:
+            raise Exception("%s is not a compiled treebank" % fname)
+
+        header_start = len(self.MAGIC) + 8
+        header_length, = struct.unpack("<q", self._mmap[len(self.MAGIC):header_start])
+        header = json.loads(self._mmap[header_start:header_start + header_length].decode("utf-8"))
+
+        if header["format"] != self.FORMAT:
+            raise Exception("%s is a compiled treebank in format %s; this code reads format %s" % (
+                fname, header["format"], self.FORMAT))
+        if header["byteorder"] != sys.byteorder:
+            raise Exception("%s was compiled on a %s endian machine; recompile it here" % (fname, header["byteorder"]))
+
+        self.subcorpus_id = header["subcorpus_id"]
+        self.extension = header["extension"]
+
+        a_view = memoryview(self._mmap)
+        for name, typecode in self.COLUMNS:
+            offset, length = header["columns"][name]
+            setattr(self, name, a_view[offset:offset + length].cast(typecode))
+
+        self._strings = {}
+
+        self.document_index = dict((self.string(self.document_id[i]), i) for i in range(len(self.document_id)))
+
+    def __reduce__(self):
+        # the mmap can't be pickled, so open the file again instead
+        return (compiled_treebank, (self.fname,))
+
+    def close(self):
+        for name, typecode in self.COLUMNS:
+            getattr(self, name).release()
+        self._mmap.close()
+
+    def __len__(self):
+        return len(self.document_index)
+
+    def __contains__(self, document_id):
+        return document_id in self.document_index
+
+    def string(self, string_id):
+        """ the string with this id in the string table, or None for -1
+
+        Each distinct string is only decoded once, so all the nodes
+        with the same tag or word share one string.
+
+        """
+
+        if string_id < 0:
+            return None
+        try:
+            return self._strings[string_id]
+        except KeyError:
+            a_string = self._strings[string_id] = bytes(
+                self.string_data[self.string_offsets[string_id]:self.string_offsets[string_id+1]]).decode("utf-8")
+            return a_string
+
+    def is_current(self, a_file):
+        """ is a_file's document compiled here from the version of it on disk? """
+
+        i = self.document_index.get(a_file.document_id)
+        if i is None:
+            return False
+
+        try:
+            a_stat = os.stat(a_file.physical_filename)
+        except OSError:
+            return False
+
+        return a_stat.st_size == self.document_size[i] and a_stat.st_mtime_ns == self.document_mtime_ns[i]
+
+    def build_tree(self, tree_index, document_tag="gold"):
+        """ rebuild the tree as :meth:`on.corpora.tree.tree.from_string` would have built it """
+
+        first = self.tree_first_node[tree_index]
+        last = first + self.tree_num_nodes[tree_index]
+
+        def column(a_column):
+            return a_column[first:last].tolist()
+
+        tags, words = column(self.node_tag), column(self.node_word)
+        starts, ends = column(self.node_start), column(self.node_end)
+        parents, first_children = column(self.node_parent), column(self.node_first_child)
+        num_children, identity_subtrees = column(self.node_num_children), column(self.node_identity_subtree)
+
+        tree = on.corpora.tree.tree
+        string = self.string
+
+        nodes = []
+        for i in range(len(tags)):
+            a_node = tree(string(tags[i]), string(words[i]), document_tag=document_tag)
+            a_node.start = starts[i]
+            a_node.end = ends[i]
+            nodes.append(a_node)
+
+        for i, a_node in enumerate(nodes):
+            if parents[i] >= 0:
+                a_node.parent = nodes[parents[i]]
+            if num_children[i]:
+                a_node.children = nodes[first_children[i]:first_children[i] + num_children[i]]
+
+        # link traces left to right, as fix_trace_index_locations does
+        stack = [0]
+        while stack:
+            i = stack.pop()
+            stack.extend(reversed(range(first_children[i], first_children[i] + num_children[i])))
+
+            if identity_subtrees[i] >= 0:
+                nodes[i].identity_subtree = nodes[identity_subtrees[i]]
+                nodes[identity_subtrees[i]].reference_leaves.append(nodes[i])
+
+        return nodes[0]
+
+    def tree_document_fields(self, document_id):
+        """ the trees and metadata :meth:`on.corpora.tree.treebank._read_tree_document` reads from a file
+
+        Returns a :class:`on.common.util.bunch` with ``filename``,
+        ``parse_strings``, ``first_tree`` (to give :meth:`build_tree`),
+        ``sentence_id_list``, ``paragraph_id_list``,
+        ``headline_flag_list`` and ``timings``.
+
+        """
+
+        i = self.document_index[document_id]
+
+        first_tree = self.document_first_tree[i]
+        tree_indices = range(first_tree, first_tree + self.document_num_trees[i])
+
+        if self.document_has_sentence_ids[i]:
+            sentence_id_list = [self.string(self.tree_sentence_id[t]) for t in tree_indices]
+            paragraph_id_list = [self.tree_paragraph_id[t] for t in tree_indices]
+            headline_flag_list = [self.tree_headline_flag[t] for t in tree_indices]
+        else:
+            sentence_id_list, paragraph_id_list, headline_flag_list = [], [], []
+
+        first_timing = self.document_first_timing[i]
+        timings = [(self.string(self.timing_start[t]), self.string(self.timing_end[t]))
+                   for t in range(first_timing, first_timing + self.document_num_timings[i])]
+
+        return on.common.util.bunch(filename=self.string(self.document_filename[i]),
+                                    parse_strings=[self.string(self.tree_parse[t]) for t in tree_indices],
+                                    first_tree=first_tree,
+                                    sentence_id_list=sentence_id_list,
+                                    paragraph_id_list=paragraph_id_list,
+                                    headline_flag_list=headline_flag_list,
+                                    timings=timings)
+
+    @classmethod
+    def write(cls, fname, a_treebank):
+        """ compile a treebank read from files into fname
+
+        The treebank must not be lazy.  Its trees are parsed again from
+        the parse strings it keeps, to record them as they were before
+        the rest of the :class:`~on.corpora.tree.tree_document` setup.
+
+        """
+
+        if a_treebank.lazy:
+            raise Exception("compiled_treebank.write needs a treebank that isn't lazy")
+
+        columns = dict((name, array.array(typecode)) for name, typecode in cls.COLUMNS)
+        string_ids = {}
+        string_chunks = []
+
+        def intern(a_string):
+            if a_string is None:
+                return -1
+            try:
+                return string_ids[a_string]
+            except KeyError:
+                string_ids[a_string] = len(string_chunks)
+                string_chunks.append(a_string.encode("utf-8"))
+                return string_ids[a_string]
+
+        subcorpus_suffix = "@" + a_treebank.subcorpus.id
+
+        for a_tree_document in a_treebank:
+            document_id = a_tree_document.document_id
+            if not document_id.endswith(subcorpus_suffix):
+                raise Exception("document %s is not from subcorpus %s" % (document_id, a_treebank.subcorpus.id))
+            document_id = document_id[:-len(subcorpus_suffix)]
+
+            a_stat = os.stat(a_tree_document.absolute_file_path)
+            root_trees = [a_tree_document.get_tree(tree_id) for tree_id in a_tree_document.tree_ids]
+
+            columns["document_id"].append(intern(document_id))
+            columns["document_filename"].append(intern(a_tree_document.absolute_file_path))
+            columns["document_size"].append(a_stat.st_size)
+            columns["document_mtime_ns"].append(a_stat.st_mtime_ns)
+            columns["document_first_tree"].append(len(columns["tree_first_node"]))
+            columns["document_num_trees"].append(len(a_tree_document.parse_list))
+            columns["document_has_sentence_ids"].append(int(any(a_tree.sentence_id is not None for a_tree in root_trees)))
+
+            timings = a_treebank.tree_start_end_tuples_hash.get(document_id, [])
+            columns["document_first_timing"].append(len(columns["timing_start"]))
+            columns["document_num_timings"].append(len(timings))
+            for start, end in timings:
+                columns["timing_start"].append(intern(start))
+                columns["timing_end"].append(intern(end))
+
+            for a_parse, a_root_tree in zip(a_tree_document.parse_list, root_trees):
+                a_tree = on.corpora.tree.tree.from_string(a_parse, id=a_root_tree.id, document_tag=a_tree_document.tag,
+                                                          engine=a_treebank.parse_engine)
+
+                columns["tree_first_node"].append(len(columns["node_parent"]))
+                columns["tree_parse"].append(intern(a_parse))
+                columns["tree_sentence_id"].append(intern(a_root_tree.sentence_id))
+                columns["tree_paragraph_id"].append(a_root_tree.paragraph_id if a_root_tree.paragraph_id is not None else -1)
+                columns["tree_headline_flag"].append(a_root_tree.headline_flag if a_root_tree.headline_flag is not None else -1)
+
+                # breadth first, so children are consecutive
+                nodes = [a_tree]
+                node_index = {}
+                i = 0
+                while i < len(nodes):
+                    node_index[nodes[i]] = i
+                    nodes.extend(nodes[i].children)
+                    i += 1
+
+                first_child = 1
+                for a_node in nodes:
+                    columns["node_parent"].append(node_index[a_node.parent] if a_node.parent is not None else -1)
+                    columns["node_first_child"].append(first_child if a_node.children else -1)
+                    columns["node_num_children"].append(len(a_node.children))
+                    columns["node_start"].append(a_node.start)
+                    columns["node_end"].append(a_node.end)
+                    columns["node_tag"].append(intern(a_node.tag))
+                    columns["node_word"].append(intern(a_node.word))
+                    columns["node_identity_subtree"].append(node_index[a_node.identity_subtree]
+                                                            if a_node.identity_subtree is not None else -1)
+                    first_child += len(a_node.children)
+
+                columns["tree_num_nodes"].append(len(nodes))
+
+        offset = 0
+        for a_chunk in string_chunks:
+            columns["string_offsets"].append(offset)
+            offset += len(a_chunk)
+        columns["string_offsets"].append(offset)
+        columns["string_data"] = array.array("B", b"".join(string_chunks))
+
+        # lay the columns out after the header, each aligned to 8 bytes
+        header = {"format": cls.FORMAT,
+                  "byteorder": sys.byteorder,
+                  "subcorpus_id": a_treebank.subcorpus.id,
+                  "extension": a_treebank.extension,
+                  "columns": {}}
+
+        def align(n):
+            return (n + 7) // 8 * 8
+
+        # the header's length depends on the offsets in it; leave room for them
+        header_reserve = align(len(json.dumps(header)) + len(cls.COLUMNS) * 48)
+        offset = align(len(cls.MAGIC) + 8 + header_reserve)
+        for name, typecode in cls.COLUMNS:
+            length = len(columns[name]) * columns[name].itemsize
+            header["columns"][name] = [offset, length]
+            offset = align(offset + length)
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        assert len(header_bytes) <= header_reserve
+
+        tmp_fname = "%s.%s.tmp" % (fname, os.getpid())
+        with open(tmp_fname, "wb") as f:
+            f.write(cls.MAGIC)
+            f.write(struct.pack("<q", len(header_bytes)))
+            f.write(header_bytes)
+            for name, typecode in cls.COLUMNS:
+                f.write(b"\0" * (header["columns"][name][0] - f.tell()))
+                columns[name].tofile(f)
+        os.replace(tmp_fname, fname)
+
+        on.common.log.status("Compiled %s documents of %s into %s" % (
+            len(columns["document_id"]), a_treebank.subcorpus.id, fname))
+
+    @staticmethod
+    def fname(compiled_dir, subcorpus_id, extension):
+        """ where in ``compiled_dir`` the compiled ``extension`` treebank of a subcorpus goes """
+        return os.path.join(compiled_dir, "%s.%s.compiled" % (subcorpus_id, extension))
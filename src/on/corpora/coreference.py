@@ -404,7 +404,8 @@ create table coreference_link
   string longtext,
   foreign key (type) references coreference_link_type.id,
   foreign key (coreference_chain_id) references coreference_chain.id,
-  foreign key (subtree_id) references subtree.id
+  foreign key (subtree_id) references subtree.id,
+  index coreference_link_coreference_chain_id (coreference_chain_id)
 )
 default character set utf8;
 """
@@ -581,7 +582,8 @@ create table coreference_chain
   type varchar(16) not null,
   speaker varchar(256) not null,
   foreign key (document_id) references document.id,
-  foreign key (speaker) references speaker.name
+  foreign key (speaker) references speaker.name,
+  index coreference_chain_document_id (document_id)
 )
 default character set utf8;
 """
@@ -1087,7 +1089,7 @@ class coreference_document:
         sn = []
 
         if a_cursor:
-            a_cursor.execute("""select coref_section,id from tree where document_id = '%s' order by abs(id) asc;""" % self.document_id)
+            a_cursor.execute("""select coref_section,id from tree where document_id = '%s' and parent_id is null order by abs(id) asc;""" % self.document_id)
             tree_coref_sections = [tree_row["coref_section"] for tree_row in a_cursor.fetchall()]
         elif self.tree_document:
             tree_coref_sections = [a_tree.coref_section for a_tree in self.tree_document]
@@ -1759,6 +1761,8 @@ class coreference_bank(abstract_bank):
 
     sql_table_name = "coreference_bank"
     sql_exists_table = "coreference_chain" # a table with both id and document id that is empty if there is no coref annotation
+    sql_document_rows = [("coreference_link", "coreference_chain_id in (select id from coreference_chain where document_id = %(document_id)s)"),
+                         ("coreference_chain", "document_id = %(document_id)s")]
 
     ## @var SQL create statement for the syntactic_link table
     #
@@ -1798,24 +1802,26 @@ insert into coreference_bank
         a_coreference_bank = coreference_bank(a_subcorpus, tag, a_cursor)
 
         #---- now get document ids for this coreference_bank ----#
-        a_cursor.execute("""select document.id from document where subcorpus_id = '%s';""" % (a_subcorpus.id))
-        document_rows = a_cursor.fetchall()
+        document_ids = cls.document_ids_from_db(a_subcorpus, a_cursor, affixes)
+
+        #---- and all their chains and links at once ----#
+        coreference_chain_rows_by_document_id = {}
+        coreference_link_rows_by_chain_id = {}
+        if document_ids:
+            coreference_chain_rows_by_document_id = cls.rows_from_db(a_subcorpus, a_cursor, "coreference_chain")
+            coreference_link_rows_by_chain_id = cls.rows_from_db(
+                a_subcorpus, a_cursor, "coreference_link",
+                document_id_column="coreference_chain.document_id",
+                joins="join coreference_chain on coreference_link.coreference_chain_id = coreference_chain.id",
+                key="coreference_chain_id")
 
         #---- and process each document ----#
-        for document_row in document_rows:
-            a_document_id = document_row["id"]
-
-            if not on.common.util.matches_an_affix(a_document_id, affixes):
-                continue
-
+        for a_document_id in document_ids:
             sys.stderr.write(".")
 
             a_coreference_document = coreference_document("", a_document_id, a_coreference_bank.extension, a_cursor=a_cursor)
 
-            a_cursor.execute("""select * from coreference_chain where document_id ='%s';""" % (a_document_id))
-            coreference_chain_rows = a_cursor.fetchall()
-
-            for coreference_chain_row in coreference_chain_rows:
+            for coreference_chain_row in coreference_chain_rows_by_document_id.get(a_document_id, []):
                 a_coreference_chain = coreference_chain(coreference_chain_row["type"], coreference_chain_row["number"],
                                                         coreference_chain_row["section"], a_document_id,
                                                         a_cursor=a_cursor,
@@ -1823,10 +1829,7 @@ insert into coreference_bank
                 assert coreference_chain_row["id"] == a_coreference_chain.id
 
 
-                a_cursor.execute("""select * from coreference_link where coreference_chain_id = '%s';""" % (a_coreference_chain.id))
-                coreference_link_rows = a_cursor.fetchall()
-
-                for coreference_link_row in coreference_link_rows:
+                for coreference_link_row in coreference_link_rows_by_chain_id.get(a_coreference_chain.id, []):
                     a_coreference_link = coreference_link(coreference_link_row["type"], a_coreference_chain, a_cursor,
                                                           start_char_offset=coreference_link_row["start_char_offset"],
                                                           end_char_offset=coreference_link_row["end_char_offset"])
@@ -356,7 +356,8 @@ create table name_entity
   subtree_id varchar(255),
   string longtext,
   foreign key (document_id) references document.id,
-  foreign key (subtree_id) references tree.id
+  foreign key (subtree_id) references tree.id,
+  index name_entity_document_id (document_id, sentence_index)
 )
 default character set utf8;
 """
@@ -1024,6 +1025,7 @@ class name_bank(abstract_bank):
 
     sql_table_name = "name_bank"
     sql_exists_table = "name_entity" # if a document has entries here then it has been name annotated
+    sql_document_rows = [("name_entity", "document_id = %(document_id)s")]
 
     ## @var SQL create statement for the syntactic_link table
     #
@@ -1062,32 +1064,26 @@ insert into name_bank
         a_name_bank = name_bank(a_subcorpus, tag, a_cursor)
 
         #---- now get document ids for this name_bank ----#
-        a_cursor.execute("""select document.id from document where subcorpus_id = '%s';""" % (a_subcorpus.id))
-        document_rows = a_cursor.fetchall()
+        document_ids = cls.document_ids_from_db(a_subcorpus, a_cursor, affixes)
 
-        #---- and process each document ----#
-        for document_row in document_rows:
-            a_document_id = document_row["id"]
-
-            if not on.common.util.matches_an_affix(a_document_id, affixes):
-                continue
+        #---- and all their names at once ----#
+        name_entity_rows_by_document_id = cls.rows_from_db(a_subcorpus, a_cursor, "name_entity") if document_ids else {}
 
+        #---- and process each document ----#
+        for a_document_id in document_ids:
             sys.stderr.write(".")
 
             a_name_tagged_document = name_tagged_document("", a_document_id, a_name_bank.extension, a_cursor=a_cursor)
 
-            a_cursor.execute("""select max(sentence_index) from name_entity where document_id = '%s' """ % a_document_id)
-            max_rows = a_cursor.fetchall()
-
-            assert len(max_rows) == 1
-            max_rows = max_rows[0]
+            name_entity_rows_by_sentence_index = defaultdict(list)
+            for name_entity_row in name_entity_rows_by_document_id.get(a_document_id, []):
+                name_entity_rows_by_sentence_index[int(name_entity_row["sentence_index"])].append(name_entity_row)
 
-            max_sentence_index = -1 if max_rows["max(sentence_index)"] is None else int(max_rows["max(sentence_index)"])
+            max_sentence_index = max(name_entity_rows_by_sentence_index or [-1])
 
             for sentence_index in range(max_sentence_index + 1):
                 a_name_entity_set = name_entity_set(a_document_id)
-                a_cursor.execute("""select * from name_entity where document_id = '%s' and sentence_index = %s """ % (a_document_id, sentence_index))
-                for name_entity_row in a_cursor.fetchall():
+                for name_entity_row in name_entity_rows_by_sentence_index[sentence_index]:
                     a_name_entity = name_entity(sentence_index=name_entity_row["sentence_index"],
                                                 document_id=name_entity_row["document_id"],
                                                 type=name_entity_row["type"],
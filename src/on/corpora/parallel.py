@@ -183,7 +183,8 @@ create table parallel_sentence
     sentence_id_original varchar(255) not null,
     sentence_id_translation varchar(255) not null,
     foreign key (sentence_id_original) references sentence.id,
-    foreign key (sentence_id_translation) references sentence.id
+    foreign key (sentence_id_translation) references sentence.id,
+  index parallel_sentence_sentence_id_translation (sentence_id_translation)
 )
 default character set utf8;
 """
@@ -378,15 +379,7 @@ class parallel_document(object):
     def from_db(translation_document_id, a_cursor, extension="parallel"):
 
         a_cursor.execute("select document_id_original from parallel_document where document_id_translation = '%s'" % translation_document_id)
-        rows = a_cursor.fetchall()
-
-        if len(rows) != 1:
-            on.common.log.error("Database coherency problem: multiple originals for translation %s" % translation_document_id)
-
-        original_document_id = rows[0]["document_id_original"]
-
-        a_parallel_document = parallel_document(original_document_id, translation_document_id, extension)
-
+        parallel_document_rows = a_cursor.fetchall()
 
         a_cursor.execute("""select *
                             from parallel_sentence
@@ -394,8 +387,21 @@ class parallel_document(object):
                             on sentence.id = parallel_sentence.sentence_id_translation
                             where sentence.document_id = '%s'""" % translation_document_id)
 
+        return parallel_document.from_db_rows(translation_document_id, parallel_document_rows, a_cursor.fetchall(), extension)
+
+    @staticmethod
+    def from_db_rows(translation_document_id, parallel_document_rows, parallel_sentence_rows, extension="parallel"):
+        """ build a parallel document from its ``parallel_document`` row and ``parallel_sentence`` rows """
+
+        if len(parallel_document_rows) != 1:
+            on.common.log.error("Database coherency problem: multiple originals for translation %s" % translation_document_id)
+
+        original_document_id = parallel_document_rows[0]["document_id_original"]
+
+        a_parallel_document = parallel_document(original_document_id, translation_document_id, extension)
+
         for o, t in [(d_row["sentence_id_original"], d_row["sentence_id_translation"])
-                     for d_row in a_cursor.fetchall()]:
+                     for d_row in parallel_sentence_rows]:
             a_parallel_document.append(parallel_sentence(o, t))
 
         return a_parallel_document
@@ -423,7 +429,8 @@ create table parallel_document
     document_id_original varchar(255) not null,
     document_id_translation varchar(255) not null,
     foreign key (document_id_original) references document.id,
-    foreign key (document_id_translation) references document.id
+    foreign key (document_id_translation) references document.id,
+  index parallel_document_document_id_translation (document_id_translation)
 )
 default character set utf8;
 """
@@ -506,6 +513,8 @@ class parallel_bank(abstract_bank):
 
     sql_table_name = "parallel_document"
     sql_exists_field = "document_id_translation"
+    sql_document_rows = [("parallel_sentence", "sentence_id_translation in (select id from sentence where document_id = %(document_id)s)"),
+                         ("parallel_document", "document_id_translation = %(document_id)s")]
 
 
     def enrich_treebank(self, a_translation_treebank):
@@ -600,20 +609,27 @@ class parallel_bank(abstract_bank):
         sys.stderr.write("reading the parallel bank ....")
         a_parallel_bank = parallel_bank(a_subcorpus, tag, a_cursor)
 
-        #---- now get all document ids for this subcorpus which are translations of other documents ----#
-        a_cursor.execute("""select document_id_translation
-                            from parallel_document
-                            join document
-                            on parallel_document.document_id_translation = document.id
-                            where document.subcorpus_id = '%s';""" % a_subcorpus.id)
+        #---- now get all documents for this subcorpus which are translations of other documents ----#
+        parallel_document_rows_by_document_id = cls.rows_from_db(
+            a_subcorpus, a_cursor, "parallel_document", document_id_column="parallel_document.document_id_translation")
+
+        #---- and all their sentence alignments ----#
+        parallel_sentence_rows_by_document_id = {}
+        if parallel_document_rows_by_document_id:
+            parallel_sentence_rows_by_document_id = cls.rows_from_db(
+                a_subcorpus, a_cursor, "parallel_sentence", document_id_column="sentence.document_id",
+                joins="join sentence on sentence.id = parallel_sentence.sentence_id_translation")
 
-        for a_document_id in [d_row["document_id_translation"] for d_row in a_cursor.fetchall()]:
+        for a_document_id in parallel_document_rows_by_document_id:
 
             if not on.common.util.matches_an_affix(a_document_id, affixes):
                 continue
 
             sys.stderr.write(".")
-            a_parallel_bank.append(parallel_document.from_db(a_document_id, a_cursor, a_parallel_bank.extension))
+            a_parallel_bank.append(parallel_document.from_db_rows(a_document_id,
+                                                                  parallel_document_rows_by_document_id[a_document_id],
+                                                                  parallel_sentence_rows_by_document_id.get(a_document_id, []),
+                                                                  a_parallel_bank.extension))
 
         sys.stderr.write("\n")
         return a_parallel_bank
@@ -150,6 +150,7 @@ Classes:
 .. autoclass:: link
 .. autoclass:: link_node
 .. autoclass:: frame_set
+.. autoclass:: frame_set_registry
 
 
 """
@@ -171,6 +172,7 @@ import codecs
 import copy
 import traceback
 import pprint
+import json
 
 #---- xml specific imports ----#
 from xml.etree import ElementTree
@@ -189,7 +191,7 @@ import on.corpora.tree
 
 
 from collections import defaultdict
-from on.common.util import is_db_ref, is_not_loaded, insert_ignoring_dups, esc, same_except_for_tokenization_and_hyphenization
+from on.common.util import is_db_ref, is_db_ids_ref, make_db_ids_ref, is_not_loaded, insert_ignoring_dups, esc, same_except_for_tokenization_and_hyphenization
 from on.corpora import abstract_bank
 
 PREGOLD_STATUSES=["QUEUE", "DOUBLE", "SINGLE", "PREGOLD"]
@@ -1029,7 +1031,8 @@ create table predicate_node
   node_id varchar(16),
   primary_flag int,
   index_in_parent int,
-  foreign key (predicate_id) references predicate.id
+  foreign key (predicate_id) references predicate.id,
+  index predicate_node_predicate_id (predicate_id, index_in_parent)
 )
 default character set utf8;
 """
@@ -1121,7 +1124,8 @@ create table predicate
   lemma varchar(255),
   pb_sense_num varchar(255),
   foreign key (proposition_id) references proposition.id,
-  foreign key (type) references predicate_type.id
+  foreign key (type) references predicate_type.id,
+  index predicate_proposition_id (proposition_id, index_in_parent)
 )
 default character set utf8;
 """
@@ -1236,7 +1240,8 @@ create table link_node
   link_id varchar(255) not null,
   node_id varchar(255) not null,
   index_in_parent int,
-  foreign key (link_id) references proposition_link.id
+  foreign key (link_id) references proposition_link.id,
+  index link_node_link_id (link_id, index_in_parent)
 )
 default character set utf8;
 """
@@ -1311,7 +1316,8 @@ create table proposition_link
   proposition_id varchar(255),
   associated_argument_id varchar(255),
   foreign key (proposition_id) references proposition.id,
-  foreign key (associated_argument_id) references argument_analogue.id
+  foreign key (associated_argument_id) references argument_analogue.id,
+  index proposition_link_proposition_id (proposition_id, index_in_parent)
 )
 default character set utf8;
 """
@@ -1425,7 +1431,8 @@ create table argument_node
   argument_id varchar(255) not null,
   node_id varchar(255) not null,
   index_in_parent int,
-  foreign key (argument_id) references argument.id
+  foreign key (argument_id) references argument.id,
+  index argument_node_argument_id (argument_id, index_in_parent)
 )
 default character set utf8;
 """
@@ -1535,7 +1542,8 @@ create table argument
   argument_subtype varchar(255),
   proposition_id varchar(255),
   foreign key (type) references argument_type.id,
-  foreign key (proposition_id) references proposition.id
+  foreign key (proposition_id) references proposition.id,
+  index argument_proposition_id (proposition_id, index_in_parent)
 )
 default character set utf8;
 """
@@ -2007,6 +2015,238 @@ class frame_set:
             self.argument_composition_hash[key].write_to_db(key, cursor)
 
 
+class frame_set_registry(object):
+    """ the frame files of a language, read as they are needed
+
+    Behaves as a read only hash from ``lemma-pos`` to
+    :class:`frame_set`, in the format of
+    :meth:`proposition_bank.build_frame_set_hash` .  Only an index from
+    ``lemma-pos`` to frame file is built up front; a frame file is
+    parsed the first time its ``lemma-pos`` is looked up, and kept.
+
+    The index is saved to ``index_fname`` , by default
+    ``metadata/.frames-index.json`` under ``top_dir`` , and used
+    instead of walking the frames directory again for as long as no
+    directory under ``metadata/frames`` has been modified.  If it
+    can't be written it's just built again next time.
+
+    There is one registry per ``top_dir`` and language in a process,
+    shared by every :class:`proposition_bank`; use :meth:`shared` instead
+    of constructing one.
+
+    .. automethod:: shared
+
+    """
+
+    INDEX_FORMAT = 1
+    INDEX_NAME = ".frames-index.json"
+
+    _registries = {}
+
+    def __init__(self, top_dir, language_id, index_fname=None):
+        self.top_dir = top_dir
+        self.language_id = language_id
+        self.frames_dir = os.path.join(top_dir, "metadata", "frames")
+        self.index_fname = index_fname or os.path.join(top_dir, "metadata", self.INDEX_NAME)
+
+        self._index = None       # lemma-pos -> frame file, relative to frames_dir
+        self._frame_sets = {}    # lemma-pos -> frame_set, or None if it didn't parse
+
+    @classmethod
+    def shared(cls, top_dir, language_id, index_fname=None):
+        """ the registry for the frame files under ``top_dir`` for ``language_id``, shared by the process """
+
+        index_fname = os.path.abspath(index_fname or os.path.join(top_dir, "metadata", cls.INDEX_NAME))
+
+        key = (os.path.abspath(top_dir), language_id, index_fname)
+        if key not in cls._registries:
+            cls._registries[key] = cls(top_dir, language_id, index_fname)
+        return cls._registries[key]
+
+    def __reduce__(self):
+        return (frame_set_registry.shared, (self.top_dir, self.language_id, self.index_fname))
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _directories_unchanged(self, directories):
+        if "." not in directories:
+            return False
+
+        for relpath, mtime in directories.items():
+            if self._mtime(os.path.join(self.frames_dir, relpath)) != mtime:
+                return False
+        return True
+
+    def _read_index(self):
+        try:
+            with open(self.index_fname) as index_file:
+                a_index = json.load(index_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if a_index.get("format") != self.INDEX_FORMAT or a_index.get("language_id") != self.language_id:
+            return None
+        if not self._directories_unchanged(a_index.get("directories", {})):
+            return None
+
+        return a_index["files"]
+
+    def _frame_file_lemma(self, frame_set_file_name, frame_set_file_name_full):
+        """ the (lemma, pos) a frame file is for, or None if it should be ignored """
+
+        prop_type = "v"
+        fname_lemma = frame_set_file_name.replace(".xml", "")
+
+        for x in ["m",   # nombank
+                  "n",   # noun
+                  "j",   # adj
+                  "v",  # verb
+                  ]:
+            if frame_set_file_name.endswith("-%s.xml" % x):
+                prop_type = x
+                fname_lemma = frame_set_file_name.replace("-%s.xml" % x, "")
+
+        if self.language_id in ["en", "ar"]:
+            a_lemma = fname_lemma
+        elif self.language_id == "ch":
+            try:
+                with codecs.open(frame_set_file_name_full, "r", "utf-8") as frame_set_file:
+                    frame_set_file_string = frame_set_file.read()
+            except UnicodeDecodeError:
+                return None
+
+            try:
+                a_lemma = re.findall("<id>\s+(.*?)\s+</id>", frame_set_file_string)[0]
+            except Exception:
+                return None
+        else:
+            on.common.log.error("please change this code to address the new langauge (given %s)" % self.language_id, False)
+            return None
+
+        return a_lemma, prop_type
+
+    def _build_index(self):
+        sys.stderr.write("indexing the frames files ....")
+
+        directories = {".": self._mtime(self.frames_dir)}
+        files = {}
+
+        for curpath, curdirs, curfiles in os.walk(self.frames_dir):
+            curdirs.sort()
+            relpath = os.path.relpath(curpath, self.frames_dir)
+            directories[relpath] = self._mtime(curpath)
+
+            for curfile in sorted(curfiles):
+                if not curfile.endswith(".xml"):
+                    continue
+
+                a_lemma_pos = self._frame_file_lemma(curfile, os.path.join(curpath, curfile))
+                if a_lemma_pos is not None:
+                    files["%s-%s" % a_lemma_pos] = os.path.join(relpath, curfile)
+
+        sys.stderr.write("\n")
+
+        a_index = {"format": self.INDEX_FORMAT,
+                   "language_id": self.language_id,
+                   "directories": directories,
+                   "files": files}
+
+        tmp_fname = "%s.%s.tmp" % (self.index_fname, os.getpid())
+        try:
+            with open(tmp_fname, "w") as index_file:
+                json.dump(a_index, index_file)
+            os.replace(tmp_fname, self.index_fname)
+        except (IOError, OSError):
+            on.common.log.debug("could not save the frames index to %s" % self.index_fname,
+                                on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+            if os.path.exists(tmp_fname):
+                os.remove(tmp_fname)
+
+        return files
+
+    def index(self):
+        """ the hash from ``lemma-pos`` to frame file, relative to ``metadata/frames`` """
+
+        if self._index is None:
+            self._index = self._read_index()
+            if self._index is None:
+                self._index = self._build_index()
+        return self._index
+
+    def _frame_set(self, lemma_pos):
+        if lemma_pos not in self._frame_sets:
+            a_frame_set = None
+
+            if lemma_pos in self.index():
+                frame_set_file_name_full = os.path.join(self.frames_dir, self.index()[lemma_pos])
+                a_lemma = lemma_pos.rsplit("-", 1)[0]
+
+                on.common.log.debug("processing %s ...." % (frame_set_file_name_full), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+
+                try:
+                    with codecs.open(frame_set_file_name_full, "r", "utf-8") as frame_set_file:
+                        a_frame_set = frame_set(frame_set_file.read(), lang_id=self.language_id)
+                    on.common.log.debug(a_frame_set, on.common.log.MAX_VERBOSITY)
+
+                    if a_frame_set.lemma != a_lemma:
+                        a_frame_set.lemma = a_lemma
+                except Exception:
+                    a_frame_set = None
+                    on.common.log.report("prop", "found some problem processing frame file",
+                                         fname=os.path.basename(frame_set_file_name_full))
+
+            self._frame_sets[lemma_pos] = a_frame_set
+
+        return self._frame_sets[lemma_pos]
+
+    def __contains__(self, lemma_pos):
+        return self._frame_set(lemma_pos) is not None
+
+    has_key = __contains__
+
+    def __getitem__(self, lemma_pos):
+        a_frame_set = self._frame_set(lemma_pos)
+        if a_frame_set is None:
+            raise KeyError(lemma_pos)
+        return a_frame_set
+
+    def get(self, lemma_pos, default=None):
+        a_frame_set = self._frame_set(lemma_pos)
+        return default if a_frame_set is None else a_frame_set
+
+    def keys(self):
+        """ every ``lemma-pos`` with a frame file, whether or not the file parses """
+        return sorted(self.index())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.index())
+
+    def iteritems(self):
+        """ parses every frame file not yet parsed """
+        for lemma_pos in self.keys():
+            a_frame_set = self._frame_set(lemma_pos)
+            if a_frame_set is not None:
+                yield lemma_pos, a_frame_set
+
+    def itervalues(self):
+        for lemma_pos, a_frame_set in self.iteritems():
+            yield a_frame_set
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return list(self.itervalues())
+
+
 class proposition(object):
     """ a proposition annotation; a line in a .prop file
 
@@ -3022,7 +3262,8 @@ create table proposition
   document_id varchar(255) not null,
   encoded_proposition text not null,
   quality varchar(16) not null,
-  foreign key (document_id) references document.id
+  foreign key (document_id) references document.id,
+  index proposition_document_id (document_id)
 )
 default character set utf8;
 """
@@ -3261,7 +3502,7 @@ class proposition_bank(abstract_bank):
 
     """
 
-    def __init__(self, a_subcorpus, tag, a_cursor=None, extension="prop", a_frame_set_hash = None):
+    def __init__(self, a_subcorpus, tag, a_cursor=None, extension="prop", a_frame_set_hash = None, frames_index=None):
         abstract_bank.__init__(self, a_subcorpus, tag, extension)
         self.lemma_hash = {}
 
@@ -3269,7 +3510,8 @@ class proposition_bank(abstract_bank):
 
         if(a_cursor == None):
             if not self.frame_set_hash:
-                self.frame_set_hash = self.build_frame_set_hash(a_subcorpus.top_dir, a_subcorpus.language_id, self.lemma_hash)
+                self.frame_set_hash = self.build_frame_set_hash(a_subcorpus.top_dir, a_subcorpus.language_id,
+                                                                frames_index=frames_index)
 
             sys.stderr.write("reading the proposition bank [%s] ..." % self.extension)
             for a_file in self.subcorpus.get_files(self.extension):
@@ -3314,81 +3556,32 @@ class proposition_bank(abstract_bank):
         return not is_not_loaded(self.frame_set_hash)
 
     @staticmethod
-    def build_frame_set_hash(top_dir, language_id, lemma_hash={}):
-        """ Read all the frame files from disk and return a hash of :class:`frame_set` instances """
+    def build_frame_set_hash(top_dir, language_id, lemma_hash={}, frames_index=None):
+        """ Return a hash of :class:`frame_set` instances for the frame files under ``top_dir``
 
-        frame_set_hash = {}
+        This is the :class:`frame_set_registry` shared by the process,
+        which parses frame files as they are looked up.  If
+        ``lemma_hash`` is given only the frame sets for its lemmas are
+        included, and they are all parsed now.
 
-        sys.stderr.write("reading the frames files ....")
-
-        def list_frames(basedir):
-            frame_sets = []
-            for curpath, curdirs, curfiles in os.walk(basedir):
-                for curfile in curfiles:
-                    if curfile.endswith(".xml"):
-                        frame_sets.append((curfile, os.path.join(curpath, curfile)))
-            return frame_sets
-
-        #---- lets process the framesets ----#
-        for frame_set_file_name, frame_set_file_name_full in list_frames("%s/metadata/frames" % top_dir):
-
-            prop_type = "v"
-            fname_lemma = frame_set_file_name.replace(".xml", "")
-
-            for x in ["m",   # nombank
-                      "n",   # noun
-                      "j",   # adj
-                      "v",  # verb
-                      ]:
-                if frame_set_file_name.endswith("-%s.xml" % x):
-                    prop_type = x
-                    fname_lemma = frame_set_file_name.replace("-%s.xml" % x, "")
-
-            if language_id in ["en", "ar"]:
-                #---- check if we want to add this lemma (whether there are any instances annotated in the frame bank ----#
-                a_lemma = fname_lemma
-            elif language_id == "ch":
+        """
 
-                frame_set_file = codecs.open(frame_set_file_name_full, "r", "utf-8")
+        a_frame_set_registry = frame_set_registry.shared(top_dir, language_id, frames_index)
 
-                try:
-                    frame_set_file_string = frame_set_file.read()
-                except UnicodeDecodeError as e:
-                    continue
+        if not lemma_hash:
+            return a_frame_set_registry
 
-                try:
-                    a_lemma = re.findall("<id>\s+(.*?)\s+</id>", frame_set_file_string)[0]
-                except Exception as e:
-                    continue
-            else:
-                on.common.log.error("please change this code to address the new langauge (given %s)" % language_id, False)
-                break
+        frame_set_hash = {}
+        for lemma_pos in a_frame_set_registry.keys():
+            a_lemma = lemma_pos.rsplit("-", 1)[0]
 
-            lemma_pos = "%s-%s" % (a_lemma, prop_type)
-            if lemma_hash and not lemma_hash.has_key(a_lemma):
+            if a_lemma not in lemma_hash:
                 on.common.log.debug("skipping %s ...." % (a_lemma), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
                 continue
-            else:
-                on.common.log.debug("adding %s ...." % (a_lemma), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
-
-
-            on.common.log.debug("processing %s ...." % (frame_set_file_name), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
-            sys.stderr.write(".")
 
-            with codecs.open(frame_set_file_name_full, "r", "utf-8") as frame_set_file:
-                try:
-                    frame_set_file_string = frame_set_file.read()
-                    a_frame_set = frame_set(frame_set_file_string, lang_id=language_id)
-                    on.common.log.debug(a_frame_set, on.common.log.MAX_VERBOSITY)
-
-                    if a_frame_set.lemma != a_lemma:
-                        a_frame_set.lemma = a_lemma
-
-                    frame_set_hash[lemma_pos] = a_frame_set
-                except Exception as e:
-                    on.common.log.report("prop", "found some problem processing frame file", fname=frame_set_file_name)
-
-        sys.stderr.write("\n")
+            on.common.log.debug("adding %s ...." % (a_lemma), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+            if lemma_pos in a_frame_set_registry:
+                frame_set_hash[lemma_pos] = a_frame_set_registry[lemma_pos]
 
         return frame_set_hash
 
@@ -3448,13 +3641,35 @@ class proposition_bank(abstract_bank):
                                     lemma=lemma, fsid=frameset)
                return False
 
+        if is_db_ids_ref(a_frame_set_hash):
+            if frameset:
+                return "%s.%s" % (lemma, frameset) in a_frame_set_hash["DB_IDS"]
+            return any(re.match("%s.0" % re.escape(lemma), a_id) for a_id in a_frame_set_hash["DB_IDS"])
+
         return frameset in cls.list_valid_frameset_helper(a_frame_set_hash, lemma, pos)
 
+    @staticmethod
+    def frame_set_ids_from_db(a_cursor):
+        """ a frame set hash of the ids of the framesets in the db, such as ``keep.01``
+
+        See :func:`on.common.util.is_db_ids_ref` ; it can be used in
+        place of a db reference, and unlike one can be handed to other
+        processes.  As with a db reference the part of speech isn't
+        checked.
+
+        """
+
+        a_cursor.execute("select id from pb_sense_type")
+        return make_db_ids_ref(row["id"] for row in a_cursor.fetchall())
+
     @classmethod
     def list_valid_frameset_helper(cls, a_frame_set_hash, lemma, pos):
         if is_db_ref(a_frame_set_hash):
             raise Exception("Not supported -- use is_valid_frameset")
 
+        if is_db_ids_ref(a_frame_set_hash):
+            return [a_id.split(".")[1] for a_id in a_frame_set_hash["DB_IDS"] if a_id.split(".")[0] == lemma]
+
         lemma_pos = "%s-%s" % (lemma, pos)
         if lemma_pos not in a_frame_set_hash:
             return []
@@ -3633,6 +3848,16 @@ class proposition_bank(abstract_bank):
 
     sql_table_name = "proposition_bank"
     sql_exists_table = "proposition"
+    sql_document_rows = [("link_node", "link_id in (select id from proposition_link where proposition_id in "
+                                       "(select id from proposition where document_id = %(document_id)s))"),
+                         ("proposition_link", "proposition_id in (select id from proposition where document_id = %(document_id)s)"),
+                         ("argument_node", "argument_id in (select id from argument where proposition_id in "
+                                           "(select id from proposition where document_id = %(document_id)s))"),
+                         ("argument", "proposition_id in (select id from proposition where document_id = %(document_id)s)"),
+                         ("predicate_node", "predicate_id in (select id from predicate where proposition_id in "
+                                            "(select id from proposition where document_id = %(document_id)s))"),
+                         ("predicate", "proposition_id in (select id from proposition where document_id = %(document_id)s)"),
+                         ("proposition", "document_id = %(document_id)s")]
 
     sql_create_statement = \
 """
@@ -3658,14 +3883,15 @@ insert into proposition_bank
 ) values(%s, %s, %s)
 """
 
-    def write_to_db(self, a_cursor):
-        abstract_bank.write_to_db(self, a_cursor)
+    def write_to_db(self, a_cursor, document_ids=None):
+        abstract_bank.write_to_db(self, a_cursor, document_ids)
         self.write_frame_set_hash_to_db(self.frame_set_hash, a_cursor)
 
 
     @classmethod
     def write_frame_set_hash_to_db(cls, a_frame_set_hash, a_cursor):
-        if a_frame_set_hash and not is_not_loaded(a_frame_set_hash) and not is_db_ref(a_frame_set_hash):
+        if a_frame_set_hash and not is_not_loaded(a_frame_set_hash) and not is_db_ref(a_frame_set_hash) \
+               and not is_db_ids_ref(a_frame_set_hash):
             for a_frame_set in a_frame_set_hash.itervalues():
                 a_frame_set.write_to_db(a_cursor)
 
@@ -3677,29 +3903,58 @@ insert into proposition_bank
         a_proposition_bank = proposition_bank(a_subcorpus, tag, a_cursor)
 
         #---- now get document ids for this treebank ----#
-        a_cursor.execute("""select document.id from document where subcorpus_id = '%s';""" % (a_subcorpus.id))
-        document_rows = a_cursor.fetchall()
+        document_ids = cls.document_ids_from_db(a_subcorpus, a_cursor, affixes)
 
-        #---- and process each document ----#
-        for document_row in document_rows:
-            a_proposition_document = proposition_document(document_row["id"], a_proposition_bank.extension)
+        #---- then every row of every table for the whole subcorpus, one query a table ----#
+        proposition_rows_by_document_id = cls.rows_from_db(a_subcorpus, a_cursor, "proposition") if document_ids else {}
 
-            if not on.common.util.matches_an_affix(a_proposition_document.document_id, affixes):
-                continue
+        if proposition_rows_by_document_id:
+            def rows_from_db(table, key, joins):
+                return cls.rows_from_db(a_subcorpus, a_cursor, table, key=key,
+                                        document_id_column="proposition.document_id", joins=joins,
+                                        order_by="%s.index_in_parent asc" % table)
+
+            predicate_rows_by_proposition_id = rows_from_db(
+                "predicate", "proposition_id",
+                "join proposition on predicate.proposition_id = proposition.id")
+
+            predicate_node_rows_by_predicate_id = rows_from_db(
+                "predicate_node", "predicate_id",
+                """join predicate on predicate_node.predicate_id = predicate.id
+                   join proposition on predicate.proposition_id = proposition.id""")
+
+            argument_rows_by_proposition_id = rows_from_db(
+                "argument", "proposition_id",
+                "join proposition on argument.proposition_id = proposition.id")
+
+            argument_node_rows_by_argument_id = rows_from_db(
+                "argument_node", "argument_id",
+                """join argument on argument_node.argument_id = argument.id
+                   join proposition on argument.proposition_id = proposition.id""")
+
+            link_rows_by_proposition_id = rows_from_db(
+                "proposition_link", "proposition_id",
+                "join proposition on proposition_link.proposition_id = proposition.id")
+
+            link_node_rows_by_link_id = rows_from_db(
+                "link_node", "link_id",
+                """join proposition_link on link_node.link_id = proposition_link.id
+                   join proposition on proposition_link.proposition_id = proposition.id""")
+
+        #---- and build each document from those rows ----#
+        for a_document_id in document_ids:
+            a_proposition_document = proposition_document(a_document_id, a_proposition_bank.extension)
 
             sys.stderr.write(".")
             #---- process each proposition in this document  ----#
-            a_cursor.execute("""select * from proposition where document_id = '%s';""" % (a_proposition_document.document_id))
-
-            for a_proposition_row in a_cursor.fetchall():
+            for a_proposition_row in proposition_rows_by_document_id.get(a_document_id, []):
 
                 #---- create an empty proposition object ----#
                 a_proposition = proposition("", a_subcorpus.id, a_proposition_document.document_id, a_proposition_bank)
                 a_proposition.quality = a_proposition_row["quality"]
 
                 #--- process each predicate in this proposition ----#
-                a_cursor.execute("""select * from predicate where proposition_id = '%s' order by index_in_parent asc;""" % (a_proposition_row["id"]))
-                for a_predicate_row in a_cursor.fetchall():
+                for a_predicate_row in predicate_rows_by_proposition_id.get(a_proposition_row["id"], []):
                     if not a_proposition.predicate:
                         predicate_analogue("", a_predicate_row["type"], sentence_index=None, token_index=None, a_proposition=a_proposition)
                         a_proposition.lemma = a_predicate_row["lemma"]
@@ -3713,8 +3968,7 @@ insert into proposition_bank
                     a_predicate = predicate("", sentence_index=None, token_index=None, a_predicate_analogue=a_proposition.predicate)
 
                     #---- get the predicate part information ----#
-                    a_cursor.execute("""select * from predicate_node where predicate_id = '%s' order by index_in_parent asc;"""  % (a_predicate_row["id"]))
-                    for predicate_node_row in a_cursor.fetchall():
+                    for predicate_node_row in predicate_node_rows_by_predicate_id.get(a_predicate_row["id"], []):
                         token_index, height = predicate_node_row["node_id"].split(":")
 
                         a_predicate_node = predicate_node(a_predicate_row["sentence_index"], token_index, height,
@@ -3724,24 +3978,21 @@ insert into proposition_bank
                         assert predicate_node_row["node_id"] == a_predicate_node.node_id
                         assert bool(predicate_node_row["primary_flag"]) == a_predicate_node.primary
 
-                maxes = {}
-                for a_table, a_index in [["argument", "argument_analogue_index"],
-                                         ["proposition_link", "link_analogue_index"]]:
-                    a_cursor.execute("""select max(%s) from %s where proposition_id = '%s';""" % (a_index, a_table, a_proposition.id))
-                    max_rows = a_cursor.fetchall()
-                    assert len(max_rows) == 1
-                    max_index = max_rows[0]["max(%s)" % a_index]
-                    maxes[a_index] = -1 if max_index is None else int(max_index)
+                #---- group the argument and link rows by analogue ----#
+                argument_rows_by_analogue_index = defaultdict(list)
+                for argument_row in argument_rows_by_proposition_id.get(a_proposition.id, []):
+                    argument_rows_by_analogue_index[int(argument_row["argument_analogue_index"])].append(argument_row)
+
+                link_rows_by_analogue_index = defaultdict(list)
+                for link_row in link_rows_by_proposition_id.get(a_proposition.id, []):
+                    link_rows_by_analogue_index[int(link_row["link_analogue_index"])].append(link_row)
 
-                for a_argument_analogue_index in range(maxes["argument_analogue_index"] + 1):
+                for a_argument_analogue_index in range(max(argument_rows_by_analogue_index or [-1]) + 1):
                     a_argument_analogue = argument_analogue("", a_proposition)
 
                     assert a_argument_analogue_index == a_argument_analogue.index_in_parent
 
-                    a_cursor.execute("""select * from argument where proposition_id = '%s' and argument_analogue_index = '%s';""" % (
-                        a_proposition.id, a_argument_analogue_index))
-
-                    for argument_row in a_cursor.fetchall():
+                    for argument_row in argument_rows_by_analogue_index[a_argument_analogue_index]:
                         if a_argument_analogue.type is not None:
                             assert a_argument_analogue.type == argument_row["type"]
                         else:
@@ -3750,23 +4001,19 @@ insert into proposition_bank
                         a_argument = argument("", a_argument_analogue)
 
                         #---- get the nodes for this argument ----#
-                        a_cursor.execute("""select * from argument_node where argument_id = '%s';""" % (argument_row["id"]))
-
-                        for a_argument_node_row in a_cursor.fetchall():
+                        for a_argument_node_row in argument_node_rows_by_argument_id.get(argument_row["id"], []):
                             token_index, height = a_argument_node_row["node_id"].split(":")
                             argument_node(None, token_index, height, a_argument)
 
                         assert a_argument.split_argument_flag == (len(a_argument) > 1)
 
 
-                for a_link_analogue_index in range(maxes["link_analogue_index"] + 1):
+                for a_link_analogue_index in range(max(link_rows_by_analogue_index or [-1]) + 1):
 
                     a_link_analogue = None
                     a_argument_analogue = None
-                    a_cursor.execute("""select * from proposition_link where proposition_id = '%s' and link_analogue_index = '%s';""" % (
-                        a_proposition.id, a_link_analogue_index))
 
-                    for link_row in a_cursor.fetchall():
+                    for link_row in link_rows_by_analogue_index[a_link_analogue_index]:
                         if a_link_analogue is None:
                             for b_argument_analogue in a_proposition.argument_analogues:
                                 if b_argument_analogue.id == link_row["associated_argument_id"]:
@@ -3780,13 +4027,10 @@ insert into proposition_bank
 
                         a_link = link("", a_link_analogue)
 
-                        a_cursor.execute("""select * from link_node where link_id = '%s';""" % (link_row["id"]))
-
-                        for a_link_node_row in a_cursor.fetchall():
+                        for a_link_node_row in link_node_rows_by_link_id.get(link_row["id"], []):
                             token_index, height = a_link_node_row["node_id"].split(":")
                             link_node(None, token_index, height, a_link)
 
-
                 assert a_predicate_row["lemma"] == a_predicate.lemma
                 assert a_predicate_row["pb_sense_num"] == a_predicate.pb_sense_num
                 assert int(a_predicate_row["sentence_index"]) == a_predicate.sentence_index
@@ -159,6 +159,7 @@ Classes:
 .. autoclass:: on_sense_type
 .. autoclass:: on_sense_lemma_type
 .. autoclass:: sense_inventory
+.. autoclass:: sense_inventory_registry
 .. autoclass:: pb_sense_type
 .. autoclass:: wn_sense_type
 
@@ -178,6 +179,8 @@ import string
 import sys
 import re
 import codecs
+import json
+import multiprocessing
 
 #---- xml specific imports ----#
 from xml.etree import ElementTree
@@ -199,7 +202,7 @@ import on.corpora.coreference
 import on.corpora.name
 
 from collections import defaultdict
-from on.common.util import is_db_ref, is_not_loaded, insert_ignoring_dups, esc
+from on.common.util import is_db_ref, is_db_ids_ref, is_not_loaded, insert_ignoring_dups, esc
 
 from on.corpora import abstract_bank
 
@@ -471,7 +474,8 @@ create table on_sense
   word_index int,
   tree_index int,
   document_id varchar(255),
-  foreign key (document_id) references document.id
+  foreign key (document_id) references document.id,
+  index on_sense_document_id (document_id)
 )
 default character set utf8;
 """
@@ -1291,6 +1295,282 @@ class sense_inventory:
 
         return lemma, pos
 
+class sense_inventory_registry(object):
+    """ the sense inventories of a language, read as they are needed
+
+    Behaves as a read only hash from ``lemma-pos`` to
+    :class:`sense_inventory`, in the format of
+    :meth:`sense_bank.build_sense_inventory_hash` .  Only a manifest
+    from ``lemma-pos`` to inventory file is built up front; an
+    inventory is parsed the first time its ``lemma-pos`` is looked up,
+    and kept.  Frame references in the inventories are checked against
+    ``a_frame_set_hash`` .
+
+    The manifest is saved to ``index_fname`` , by default
+    ``metadata/.sense-inventories-index.json`` under ``top_dir`` , and
+    used instead of reading every inventory for its lemma again as long
+    as ``metadata/sense-inventories`` hasn't been modified.  If it
+    can't be written it's just built again next time.
+
+    Registries are shared by the process, so each inventory is parsed
+    once per run however many subcorpora use it; use :meth:`shared`
+    instead of constructing one.
+
+    .. automethod:: shared
+    .. automethod:: parse_all
+
+    """
+
+    INDEX_FORMAT = 1
+    INDEX_NAME = ".sense-inventories-index.json"
+
+    _registries = {}
+
+    def __init__(self, lang_id, top_dir, a_frame_set_hash=None, index_fname=None):
+        self.lang_id = lang_id
+        self.top_dir = top_dir
+        self.frame_set_hash = a_frame_set_hash
+        self.sense_inv_dir = os.path.join(top_dir, "metadata", "sense-inventories")
+        self.index_fname = index_fname or os.path.join(top_dir, "metadata", self.INDEX_NAME)
+
+        self._index = None            # lemma-pos -> inventory file name
+        self._sense_inventories = {}  # lemma-pos -> sense_inventory, or None if it failed to load
+
+    @classmethod
+    def shared(cls, lang_id, top_dir, a_frame_set_hash=None, index_fname=None):
+        """ the registry for the inventories under ``top_dir`` , shared by the process
+
+        Inventories can only be shared between users that check frame
+        references against the same frames: the same
+        :class:`on.corpora.proposition.frame_set_registry`, the db, the
+        same :meth:`on.corpora.proposition.proposition_bank.frame_set_ids_from_db`,
+        or none.  Anything else gets a registry of its own.
+
+        """
+
+        index_fname = os.path.abspath(index_fname or os.path.join(top_dir, "metadata", cls.INDEX_NAME))
+
+        if is_not_loaded(a_frame_set_hash):
+            frames_key = "NotLoaded"
+        elif is_db_ref(a_frame_set_hash):
+            frames_key = ("DB", id(a_frame_set_hash["DB"]))
+        elif isinstance(a_frame_set_hash, on.corpora.proposition.frame_set_registry):
+            frames_key = id(a_frame_set_hash) # registries live as long as the process
+        elif is_db_ids_ref(a_frame_set_hash):
+            frames_key = ("DB_IDS", a_frame_set_hash["DB_IDS"])
+        elif not a_frame_set_hash:
+            frames_key = None
+        else:
+            return cls(lang_id, top_dir, a_frame_set_hash, index_fname)
+
+        key = (lang_id, os.path.abspath(top_dir), frames_key, index_fname)
+        if key not in cls._registries:
+            cls._registries[key] = cls(lang_id, top_dir, a_frame_set_hash, index_fname)
+        return cls._registries[key]
+
+    def __reduce__(self):
+        return (sense_inventory_registry.shared, (self.lang_id, self.top_dir, self.frame_set_hash, self.index_fname))
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read_index(self):
+        try:
+            with open(self.index_fname) as index_file:
+                a_index = json.load(index_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if a_index.get("format") != self.INDEX_FORMAT or a_index.get("mtime") != self._mtime(self.sense_inv_dir):
+            return None
+
+        return a_index["files"]
+
+    def _build_index(self):
+        sys.stderr.write("indexing the sense inventory files ....")
+
+        a_mtime = self._mtime(self.sense_inv_dir)
+        files = {}
+
+        for sense_inv_fname in sorted(os.listdir(self.sense_inv_dir)):
+            if sense_inv_fname[-4:] != ".xml":
+                continue
+
+            try:
+                lemma, pos = sense_inventory.extract_lemma_pos(os.path.join(self.sense_inv_dir, sense_inv_fname))
+            except Exception:
+                lemma, pos = None, None
+
+            if lemma is None:
+                on.common.log.report("senseinv", "sense inventory failed to load", fname=sense_inv_fname)
+                continue
+
+            files["%s-%s" % (lemma, pos)] = sense_inv_fname
+
+        sys.stderr.write("\n")
+
+        a_index = {"format": self.INDEX_FORMAT,
+                   "mtime": a_mtime,
+                   "files": files}
+
+        tmp_fname = "%s.%s.tmp" % (self.index_fname, os.getpid())
+        try:
+            with open(tmp_fname, "w") as index_file:
+                json.dump(a_index, index_file)
+            os.replace(tmp_fname, self.index_fname)
+        except (IOError, OSError):
+            on.common.log.debug("could not save the sense inventory manifest to %s" % self.index_fname,
+                                on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+            if os.path.exists(tmp_fname):
+                os.remove(tmp_fname)
+
+        return files
+
+    def index(self):
+        """ the hash from ``lemma-pos`` to inventory file name """
+
+        if self._index is None:
+            self._index = self._read_index()
+            if self._index is None:
+                self._index = self._build_index()
+        return self._index
+
+    def _parse(self, lemma_pos):
+        sense_inv_fname = self.index()[lemma_pos]
+
+        on.common.log.debug("processing %s ...." % (sense_inv_fname),
+                            on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+
+        try:
+            with codecs.open(os.path.join(self.sense_inv_dir, sense_inv_fname), "r", "utf-8") as s_inv_f:
+                return sense_inventory(sense_inv_fname, s_inv_f.read(), self.lang_id, self.frame_set_hash)
+        except Exception:
+            on.common.log.report("senseinv", "sense inventory failed to load", fname=sense_inv_fname)
+            return None
+
+    def _sense_inventory(self, lemma_pos):
+        if lemma_pos not in self._sense_inventories:
+            self._sense_inventories[lemma_pos] = self._parse(lemma_pos) if lemma_pos in self.index() else None
+        return self._sense_inventories[lemma_pos]
+
+    def parse_all(self, workers=1):
+        """ parse every inventory not yet parsed, in a pool of ``workers`` processes
+
+        The parsed inventories, and the types they define, are handed
+        back to this process.  Frame references checked against the db
+        need this process's connection, so then the inventories are
+        parsed here.
+
+        """
+
+        unparsed = [lemma_pos for lemma_pos in self.keys() if lemma_pos not in self._sense_inventories]
+
+        if workers <= 1 or len(unparsed) < 2 or is_db_ref(self.frame_set_hash):
+            for lemma_pos in unparsed:
+                self._sense_inventory(lemma_pos)
+            return
+
+        chunk_size = max(1, len(unparsed) // (workers * 8))
+        chunks = [unparsed[i:i+chunk_size] for i in range(0, len(unparsed), chunk_size)]
+
+        a_pool = multiprocessing.get_context("fork").Pool(workers, _sense_inventory_parser_init, (self,))
+        try:
+            for parsed, type_tables in a_pool.imap_unordered(_sense_inventory_parser_parse, chunks):
+                self._sense_inventories.update(parsed)
+                _merge_sense_inventory_type_tables(type_tables)
+                sys.stderr.write("." * len(parsed))
+        finally:
+            a_pool.terminate()
+
+        sys.stderr.write("\n")
+
+    def __contains__(self, lemma_pos):
+        return self._sense_inventory(lemma_pos) is not None
+
+    has_key = __contains__
+
+    def __getitem__(self, lemma_pos):
+        a_sense_inventory = self._sense_inventory(lemma_pos)
+        if a_sense_inventory is None:
+            raise KeyError(lemma_pos)
+        return a_sense_inventory
+
+    def get(self, lemma_pos, default=None):
+        a_sense_inventory = self._sense_inventory(lemma_pos)
+        return default if a_sense_inventory is None else a_sense_inventory
+
+    def keys(self):
+        """ every ``lemma-pos`` with an inventory file, whether or not it loads """
+        return sorted(self.index())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.index())
+
+    def iteritems(self):
+        """ parses every inventory not yet parsed """
+        for lemma_pos in self.keys():
+            a_sense_inventory = self._sense_inventory(lemma_pos)
+            if a_sense_inventory is not None:
+                yield lemma_pos, a_sense_inventory
+
+    def itervalues(self):
+        for lemma_pos, a_sense_inventory in self.iteritems():
+            yield a_sense_inventory
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return list(self.itervalues())
+
+
+def _sense_inventory_type_tables():
+    """ the class level hashes that parsing a sense inventory adds to """
+
+    return [(a_class.__name__, name, value)
+            for a_class in [on_sense_type, wn_sense_type, pb_sense_type]
+            for name, value in sorted(vars(a_class).items())
+            if isinstance(value, dict)]
+
+def _merge_sense_inventory_type_tables(type_tables):
+    for class_name, name, value in _sense_inventory_type_tables():
+        if name == "type_hash":
+            for a_type, count in type_tables[class_name, name].items():
+                value[a_type] += count
+        else:
+            value.update(type_tables[class_name, name])
+
+def _sense_inventory_parser_init(a_sense_inventory_registry):
+    global _parser_sense_inventory_registry
+
+    _parser_sense_inventory_registry = a_sense_inventory_registry
+
+def _sense_inventory_parser_parse(lemma_pos_list):
+    """ parse some inventories, returning them and the types they defined """
+
+    # start the type tables empty, so what's handed back is only
+    # what these inventories add to the parent's
+    for class_name, name, value in _sense_inventory_type_tables():
+        value.clear()
+
+    parsed = {}
+    for lemma_pos in lemma_pos_list:
+        parsed[lemma_pos] = _parser_sense_inventory_registry._sense_inventory(lemma_pos)
+
+    type_tables = {}
+    for class_name, name, value in _sense_inventory_type_tables():
+        type_tables[class_name, name] = dict(value)
+
+    return parsed, type_tables
+
+
 class sense_tagged_document:
     """
     Contained by: :class:`sense_bank`
@@ -1521,7 +1801,7 @@ class sense_bank(abstract_bank):
     """
 
     def __init__(self, a_subcorpus, tag, a_cursor=None, extension="sense",
-                 a_sense_inv_hash=None, a_frame_set_hash=None, indexing="word"):
+                 a_sense_inv_hash=None, a_frame_set_hash=None, indexing="word", sense_inventories_index=None):
         abstract_bank.__init__(self, a_subcorpus, tag, extension)
 
         self.lemma_pos_hash = {}
@@ -1530,8 +1810,8 @@ class sense_bank(abstract_bank):
         if(a_cursor == None):
             if not self.sense_inventory_hash:
                 self.sense_inventory_hash = self.build_sense_inventory_hash(
-                    a_subcorpus.language_id, a_subcorpus.top_dir, self.lemma_pos_hash,
-                    a_frame_set_hash)
+                    a_subcorpus.language_id, a_subcorpus.top_dir, a_frame_set_hash=a_frame_set_hash,
+                    sense_inventories_index=sense_inventories_index)
 
             sys.stderr.write("reading the sense bank [%s] ..." % self.extension)
             for a_file in self.subcorpus.get_files(self.extension):
@@ -1559,47 +1839,38 @@ class sense_bank(abstract_bank):
 
     @staticmethod
     def build_sense_inventory_hash(lang_id, top_dir, lemma_pos_hash=None,
-                                   a_frame_set_hash=None):
-        """ read in all the sense inventories from disk and make a hash of :class:`sense_inventory` instances """
+                                   a_frame_set_hash=None, sense_inventories_index=None, workers=1):
+        """ return a hash of :class:`sense_inventory` instances for the inventories under ``top_dir``
 
+        This is the :class:`sense_inventory_registry` shared by the
+        process, which parses inventories as they are looked up, or
+        all at once in ``workers`` processes if that's more than one.
+        If ``lemma_pos_hash`` is given only the inventories for its
+        lemmas are included, and they are all parsed now.
 
-        sense_inv_hash = {}
-
-        sys.stderr.write("reading the sense inventory files ....")
-        sense_inv_dir = "%s/metadata/sense-inventories" % top_dir
+        """
 
-        unproc_sense_invs = None
-        for sense_inv_fname in [sfn for sfn in os.listdir(sense_inv_dir)
-                                if sfn[-4:] == ".xml"]:
+        a_sense_inventory_registry = sense_inventory_registry.shared(lang_id, top_dir, a_frame_set_hash,
+                                                                     sense_inventories_index)
 
-            try:
+        if not lemma_pos_hash:
+            if workers > 1:
+                sys.stderr.write("reading the sense inventory files ....")
+                a_sense_inventory_registry.parse_all(workers)
+            return a_sense_inventory_registry
 
-                full_sense_inv_fname = os.path.join(sense_inv_dir, sense_inv_fname)
-
-                lemma, pos = sense_inventory.extract_lemma_pos(full_sense_inv_fname)
-                a_lemma_pos = "%s-%s" % (lemma, pos)
-                if lemma_pos_hash and not a_lemma_pos in lemma_pos_hash:
-                    on.common.log.debug("skipping %s ...." % a_lemma_pos, on.common.log.DEBUG,
-                                        on.common.log.MAX_VERBOSITY)
-                    continue
-                else:
-                    on.common.log.debug("adding %s ...." % (a_lemma_pos), on.common.log.DEBUG,
+        sense_inv_hash = {}
+        for a_lemma_pos in a_sense_inventory_registry.keys():
+            if a_lemma_pos not in lemma_pos_hash:
+                on.common.log.debug("skipping %s ...." % a_lemma_pos, on.common.log.DEBUG,
                                     on.common.log.MAX_VERBOSITY)
+                continue
 
-                on.common.log.debug("processing %s ...." % (sense_inv_fname),
-                                        on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
-                sys.stderr.write(".")
-
-                with codecs.open(full_sense_inv_fname, "r", "utf-8") as s_inv_f:
-                    sense_inv_file_str = s_inv_f.read()
-
-                    sense_inv_hash[a_lemma_pos] = on.corpora.sense.sense_inventory(
-                        sense_inv_fname, sense_inv_file_str, lang_id, a_frame_set_hash)
-
-            except Exception as e:
-                on.common.log.report("senseinv", "sense inventory failed to load", fname=sense_inv_fname)
+            on.common.log.debug("adding %s ...." % (a_lemma_pos), on.common.log.DEBUG,
+                                on.common.log.MAX_VERBOSITY)
+            if a_lemma_pos in a_sense_inventory_registry:
+                sense_inv_hash[a_lemma_pos] = a_sense_inventory_registry[a_lemma_pos]
 
-        sys.stderr.write("\n")
         return sense_inv_hash
 
     def pb_mappings(self, a_lemma, a_pos, a_sense):
@@ -1742,6 +2013,7 @@ class sense_bank(abstract_bank):
 
     sql_table_name = "sense_bank"
     sql_exists_table = "on_sense"
+    sql_document_rows = [("on_sense", "document_id = %(document_id)s")]
 
     ## @var SQL create statement for the syntactic_link table
     #
@@ -1773,8 +2045,8 @@ insert into sense_bank
 
 
 
-    def write_to_db(self, a_cursor):
-        abstract_bank.write_to_db(self, a_cursor)
+    def write_to_db(self, a_cursor, document_ids=None):
+        abstract_bank.write_to_db(self, a_cursor, document_ids)
         self.write_sense_inventory_hash_to_db(self.sense_inventory_hash, a_cursor)
 
 
@@ -1797,24 +2069,18 @@ insert into sense_bank
         a_sense_bank = sense_bank(a_subcorpus, tag, a_cursor)
 
         #---- now get document ids for this treebank ----#
-        a_cursor.execute("""select document.id from document where subcorpus_id = '%s';""" % (a_subcorpus.id))
-        document_rows = a_cursor.fetchall()
-
-        #---- and process each document ----#
-        for document_row in document_rows:
-            a_document_id = document_row["id"]
+        document_ids = cls.document_ids_from_db(a_subcorpus, a_cursor, affixes)
 
-            if not on.common.util.matches_an_affix(a_document_id, affixes):
-                continue
+        #---- and all their senses at once ----#
+        on_sense_rows_by_document_id = cls.rows_from_db(a_subcorpus, a_cursor, "on_sense") if document_ids else {}
 
+        #---- and process each document ----#
+        for a_document_id in document_ids:
             sys.stderr.write(".")
 
             a_sense_tagged_document = sense_tagged_document("", a_document_id, a_sense_bank, a_cursor)
 
-            a_cursor.execute("""select * from on_sense where document_id = '%s';""" % (a_document_id))
-            on_sense_rows = a_cursor.fetchall()
-
-            for on_sense_row in on_sense_rows:
+            for on_sense_row in on_sense_rows_by_document_id.get(a_document_id, []):
                 # a_on_sense_id = on_sense_row["id"]
                 a_on_sense_lemma = on_sense_row["lemma"]
                 a_on_sense_pos = on_sense_row["pos"]
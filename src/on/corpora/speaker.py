@@ -302,7 +302,8 @@ create table speaker_sentence
     gender          varchar(255) not null,
     competence      varchar(255) not null,
     foreign key (document_id) references document.id,
-    foreign key (id) references tree.id
+    foreign key (id) references tree.id,
+  index speaker_sentence_document_id (document_id)
 )
 default character set utf8;
 """
@@ -415,18 +416,23 @@ class speaker_document:
 
     @staticmethod
     def from_db(document_id, a_cursor, extension="speaker"):
-        a_speaker_document = speaker_document(document_id, extension)
-
         a_cursor.execute("""select *
                             from speaker_sentence
                             where speaker_sentence.document_id = '%s'""" % document_id)
 
+        return speaker_document.from_db_rows(document_id, a_cursor.fetchall(), extension)
+
+    @staticmethod
+    def from_db_rows(document_id, rows, extension="speaker"):
+        """ build a speaker document from its ``speaker_sentence`` rows """
+
+        a_speaker_document = speaker_document(document_id, extension)
 
         for a_speaker_sentence in [
             speaker_sentence(d_row["line_number"], d_row["document_id"],
                              d_row["start_time"], d_row["stop_time"], d_row["name"],
                              d_row["gender"], d_row["competence"])
-            for d_row in a_cursor.fetchall()]:
+            for d_row in rows]:
 
             a_speaker_document.append(a_speaker_sentence)
 
@@ -485,6 +491,7 @@ class speaker_bank(abstract_bank):
             pass
 
     sql_table_name = "speaker_sentence"
+    sql_document_rows = [("speaker_sentence", "document_id = %(document_id)s")]
 
     def enrich_treebank(self, a_treebank):
         abstract_bank.enrich_treebank(self, a_treebank)
@@ -503,16 +510,13 @@ class speaker_bank(abstract_bank):
         sys.stderr.write("reading the speaker bank ....")
         a_speaker_bank = speaker_bank(a_subcorpus, tag, a_cursor)
 
-        a_cursor.execute("""select id from document
-                            where document.subcorpus_id = '%s';""" % a_subcorpus.id)
-
-        for a_document_id in [d_row["id"] for d_row in a_cursor.fetchall()]:
-
-            if not on.common.util.matches_an_affix(a_document_id, affixes):
-                continue
+        document_ids = cls.document_ids_from_db(a_subcorpus, a_cursor, affixes)
+        speaker_sentence_rows_by_document_id = cls.rows_from_db(a_subcorpus, a_cursor, "speaker_sentence") if document_ids else {}
 
+        for a_document_id in document_ids:
             sys.stderr.write(".")
-            a_speaker_bank.append(speaker_document.from_db(a_document_id, a_cursor, a_speaker_bank.extension))
+            a_speaker_bank.append(speaker_document.from_db_rows(a_document_id, speaker_sentence_rows_by_document_id.get(a_document_id, []),
+                                                                a_speaker_bank.extension))
 
         sys.stderr.write("\n")
         return a_speaker_bank
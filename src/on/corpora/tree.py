@@ -82,6 +82,7 @@ Correspondences:
 .. autoclass:: lemma
 .. autoclass:: syntactic_link
 .. autoclass:: compound_function_tag
+.. autoclass:: string_table
 .. autoexception:: tree_exception
 
 
@@ -107,6 +108,7 @@ import re
 import codecs
 import tempfile
 import itertools
+import multiprocessing
 
 
 
@@ -128,7 +130,7 @@ from on.common.util import bunch
 
 import on.corpora
 
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from on.common.util import wrap
 from on.corpora import abstract_bank
 
@@ -1102,8 +1104,8 @@ values (%s)
 class compound_function_tag:
     def __init__(self, a_function_tag_string, subtree):
         self.id = "%s@%s" % (a_function_tag_string, subtree.id)
-        self.type = a_function_tag_string
-        self.function_tag_types = a_function_tag_string.split("-")
+        self.type = tree_strings.intern(a_function_tag_string)
+        self.function_tag_types = [tree_strings.intern(x) for x in a_function_tag_string.split("-")]
 
         for a_function_tag_type in self:
             if a_function_tag_type not in function_tag_type.allowed:
@@ -1116,7 +1118,8 @@ class compound_function_tag:
 create table compound_function_tag
 (
   id varchar(255) not null,
-  type varchar(255) not null
+  type varchar(255) not null,
+  index compound_function_tag_id (id)
 )
 default character set utf8;
 """
@@ -1199,7 +1202,8 @@ create table syntactic_link
   reference_subtree_id  varchar(255) not null,
   identity_subtree_id  varchar(255) not null,
   foreign key (reference_subtree_id) references tree.id,
-  foreign key (identity_subtree_id) references tree.id
+  foreign key (identity_subtree_id) references tree.id,
+  index syntactic_link_reference_subtree_id (reference_subtree_id)
 )
 default character set utf8;
 """
@@ -1291,7 +1295,11 @@ class lemma:
     @staticmethod
     def from_db(a_leaf_id, a_cursor):
         a_cursor.execute("SELECT * FROM lemma WHERE leaf_id = '%s'" % a_leaf_id)
-        rows = a_cursor.fetchall()
+        return lemma.from_db_rows(a_cursor.fetchall())
+
+    @staticmethod
+    def from_db_rows(rows):
+        """ build a lemma from the lemma table rows of one leaf, or None if there are none """
 
         if not rows:
             return None
@@ -1335,7 +1343,10 @@ create table lemma
   lemma varchar(255),
   coarse_sense varchar(16),
   leaf_id varchar(255),
-  foreign key (leaf_id) references tree.id
+  document_id varchar(255),
+  foreign key (leaf_id) references tree.id,
+  foreign key (document_id) references document.id,
+  index lemma_document_id (document_id)
 )
 default character set utf8;
 """
@@ -1359,20 +1370,158 @@ insert into lemma
   gloss,
   lemma,
   coarse_sense,
-  leaf_id
-) values(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+  leaf_id,
+  document_id
+) values(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
 """
 
-    def write_to_db(self, cursor):
+    def write_to_db(self, cursor, document_id):
         data = [(self.id, self.input_string, self.b_transliteration, self.comment, self.index,
                  self.offset, self.unvocalized_string, self.vocalized_string, self.vocalized_input,
-                 self.pos, self.gloss, self.lemma, self.coarse_sense, self.leaf_id)]
+                 self.pos, self.gloss, self.lemma, self.coarse_sense, self.leaf_id, document_id)]
 
         cursor.executemany("%s" % (self.__class__.sql_insert_statement), data)
 
 
 
 
+class _unallocated_list(list):
+    """ the empty list a :class:`_lazy_list_attribute` gives out while it has no list of its own
+
+    Reading it is reading an empty list.  The first change that could
+    add to it stores it on the tree node it came from, so from then on
+    it is simply that node's list.  If the node got a list some other
+    way in the mean time, changes go to that list instead.
+
+    """
+
+    __slots__ = ["_a_tree", "_slot"]
+
+    def __init__(self, a_tree, slot):
+        list.__init__(self)
+        self._a_tree = a_tree
+        self._slot = slot
+
+    def _allocated(self):
+        if self._a_tree is None:
+            return self
+
+        a_list = getattr(self._a_tree, self._slot)
+        if a_list is None:
+            setattr(self._a_tree, self._slot, self)
+            self._a_tree = None
+            a_list = self
+        return a_list
+
+    def append(self, x):
+        list.append(self._allocated(), x)
+
+    def extend(self, x):
+        list.extend(self._allocated(), x)
+
+    def insert(self, i, x):
+        list.insert(self._allocated(), i, x)
+
+    def __setitem__(self, i, x):
+        list.__setitem__(self._allocated(), i, x)
+
+    def __iadd__(self, x):
+        a_list = self._allocated()
+        list.extend(a_list, x)
+        return a_list
+
+    def __reduce_ex__(self, protocol):
+        # copies and pickles are plain lists
+        return list, (list(self),)
+
+class _lazy_list_attribute(object):
+    """ a :class:`tree` attribute that defaults to an empty list without allocating one
+
+    Most nodes never get names, coreference links, proposition nodes,
+    translations, and so on, so rather than every node carrying a dozen
+    empty lists the value lives in a slot that stays ``None`` until the
+    first append (see :class:`_unallocated_list`) or assignment.
+    Deleting the attribute makes it an unallocated empty list again.
+
+    """
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, a_tree, tree_type=None):
+        if a_tree is None:
+            return self
+
+        a_list = getattr(a_tree, self.slot)
+        if a_list is None:
+            return _unallocated_list(a_tree, self.slot)
+        return a_list
+
+    def __set__(self, a_tree, val):
+        setattr(a_tree, self.slot, val)
+
+    def __delete__(self, a_tree):
+        setattr(a_tree, self.slot, None)
+
+
+class string_table(object):
+    """ The distinct strings of some kind, each kept once and numbered
+
+    There are only thousands of distinct tags, parts of speech and
+    function tags, and not many more distinct words, but hundreds of
+    millions of references to them from tree nodes.  :meth:`intern`
+    returns the one copy of a string the table keeps, so that equal
+    strings share memory, and :meth:`id` gives a small integer for it
+    that stays the same for the life of the process, for cheap
+    comparisons and compact arrays.
+
+    Trees use the module level :data:`tree_strings` table.  Setting its
+    ``enabled`` attribute to False turns interning off, which is only
+    useful to measure what it saves.
+
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._ids = {}     # string -> id
+        self._strings = [] # id -> string
+
+    def intern(self, a_string):
+        """ the copy of a_string we keep; None stays None """
+
+        if a_string is None or not self.enabled:
+            return a_string
+
+        a_id = self._ids.get(a_string)
+        if a_id is None:
+            a_id = self._ids[a_string] = len(self._strings)
+            self._strings.append(a_string)
+        return self._strings[a_id]
+
+    def id(self, a_string):
+        """ the integer id of a_string, interning it if new; None for None """
+
+        if a_string is None:
+            return None
+
+        a_id = self._ids.get(a_string)
+        if a_id is None:
+            a_id = self._ids[a_string] = len(self._strings)
+            self._strings.append(a_string)
+        return a_id
+
+    def string(self, a_id):
+        """ the string with this id """
+        return self._strings[a_id]
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __contains__(self, a_string):
+        return a_string in self._ids
+
+tree_strings = string_table() # tags, parts of speech, phrase types, function tags and words of all trees
+
 
 class tree(object):
     """ root trees, internal nodes, and leaves are all trees.
@@ -1436,6 +1585,16 @@ class tree(object):
 
               The subtree in this tree that this trace leaf points to
 
+            .. attribute:: tag_id
+            .. attribute:: word_id
+            .. attribute:: part_of_speech_id
+            .. attribute:: phrase_type_id
+
+              Small integer ids of :attr:`tag`, :attr:`word`,
+              ``part_of_speech`` and ``phrase_type`` in
+              :data:`tree_strings`, which all trees intern these strings
+              in.  Equal strings have equal ids.
+
         Available only after enrichment:
 
 
@@ -1612,6 +1771,12 @@ class tree(object):
 
     NODE_END_MATCHER = re.compile(r"""\)\s*        # close paren""", re.VERBOSE)
 
+    PARSE_TOKEN_MATCHER = re.compile(r"""\(          # open paren
+                                         |\)         # or close paren
+                                         |[^()\s]+   # or a tag or word""", re.VERBOSE)
+
+    PARSE_ENGINES = ["regex", "iterative"]
+
     TAG_INDEX_MATCHER = re.compile(".*(-\d*)")
 
     CODE_CLEANER = re.compile(r"(<|-LAB-)[^:>]*:[^:>]*:([^:>]*)(:[^:>]*)?(>|-RAB-)")
@@ -1626,6 +1791,39 @@ class tree(object):
     PT_phrase_function_tags_re = re.compile("^(.*?)(?:-(.*))?$")
     PT_trace_type_and_reference_index_re = re.compile("(.*\*)(?:-(\d+))?$")
 
+    # a full corpus has tens of millions of nodes, so they have slots
+    # instead of a __dict__ each (one is still created for any other
+    # attribute set on a node) and the annotation lists most nodes
+    # never use are only allocated when first added to
+    LAZY_LISTS = """subtree_ids compound_function_tag syntactic_links reference_leaves
+                    start_named_entity_list end_named_entity_list
+                    start_coreference_link_list end_coreference_link_list
+                    predicate_node_list argument_node_list link_node_list
+                    translations originals""".split()
+
+    __slots__ = """tag word start end document_word_index coref_section
+                   start_character end_character parent id document_id children
+                   lemma lemma_object child_index part_of_speech phrase_type
+                   sentence_id paragraph_id headline_flag identity_index reference_index
+                   identity_subtree marked_for_deletion is_a_leaf document_tag
+                   named_entity coreference_link proposition on_sense
+                   _speaker_sentence language
+                   _leaves _tokens _subtrees _index_tables __dict__""".split() + ["_" + x for x in LAZY_LISTS]
+
+    subtree_ids = _lazy_list_attribute("_subtree_ids")
+    compound_function_tag = _lazy_list_attribute("_compound_function_tag")
+    syntactic_links = _lazy_list_attribute("_syntactic_links")
+    reference_leaves = _lazy_list_attribute("_reference_leaves")
+    start_named_entity_list = _lazy_list_attribute("_start_named_entity_list")
+    end_named_entity_list = _lazy_list_attribute("_end_named_entity_list")
+    start_coreference_link_list = _lazy_list_attribute("_start_coreference_link_list")
+    end_coreference_link_list = _lazy_list_attribute("_end_coreference_link_list")
+    predicate_node_list = _lazy_list_attribute("_predicate_node_list")
+    argument_node_list = _lazy_list_attribute("_argument_node_list")
+    link_node_list = _lazy_list_attribute("_link_node_list")
+    translations = _lazy_list_attribute("_translations")
+    originals = _lazy_list_attribute("_originals")
+
 
 
 
@@ -1644,11 +1842,11 @@ class tree(object):
         # fix DATE tags in Serif parse trees
         if self.tag == "DATE":
             self.tag = "NP"
-        self.tag = self.tag.replace("DATE-", "")
+        self.tag = tree_strings.intern(self.tag.replace("DATE-", ""))
 
 
-        self.word = word     # value of the word associated with the root of this tree and is
-                             # only valid for leaves, for all non leaves this is None
+        self.word = tree_strings.intern(word) # value of the word associated with the root of this tree and is
+                                              # only valid for leaves, for all non leaves this is None
 
         self.start = None    # node span start position
         self.end = None      # Node span end position (exclusive)
@@ -1676,12 +1874,12 @@ class tree(object):
         self.lemma_object = None    # lemma object of the word (when available, else None)
 
 
-        self.subtree_ids = [] # list of all the subtree ids
+        self._subtree_ids = None # list of all the subtree ids
 
         self.child_index = None  # index of the child -- from left to right -- of its parent
                                  # it is necessary to construct the tree from database tables.
 
-        self.compound_function_tag = [] # the function tag which can represent multiple pieces of information
+        self._compound_function_tag = None # the function tag which can represent multiple pieces of information
                                           # concatenated with a "-"
 
         self.part_of_speech = None # part of speech of a node
@@ -1694,7 +1892,7 @@ class tree(object):
 
         self.headline_flag = None
 
-        self.syntactic_links = [] # this attribute is only valid for a top-level tree, and lists the syntactic
+        self._syntactic_links = None # this attribute is only valid for a top-level tree, and lists the syntactic
                                   # links in the tree
 
         self.identity_index = None # the number with which a node is identified in the process of pointing to it
@@ -1702,7 +1900,7 @@ class tree(object):
         self.reference_index = None # indicates the identity index of the node of which this trace is trace of
 
         # these two python links replace the old identity_index2tree_id_hash and reference_index2tree_id_hash
-        self.reference_leaves = []
+        self._reference_leaves = None
         self.identity_subtree = None
 
         self.marked_for_deletion = False
@@ -1712,17 +1910,17 @@ class tree(object):
         self.document_tag = document_tag # the tag of the containing tree document
 
         self.named_entity = None
-        self.start_named_entity_list = [] # named entities starting at this node
-        self.end_named_entity_list = []   # named entities ending with this node
+        self._start_named_entity_list = None # named entities starting at this node
+        self._end_named_entity_list = None   # named entities ending with this node
 
         self.coreference_link = None
-        self.start_coreference_link_list = [] # coreference links starting at this node
-        self.end_coreference_link_list = []   # coreference links ending with this node
+        self._start_coreference_link_list = None # coreference links starting at this node
+        self._end_coreference_link_list = None   # coreference links ending with this node
 
         self.proposition = None # proposition object is attached to the subtree of the primary predicate
-        self.predicate_node_list = [] # subtrees can be shared by arguments of different propositions
-        self.argument_node_list = []
-        self.link_node_list = []
+        self._predicate_node_list = None # subtrees can be shared by arguments of different propositions
+        self._argument_node_list = None
+        self._link_node_list = None
 
         self.on_sense = None
 
@@ -1732,8 +1930,8 @@ class tree(object):
         #
         #   corpus.load=chinese-bc-cnn,english-bc-cnn corpus.banks=parse,parallel
         #
-        self.translations = [] # will contain trees that are translations of this tree
-        self.originals = []   # will contain the originals for this tree
+        self._translations = None # will contain trees that are translations of this tree
+        self._originals = None   # will contain the originals for this tree
 
         self.speaker_sentence = None
 
@@ -1742,6 +1940,7 @@ class tree(object):
         self._leaves = None   # used by method leaves
         self._tokens = None   # used by method tokens
         self._subtrees = None # used by method subtrees
+        self._index_tables = None # used by method _get_index_tables
 
     def _get_speaker_sentence(self):
         return self.get_root()._speaker_sentence
@@ -1753,6 +1952,12 @@ class tree(object):
 
     speaker_sentence = property(_get_speaker_sentence, _set_speaker_sentence)
 
+    # small integer views of the interned strings; see string_table
+    tag_id = property(lambda self: tree_strings.id(self.tag))
+    word_id = property(lambda self: tree_strings.id(self.word))
+    part_of_speech_id = property(lambda self: tree_strings.id(self.part_of_speech))
+    phrase_type_id = property(lambda self: tree_strings.id(self.phrase_type))
+
     def _incomparable(self, other):
         return type(self) != type(other) or not self.is_leaf() or not other.is_leaf() or self.document_id != other.document_id
 
@@ -1881,6 +2086,69 @@ class tree(object):
 
         return result, remainder[node_end_match.end():], word_count
 
+    @classmethod
+    def from_string_iterative(cls, syntactic_parse, document_tag="gold"):
+        """ build a tree in a single pass over the parenthesized string
+
+        An alternative to :meth:`from_string_helper` that walks the
+        tokens of ``syntactic_parse`` by position with an explicit
+        stack, instead of recursing and re-slicing the remainder of
+        the string at every node.  It is linear in the length of the
+        parse and isn't bounded by the recursion limit on deep trees.
+        The trees built, including their ``start`` and ``end`` spans,
+        are the same.
+
+        """
+
+        tokens = cls.PARSE_TOKEN_MATCHER.findall(syntactic_parse)
+        num_tokens = len(tokens)
+
+        stack = []
+        word_count = 0
+        i = 0
+
+        while i < num_tokens:
+            token = tokens[i]
+
+            if token == "(":
+                if i + 1 == num_tokens or tokens[i+1] in "()":
+                    raise Exception("missing tag after token %s" % i)
+
+                if i + 3 < num_tokens and tokens[i+3] == ")" and tokens[i+2] not in "()":
+                    a_node = tree(tokens[i+1], tokens[i+2], document_tag=document_tag)
+                    a_node.start = word_count
+                    a_node.end = word_count + 1
+                    word_count += 1
+                    i += 4
+
+                    if not stack:
+                        return a_node
+                    a_node.parent = stack[-1]
+                    stack[-1].children.append(a_node)
+                else:
+                    a_node = tree(tokens[i+1], document_tag=document_tag)
+                    a_node.start = word_count
+                    stack.append(a_node)
+                    i += 2
+
+            elif token == ")":
+                if not stack:
+                    raise Exception("unbalanced close paren at token %s" % i)
+
+                a_node = stack.pop()
+                a_node.end = word_count
+                i += 1
+
+                if not stack:
+                    return a_node
+                a_node.parent = stack[-1]
+                stack[-1].children.append(a_node)
+
+            else:
+                raise Exception("unexpected word %r at token %s" % (token, i))
+
+        raise Exception("parse ended with %s unclosed nodes" % len(stack))
+
 
     def fix_trace_index_locations(self):
         """Reconcile the two forms of trace index notation; set up syntactic link pointers
@@ -2049,7 +2317,7 @@ class tree(object):
 
             get_nodes_by_trace_number_helper(a_tree)
 
-            for trace_number in nbtn.keys():
+            for trace_number in list(nbtn.keys()):
                 """ if we we're supposed to look for gapping, return
                 only those where we found gapping.  And vice versa """
 
@@ -2086,7 +2354,7 @@ class tree(object):
                                  "Tree using same index number for gapping and tracing: %s in tree %s" %
                                  (self.to_string(), self.id))
 
-        for trace_number, nodes in trace_nodes_by_index.iteritems():
+        for trace_number, nodes in trace_nodes_by_index.items():
 
             changes_ok = True
             if any(get_child_word_trace_number(node) for node in nodes):
@@ -2166,7 +2434,7 @@ class tree(object):
                 target.reference_leaves.append(source)
 
 
-        for trace_number, nodes in gap_nodes_by_index.iteritems():
+        for trace_number, nodes in gap_nodes_by_index.items():
 
             node = nodes[0]
             new_tag = safe_replace(node.tag, "=" + trace_number, "-" + trace_number)
@@ -2276,13 +2544,20 @@ class tree(object):
             return False
 
     @classmethod
-    def from_string(cls, syntactic_parse, id=None, document_tag="gold"):
+    def from_string(cls, syntactic_parse, id=None, document_tag="gold", engine="regex"):
         """Get a tree from a parenthesized string.
 
         This is the standard way to load a tree from files
 
+        ``engine`` is one of :attr:`PARSE_ENGINES`: ``regex`` uses the
+        recursive :meth:`from_string_helper` and ``iterative`` uses
+        :meth:`from_string_iterative`.
+
         """
 
+        if engine not in cls.PARSE_ENGINES:
+            raise Exception("Unknown parse engine %r; expected one of %s" % (engine, ", ".join(cls.PARSE_ENGINES)))
+
         if not syntactic_parse.strip():
             raise Exception("from_string called on empty parse; id=%s" % id)
 
@@ -2290,7 +2565,10 @@ class tree(object):
         syntactic_parse = cls.EMPTY_NODE_MATCHER.sub(r'', syntactic_parse)
 
         try:
-            result, remainder, word_count = cls.from_string_helper(syntactic_parse, 0, document_tag=document_tag)
+            if engine == "iterative":
+                result = cls.from_string_iterative(syntactic_parse, document_tag=document_tag)
+            else:
+                result, remainder, word_count = cls.from_string_helper(syntactic_parse, 0, document_tag=document_tag)
         except Exception:
             try:
                 tree = cls.pretty_print_tree_string(syntactic_parse)
@@ -2354,8 +2632,8 @@ class tree(object):
             a_subtree = tree(row["tag"], row["word"])
             a_subtree.start = row["start"]
             a_subtree.end = row["end"]
-            a_subtree.phrase_type = row["phrase_type"]
-            a_subtree.part_of_speech = row["part_of_speech"]
+            a_subtree.phrase_type = tree_strings.intern(row["phrase_type"])
+            a_subtree.part_of_speech = tree_strings.intern(row["part_of_speech"])
 
             return a_subtree
 
@@ -2376,13 +2654,13 @@ class tree(object):
                 a_leaf.lemma = a_leaf.lemma_object.lemma
 
     @staticmethod
-    def from_db_fast(a_root_tree_id, a_cursor):
+    def from_db_fast(a_root_tree_id, a_cursor, parse_engine="regex"):
         a_cursor.execute("""select parse,coref_section from tree where id = '%s';""" % (a_root_tree_id))
         row = a_cursor.fetchone()
 
         a_parse = row["parse"]
 
-        a_tree = tree.from_string(a_parse, id=a_root_tree_id)
+        a_tree = tree.from_string(a_parse, id=a_root_tree_id, engine=parse_engine)
 
         a_tree.coref_section = row["coref_section"]
 
@@ -2394,7 +2672,12 @@ class tree(object):
         """ check tags are legal, fix double quotes to be the appropriate directional single quote pair. """
 
         for a_subtree in self.subtrees():
+            # tags and words may have been rewritten since the node was
+            # made, as when fixing trace indices
+            a_subtree.tag = tree_strings.intern(a_subtree.tag)
+
             if a_subtree.is_leaf():
+                a_subtree.word = tree_strings.intern(a_subtree.word)
                 a_subtree.part_of_speech = a_subtree.tag
                 if a_subtree.tag == "-NONE-":
                     if a_subtree.word == "*0*":
@@ -2414,12 +2697,12 @@ class tree(object):
                             num_open_quotes += 1
                         elif a_leaf.tag == "''":
                             num_close_quotes += 1
-                    a_subtree.tag = "``" if num_open_quotes == num_close_quotes else "''"
+                    a_subtree.tag = tree_strings.intern("``" if num_open_quotes == num_close_quotes else "''")
 
                 if a_subtree.part_of_speech not in pos_type.allowed:
                     potential_replacement_pos = a_subtree.part_of_speech.replace("=","-").split("-")[0]
                     if potential_replacement_pos in pos_type.allowed:
-                        a_subtree.part_of_speech = potential_replacement_pos
+                        a_subtree.part_of_speech = tree_strings.intern(potential_replacement_pos)
                     else:
                         self.bad_data("invalid pos type",
                                       ["pos type", a_subtree.part_of_speech],
@@ -2427,13 +2710,13 @@ class tree(object):
 
             else:
                 hyphenated_bits = a_subtree.tag.replace("=","-").split("-")
-                a_subtree.phrase_type = hyphenated_bits[0]
+                a_subtree.phrase_type = tree_strings.intern(hyphenated_bits[0])
                 if a_subtree.phrase_type not in phrase_type.allowed:
                     self.bad_data("invalid phrase type", ["phrase type", a_subtree.phrase_type])
 
                 a_compound_function_tag_string = "-".join(x for x in hyphenated_bits[1:] if not x.isdigit())
                 if(a_compound_function_tag_string == ""):
-                    a_subtree.compound_function_tag = []
+                    del a_subtree.compound_function_tag # back to an unallocated empty list
                 else:
                     a_subtree.compound_function_tag = compound_function_tag(a_compound_function_tag_string, a_subtree)
 
@@ -2687,6 +2970,157 @@ class tree(object):
 
         return "\n".join(tr)
 
+    def conll_rows(self, document_name, part):
+        """ the rows for this root tree in the CoNLL-2012 ``*_gold_conll`` format
+
+        One list of column values per word.  Traces are dropped, along
+        with the constituents and annotation spans that only cover
+        traces.  The columns are: document name, part, word index,
+        word, part of speech, parse bit, predicate lemma, predicate
+        frameset, word sense, speaker, named entities, one column per
+        proposition (in order of the predicates) and coreference.
+        Only valid identity coreference chains are included.
+
+        """
+
+        if not self.is_root():
+            raise Exception("conll_rows only makes sense on the root of a tree")
+
+        a_leaves = list(self.leaves())
+        words = [a_leaf for a_leaf in a_leaves if not a_leaf.is_trace()]
+
+        # for every leaf, the index of the first word at or after it and
+        # of the last word at or before it
+        next_word, prev_word = [], []
+        w_index = 0
+        for a_leaf in a_leaves:
+            is_word = not a_leaf.is_trace()
+            next_word.append(w_index)
+            prev_word.append(w_index if is_word else w_index - 1)
+            if is_word:
+                w_index += 1
+
+        leaf_index = dict((a_leaf, i) for i, a_leaf in enumerate(a_leaves))
+
+        def word_span(start_leaf, end_leaf):
+            if start_leaf not in leaf_index or end_leaf not in leaf_index:
+                return None
+            start, end = next_word[leaf_index[start_leaf]], prev_word[leaf_index[end_leaf]]
+            if start > end:
+                return None
+            return start, end
+
+        def subtree_word_span(a_subtree):
+            subtree_leaves = a_subtree.leaves()
+            return word_span(subtree_leaves[0], subtree_leaves[-1])
+
+        def bracket(column, label, span):
+            start, end = span
+            column[start] = "(%s%s" % (label, column[start])
+            column[end] = "%s)" % column[end]
+
+        #---- parse bit ----#
+        # bottom up, so that each node's bracket goes outside those of its children
+        parse_bits = ["*" for a_word in words]
+        for a_subtree in reversed(self.subtrees()):
+            if a_subtree.is_leaf():
+                continue
+            span = subtree_word_span(a_subtree)
+            if span:
+                label = a_subtree.tag.replace("=", "-").split("-")[0] or a_subtree.tag
+                bracket(parse_bits, label, span)
+
+        #---- predicates, senses and propositions ----#
+        lemmas = ["-" for a_word in words]
+        framesets = ["-" for a_word in words]
+        senses = ["-" for a_word in words]
+
+        for i, a_word in enumerate(words):
+            if a_word.on_sense and a_word.on_sense.valid:
+                lemmas[i] = a_word.on_sense.lemma
+                senses[i] = a_word.on_sense.sense
+
+        propositions = []
+        for a_subtree in self.subtrees():
+            a_proposition = a_subtree.proposition
+            if not a_proposition or not a_proposition.valid:
+                continue
+            if a_proposition.get_primary_predicate().subtree is not a_subtree:
+                continue
+            span = subtree_word_span(a_subtree)
+            if span:
+                propositions.append((span, a_proposition))
+        propositions.sort(key=lambda x: x[0])
+
+        argument_columns = []
+        for span, a_proposition in propositions:
+            lemmas[span[0]] = a_proposition.lemma
+            framesets[span[0]] = a_proposition.pb_sense_num
+
+            a_column = ["*" for a_word in words]
+            bracket(a_column, "V", span)
+
+            for a_argument_analogue in a_proposition.argument_analogues:
+                core_subtree, r_subtrees, c_subtrees = a_argument_analogue.get_subtree_tuple()
+                if not core_subtree:
+                    continue
+
+                for prefix, subtrees in [("", [core_subtree]), ("R-", r_subtrees), ("C-", c_subtrees)]:
+                    for a_subtree in subtrees:
+                        arg_span = subtree_word_span(a_subtree)
+                        if arg_span:
+                            bracket(a_column, prefix + a_argument_analogue.type, arg_span)
+
+            argument_columns.append(a_column)
+
+        #---- speaker ----#
+        speaker = "-"
+        if self.speaker_sentence and self.speaker_sentence.name:
+            speaker = "_".join(self.speaker_sentence.name.split())
+
+        #---- names ----#
+        names = ["*" for a_word in words]
+        named = [False for a_word in words]
+        for a_leaf in a_leaves:
+            for a_named_entity in a_leaf.start_named_entity_list:
+                if not a_named_entity.valid:
+                    continue
+                span = word_span(a_named_entity.start_leaf, a_named_entity.end_leaf)
+                if span and not any(named[span[0]:span[1]+1]): # the format can't nest names
+                    if span[0] == span[1]:
+                        names[span[0]] = "(%s)" % a_named_entity.type
+                    else:
+                        bracket(names, a_named_entity.type, span)
+                    named[span[0]:span[1]+1] = [True]*(span[1] - span[0] + 1)
+
+        #---- coreference ----#
+        coref_starts = [[] for a_word in words]
+        coref_ends = [[] for a_word in words]
+        coref_singles = [[] for a_word in words]
+        for a_leaf in a_leaves:
+            for a_coreference_link in a_leaf.start_coreference_link_list:
+                a_chain = a_coreference_link.coreference_chain
+                if not a_coreference_link.valid or not a_chain.valid or a_chain.type != "IDENT":
+                    continue
+                span = word_span(a_coreference_link.start_leaf, a_coreference_link.end_leaf)
+                if not span:
+                    continue
+                if span[0] == span[1]:
+                    coref_singles[span[0]].append("(%s)" % a_chain.identifier)
+                else:
+                    coref_starts[span[0]].append("(%s" % a_chain.identifier)
+                    coref_ends[span[1]].append("%s)" % a_chain.identifier)
+
+        rows = []
+        for i, a_word in enumerate(words):
+            corefs = coref_starts[i] + coref_singles[i] + coref_ends[i]
+            rows.append([document_name, "%s" % part, "%s" % i, a_word.get_word(),
+                         a_word.part_of_speech or a_word.tag, parse_bits[i],
+                         lemmas[i], framesets[i], senses[i], speaker, names[i]] +
+                        [a_column[i] for a_column in argument_columns] +
+                        ["|".join(corefs) if corefs else "-"])
+        return rows
+
 
 
 
@@ -2762,6 +3196,8 @@ class tree(object):
         a_tree.token2word_hash = {}
         a_tree.word2token_hash = {}
 
+        a_tree.invalidate_caches()
+
         return a_tree
 
 
@@ -2788,6 +3224,9 @@ class tree(object):
                     del a_subtree.children[i]
                 else:
                     i=i+1
+
+        a_tree.invalidate_caches()
+
         return a_tree
 
 
@@ -2976,20 +3415,16 @@ class tree(object):
 
         assert sloppy in [False, 'next', 'prev']
 
-        w_index = 0
-        for a_leaf in self.get_root():
-            if a_leaf.is_trace():
-                if a_leaf == self:
-                    if sloppy == "next":
-                        return w_index
-                    elif sloppy == "prev":
-                        return w_index-1
-                continue
+        # number of non-trace leaves before us
+        w_index = self.get_root()._get_index_tables().leaf_word_index.get(self)
 
-            if a_leaf == self:
+        if w_index is not None:
+            if not self.is_trace():
                 return w_index
-
-            w_index += 1
+            if sloppy == "next":
+                return w_index
+            elif sloppy == "prev":
+                return w_index-1
 
         assert self.is_trace()
         return None
@@ -3078,6 +3513,9 @@ class tree(object):
     def leaves(self, regen_cache=False):
         """ generate the leaves under this subtree """
 
+        if regen_cache:
+            self._index_tables = None
+
         if regen_cache or not self._leaves:
             if not self.children:
                 self._leaves = [self]
@@ -3106,6 +3544,68 @@ class tree(object):
                                                  for a_subtree in a_child.subtrees(regen_cache=regen_cache)]
         return self._subtrees
 
+    def invalidate_caches(self):
+        """ forget the cached leaves, tokens, subtrees and lookup tables of the whole tree
+
+        Anything that adds, removes or renames (changes the id of) nodes
+        of a tree after lookups may have been made on it needs to call
+        this.
+
+        """
+
+        a_node_list = [self.get_root()]
+        while a_node_list:
+            a_node = a_node_list.pop()
+            a_node._leaves = None
+            a_node._tokens = None
+            a_node._subtrees = None
+            a_node._index_tables = None
+            a_node_list.extend(a_node.children)
+
+    def _get_index_tables(self):
+        """ the lookup tables under this subtree, built on first use
+
+        A bunch with:
+
+         - ``leaves``: token index -> leaf
+         - ``word_leaves``: word index -> leaf; traces have no word index
+         - ``leaf_word_index``: leaf -> how many non-trace leaves precede it
+         - ``subtree_by_id``: subtree id -> subtree
+         - ``subtree_by_span``: (start leaf, end leaf) -> highest subtree with that span
+
+        These back :meth:`get_word_index`, :meth:`get_leaf_by_word_index`,
+        :meth:`get_leaf_by_token_index`, :meth:`get_subtree` and
+        :meth:`get_subtree_by_span`.  They are thrown away by
+        :meth:`invalidate_caches`.
+
+        """
+
+        if self._index_tables is None:
+            tables = bunch(leaves=list(self.leaves()),
+                           word_leaves=[],
+                           leaf_word_index={},
+                           subtree_by_id={},
+                           subtree_by_span={})
+
+            for a_leaf in tables.leaves:
+                tables.leaf_word_index[a_leaf] = len(tables.word_leaves)
+                if not a_leaf.is_trace():
+                    tables.word_leaves.append(a_leaf)
+
+            # subtrees are top to bottom, so the first one seen for an id or span wins
+            for a_subtree in self.subtrees():
+                if a_subtree.id is not None and a_subtree.id not in tables.subtree_by_id:
+                    tables.subtree_by_id[a_subtree.id] = a_subtree
+
+                subtree_leaves = a_subtree.leaves()
+                a_span = (subtree_leaves[0], subtree_leaves[-1])
+                if a_span not in tables.subtree_by_span:
+                    tables.subtree_by_span[a_span] = a_subtree
+
+            self._index_tables = tables
+
+        return self._index_tables
+
     def is_leaf(self):
         """ does this tree node represent a leaf? """
 
@@ -3255,23 +3755,19 @@ class tree(object):
                 use_rest = self.id
             a_id = "%s@%s" % (a_id, use_rest)
 
-        for a_subtree in self.subtrees():
-            if( a_subtree.id == a_id ):
-                return a_subtree
+        a_subtree = self._get_index_tables().subtree_by_id.get(a_id)
+        if a_subtree is not None:
+            return a_subtree
 
         raise tree_exception("requested id: %s not found -- the code should not reach here for a valid id." % (a_id))
 
     def get_leaf_by_word_index(self, a_word_index):
         """ given a word index, return the leaf at that index """
 
-        w_index = 0
-        for a_leaf in self:
-            if a_leaf.is_trace():
-                continue
+        word_leaves = self._get_index_tables().word_leaves
 
-            if a_word_index == w_index:
-                return a_leaf
-            w_index += 1
+        if isinstance(a_word_index, int) and 0 <= a_word_index < len(word_leaves):
+            return word_leaves[a_word_index]
 
         raise KeyError("No Such Leaf Index %s" % a_word_index)
 
@@ -3282,10 +3778,7 @@ class tree(object):
             raise Exception("get_leaf_by_token_index only makes sense on the root of a tree")
 
         a_subtree_id = "%s:0@%s" % (a_token_index, self.id)
-        try:
-            return self.get_subtree(a_subtree_id)
-        except Exception:
-            return None
+        return self._get_index_tables().subtree_by_id.get(a_subtree_id)
 
     def get_subtree_by_span(self, start, end):
         """ given start and end of a span, return the highest subtree that represents it
@@ -3296,21 +3789,17 @@ class tree(object):
 
         """
 
-        leaves = list(self.leaves())
+        tables = self._get_index_tables()
 
         try:
-            if start not in leaves:
-                start = leaves[start]
-            if end not in leaves:
-                end = leaves[end - 1]
+            if start not in tables.leaf_word_index:
+                start = tables.leaves[start]
+            if end not in tables.leaf_word_index:
+                end = tables.leaves[end - 1]
         except Exception:
             return None
 
-        for a_subtree in self.subtrees():
-            if a_subtree[0] is start and a_subtree[-1] is end:
-                return a_subtree
-
-        return None
+        return tables.subtree_by_span.get((start, end))
 
 
     def get_subtree_id(self, start, end):
@@ -3493,6 +3982,8 @@ class tree(object):
                 a_parent = a_parent.parent
                 height += 1
 
+        self.invalidate_caches()
+
 
     # lets tag the child indices of each subtree
 
@@ -3658,7 +4149,8 @@ class tree(object):
 
     sql_table_name = "tree"
 
-    # sql create statement for the tree table
+    # sql create statement for the tree table.  Every node has the id
+    # of its document, and only root trees have no parent_id.
     sql_create_statement = \
 """
 create table tree
@@ -3684,7 +4176,9 @@ create table tree
   foreign key (syntactic_link_type) references syntactic_link_type.id,
   foreign key (part_of_speech)      references pos_type.id,
   foreign key (phrase_type)         references phrase_type.id,
-  foreign key (function_tag_id)     references compound_function_tag.id
+  foreign key (function_tag_id)     references compound_function_tag.id,
+  index tree_document_id (document_id),
+  index tree_parent_id (parent_id)
 )
 default character set utf8;
 """
@@ -3734,7 +4228,7 @@ default character set utf8;
 
         data = [(self.id,
                  a_parent_id,
-                 self.document_id,
+                 self.get_root().document_id,
                  self.get_word() if self.is_leaf() else "",
                  self.child_index,
                  self.start,
@@ -3761,7 +4255,7 @@ default character set utf8;
 
         for a_leaf in self.leaves():
             if(a_leaf.lemma_object != None):
-                a_leaf.lemma_object.write_to_db(cursor)
+                a_leaf.lemma_object.write_to_db(cursor, self.get_root().document_id)
 
 
 
@@ -3828,6 +4322,12 @@ class tree_document:
            original document that this one was translated from.  It doesn't
            make sense to have more than one of these.
 
+        .. attribute:: annotation_documents
+
+           Filled in by :meth:`on.ontonotes.iter_documents`: a hash from
+           bank extension (``sense``, ``prop``, ...) to that bank's
+           document for this one.  Empty otherwise.
+
     Methods:
 
         .. automethod:: align_to
@@ -3842,7 +4342,7 @@ class tree_document:
     def __init__(self, document_id, parse_list,
                  sentence_id_list, headline_flag_list, paragraph_id_list,
                  absolute_file_path, a_treebank, subcorpus_id, a_cursor=None,
-                 extension="parse"):
+                 extension="parse", parse_engine="regex", tree_builder=None):
 
         self.language = subcorpus_id.split("@")[-2]
 
@@ -3863,6 +4363,8 @@ class tree_document:
         self.original = None   # these two hold references to other tree documents
         self.translations = []
 
+        self.annotation_documents = {}
+
         version = self.treebank_id.split("@")[0]
 
         if(a_cursor == None):
@@ -4094,30 +4596,34 @@ class tree_document:
 
                 try:
 
-                    #print i, parse_list[i]
-                    a_tree = tree.from_string(parse_list[i], id=tree_id, document_tag=self.tag)
+                    if tree_builder is not None:
+                        # from a compiled treebank, whose trees were checked when it was compiled
+                        a_tree = tree_builder(i, self.tag)
+                    else:
+                        #print i, parse_list[i]
+                        a_tree = tree.from_string(parse_list[i], id=tree_id, document_tag=self.tag, engine=parse_engine)
 
-                    def strip_traces(s):
-                        x=re.sub("\*-\d+$", "*", s)
-                        return re.sub("\*-\d+ ", "* ", x)
+                        def strip_traces(s):
+                            x=re.sub("\*-\d+$", "*", s)
+                            return re.sub("\*-\d+ ", "* ", x)
 
-                    # we need to compare versions that don't have the
-                    # trace numbers because an intentional change is
-                    # to move the trace numbers.
-                    try:
-                        a_sentence_from_leaves = strip_traces(" ".join(a_leaf.word for a_leaf in a_tree))
-                    except Exception:
-                        print(parse_list[i])
-                        raise
+                        # we need to compare versions that don't have the
+                        # trace numbers because an intentional change is
+                        # to move the trace numbers.
+                        try:
+                            a_sentence_from_leaves = strip_traces(" ".join(a_leaf.word for a_leaf in a_tree))
+                        except Exception:
+                            print(parse_list[i])
+                            raise
 
-                    a_sentence_from_flat_parse = strip_traces(on.common.util.parse2word(parse_list[i]))
+                        a_sentence_from_flat_parse = strip_traces(on.common.util.parse2word(parse_list[i]))
 
-                    if(a_sentence_from_leaves != a_sentence_from_flat_parse):
+                        if(a_sentence_from_leaves != a_sentence_from_flat_parse):
 
-                        problem_flag = True
-                        on.common.log.status("\n", parse_list[i], "\n",
-                                             a_sentence_from_leaves, "\n",
-                                             a_sentence_from_flat_parse, "\n")
+                            problem_flag = True
+                            on.common.log.status("\n", parse_list[i], "\n",
+                                                 a_sentence_from_leaves, "\n",
+                                                 a_sentence_from_flat_parse, "\n")
 
                     a_tree.document_id = self.document_id
                     a_tree.id = tree_id
@@ -4308,6 +4814,41 @@ class tree_document:
 
         return "\n".join(tr)
 
+    def conll(self):
+        """ this document in the CoNLL-2012 ``*_gold_conll`` format
+
+        Each coreference section (:attr:`tree.coref_section`) is a
+        separate part with its own ``#begin document`` line.  See
+        :meth:`tree.conll_rows` for the columns.
+
+        """
+
+        document_name = self.document_id.split("@")[0]
+
+        tr = []
+        cur_part = None
+
+        for a_tree in self:
+            part = max(int(a_tree.coref_section), 0)
+            if part != cur_part:
+                if cur_part is not None:
+                    tr.append("#end document")
+                tr.append("#begin document (%s); part %03d" % (document_name, part))
+                cur_part = part
+
+            rows = a_tree.conll_rows(document_name, part)
+            if rows:
+                widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+                for row in rows:
+                    tr.append("   ".join([row[0].ljust(widths[0])] +
+                                         [val.rjust(width) for val, width in zip(row[1:], widths[1:])]))
+            tr.append("")
+
+        if cur_part is not None:
+            tr.append("#end document")
+
+        return "\n".join(tr) + "\n"
+
 
     def __repr__(self):
         return "tree_document instance, id=%s, trees:\n%s" % (
@@ -4333,7 +4874,7 @@ class tree_document:
 
     def align_to(self, another_tree_document, map_differences=True, alignment_mode="auto",
                  junk_character=None, junk_leaf=None, smart_map_traces=True,
-                 trace_statistics_callback=None):
+                 trace_statistics_callback=None, diff_engine="diff"):
         """
 
         given another tree document, return a hash to lists of
@@ -4381,6 +4922,9 @@ class tree_document:
         and alignment will only be done with the ones for which they
         return negative.
 
+        diff_engine picks how :func:`on.common.util.diff_align` aligns
+        the sequences; see :data:`on.common.util.DIFF_ALIGN_ENGINES`.
+
         Set trace_statistics_callback to a function of three arguments
         if you want to get stats.  For example:
 
@@ -4437,7 +4981,7 @@ class tree_document:
                             add_to_seq(gv, gv_leaf, gv_leaf.trace_type)
 
                 if ga.seq and gb.seq:
-                    for ga_seq_idx, gb_seq_idx in on.common.util.diff_align(ga.seq, gb.seq, map_differences=True).iteritems():
+                    for ga_seq_idx, gb_seq_idx in on.common.util.diff_align(ga.seq, gb.seq, map_differences=True, engine=diff_engine).items():
                         ga_leaf = ga.seq_to_leaf[ga_seq_idx]
                         gb_leaf = gb.seq_to_leaf[gb_seq_idx]
 
@@ -4650,7 +5194,7 @@ class tree_document:
         leaf_in_us_2_leaf_in_them = defaultdict(list)
         leaf_in_them_2_leaf_in_us = defaultdict(list)
 
-        for a_seq_idx, b_seq_idx in on.common.util.diff_align(a.seq, b.seq, map_differences).iteritems():
+        for a_seq_idx, b_seq_idx in on.common.util.diff_align(a.seq, b.seq, map_differences, engine=diff_engine).items():
             a_leaf = a.seq_to_leaf[a_seq_idx]
             b_leaf = b.seq_to_leaf[b_seq_idx]
 
@@ -4737,11 +5281,35 @@ class treebank(abstract_bank):
 
          A hash from standard extensions (coref, name, ...) to bank instances
 
+    If ``lazy`` is set, the constructor only records which file holds
+    each document.  A document's file is read and its trees parsed
+    the first time it is asked for, with :meth:`get_document`,
+    indexing, or iteration.  If ``max_resident_documents`` is also
+    set, at most that many parsed documents are kept.  The least
+    recently used ones are dropped and parsed again if needed.
+    Enrichment attaches annotation to the trees, which a document
+    parsed again would lack, so such a treebank can't be enriched.  While
+    lazy, :attr:`tree_ids`, :attr:`tree_hash` and :attr:`num_trees`
+    only cover the documents parsed so far.
+
+    If ``compiled`` is an :class:`on.corpora.compiled.compiled_treebank`,
+    documents whose files haven't changed since it was compiled have
+    their trees built from it instead of read from their files.
+
     """
 
-    def __init__(self, a_subcorpus, tag, cursor=None, extension="parse", file_input_extension=None):
+    def __init__(self, a_subcorpus, tag, cursor=None, extension="parse", file_input_extension=None, parse_engine="regex",
+                 lazy=False, max_resident_documents=0, compiled=None):
         abstract_bank.__init__(self, a_subcorpus, tag, extension)
 
+        self.parse_engine = parse_engine # which tree.from_string engine to build trees with
+        self.compiled = compiled         # an on.corpora.compiled.compiled_treebank to build trees from instead, when current
+
+        self.lazy = lazy
+        self.max_resident_documents = max_resident_documents
+        self._lazy_file_hash = {}                   # document_id -> file, for documents not yet parsed
+        self._resident_document_ids = OrderedDict() # document ids parsed in lazy mode, least recently used first
+
         if not file_input_extension:
             file_input_extension = self.extension
 
@@ -4760,214 +5328,243 @@ class treebank(abstract_bank):
                 return
 
             for a_file in input_files:
+                if self.lazy:
+                    document_id = "%s@%s" % (a_file.document_id, a_subcorpus.id)
+                    if document_id in self._lazy_file_hash:
+                        raise Exception("Already contain " + document_id)
+                    self._lazy_file_hash[document_id] = a_file
+                    self._add_document_id(document_id)
+                    continue
 
-                document_id = "%s@%s" % (a_file.document_id, a_subcorpus.id)
+                a_tree_document = self._read_tree_document(a_file)
+                if a_tree_document is not None:
+                    self.append(a_tree_document)
 
-                filename = a_file.physical_filename
+            if self.lazy:
+                sys.stderr.write(" %s documents indexed\n" % len(self))
+            else:
+                sys.stderr.write(" %s trees in the treebank\n" % self.num_trees)
+        else:
+            pass
 
-                sys.stderr.write(".")
-                on.common.log.debug("doc id: %s" % (document_id), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
 
-                file = codecs.open(filename, "r", "utf-8")
+    def _read_tree_document(self, a_file):
+        """ read and parse one .parse file, returning its :class:`tree_document`
 
-                # join lines
-                try:
-                    one_parse_string = file.read()
-                except UnicodeDecodeError:
-                    on.common.log.report("treebank", "unicode decode error in file SERIOUS", fname=filename)
-                    one_parse_string = ""
-                finally:
-                    file.close()
+        Returns None if the file turns out not to hold parses.
 
+        """
 
-                if not one_parse_string:
-                    file = codecs.open(filename, "r", "gb18030")
-                    try:
-                        one_parse_string = file.read()
-                    finally:
-                        file.close()
+        document_id = "%s@%s" % (a_file.document_id, self.subcorpus.id)
 
-                if one_parse_string.startswith("file;unicode\t"):
-                    on.common.log.status("\n *** warning -- file %s is a tdf not a parse file" % filename)
-                    continue
+        if self.compiled is not None and self.compiled.is_current(a_file):
+            return self._read_compiled_tree_document(a_file, document_id)
 
-                non_doubleparened_parse_string =  one_parse_string.replace("((","").replace("))","").replace("\n", " ")
+        filename = a_file.physical_filename
 
-                if not re.match(r".*\([A-Z]", non_doubleparened_parse_string) or ")" not in non_doubleparened_parse_string:
-                     on.common.log.status("\n *** warning -- file %s does not contain S-expressions" % filename)
-                     continue
+        sys.stderr.write(".")
+        on.common.log.debug("doc id: %s" % (document_id), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
 
-                # strip any leading, following spaces
-                one_parse_string = one_parse_string.strip()
+        file = codecs.open(filename, "r", "utf-8")
 
-                if(a_subcorpus.language_id == "ch"):
+        # join lines
+        try:
+            one_parse_string = file.read()
+        except UnicodeDecodeError:
+            on.common.log.report("treebank", "unicode decode error in file SERIOUS", fname=filename)
+            one_parse_string = ""
+        finally:
+            file.close()
 
-                    def strip_empties(s):
-                        """ remove trees that are empty in that they have the double wide EMPTY """
 
-                        lines = s.split("\n")
+        if not one_parse_string:
+            file = codecs.open(filename, "r", "gb18030")
+            try:
+                one_parse_string = file.read()
+            finally:
+                file.close()
 
-                        n_lines = []
-                        unsure = []
+        if one_parse_string.startswith("file;unicode\t"):
+            on.common.log.status("\n *** warning -- file %s is a tdf not a parse file" % filename)
+            return None
 
-                        def contains_EMPTY(s):
-                            for oc in [[ord(c) for c in t] for t in zip(s[0:], s[1:], s[2:], s[3:], s[4:])]:
-                                if oc == [65317, 65325, 65328, 65332, 65337]:
-                                    return True
-                            return False
+        non_doubleparened_parse_string =  one_parse_string.replace("((","").replace("))","").replace("\n", " ")
 
-                        for line in lines:
-                            if line.startswith("<segment "):
-                                if not unsure:
-                                    unsure.append(line)
-                                else:
-                                    raise Exception("bad parse file (segment) " + filename + "\n"
-                                                    + "unsure=" + str(unsure) + "\n"
-                                                    + "line=" + line)
-                            elif not unsure:
-                                n_lines.append(line)
-                            else:
-                                unsure.append(line)
+        if not re.match(r".*\([A-Z]", non_doubleparened_parse_string) or ")" not in non_doubleparened_parse_string:
+            on.common.log.status("\n *** warning -- file %s does not contain S-expressions" % filename)
+            return None
 
-                            if len(unsure) == 3:
-                                if not unsure[2].startswith("</segment"):
-                                    raise Exception("bad parse file (/segment) " + filename)
+        # strip any leading, following spaces
+        one_parse_string = one_parse_string.strip()
 
-                                if not contains_EMPTY(unsure[1]):
-                                    for u in unsure:
-                                        n_lines.append(u)
-                                unsure = []
+        if(self.subcorpus.language_id == "ch"):
 
-                        if unsure:
-                            raise Exception("bad parse file (/unsure) " + filename)
+            def strip_empties(s):
+                """ remove trees that are empty in that they have the double wide EMPTY """
 
-                        return "\n".join(n_lines)
+                lines = s.split("\n")
 
+                n_lines = []
+                unsure = []
+
+                def contains_EMPTY(s):
+                    for oc in [[ord(c) for c in t] for t in zip(s[0:], s[1:], s[2:], s[3:], s[4:])]:
+                        if oc == [65317, 65325, 65328, 65332, 65337]:
+                            return True
+                    return False
 
-                    if False:
-                        one_parse_string = strip_empties(one_parse_string)
+                for line in lines:
+                    if line.startswith("<segment "):
+                        if not unsure:
+                            unsure.append(line)
+                        else:
+                            raise Exception("bad parse file (segment) " + filename + "\n"
+                                            + "unsure=" + str(unsure) + "\n"
+                                            + "line=" + line)
+                    elif not unsure:
+                        n_lines.append(line)
+                    else:
+                        unsure.append(line)
 
-                    s_e_re_a = re.compile("<segment\s+id=\".*?\"\s+start=\"(.*?)\"\s+end=\"(.*?)\">", re.M|re.S)
-                    s_e_re_b = re.compile("<segment\s+id=''.*?''\s+start=''(.*?)''\s+end=''(.*?)''>", re.M|re.S)
+                    if len(unsure) == 3:
+                        if not unsure[2].startswith("</segment"):
+                            raise Exception("bad parse file (/segment) " + filename)
 
-                    self.tree_start_end_tuples_hash[a_file.document_id] = []
-                    self.tree_start_end_tuples_hash[a_file.document_id] += s_e_re_a.findall(one_parse_string)
-                    self.tree_start_end_tuples_hash[a_file.document_id] += s_e_re_b.findall(one_parse_string)
+                        if not contains_EMPTY(unsure[1]):
+                            for u in unsure:
+                                n_lines.append(u)
+                        unsure = []
 
-                dup_parse_string = "" + one_parse_string
+                if unsure:
+                    raise Exception("bad parse file (/unsure) " + filename)
 
-                # get headline information
-                headlines = on.common.util.headline_re.findall(dup_parse_string)
+                return "\n".join(n_lines)
 
-                headline_string = ""
-                if(len(headlines) > 0):
-                    # assuming that there can only be one headline
-                    if(len(headlines) != 1):
-                        raise Exception("we are assuming that there is only one headline in the document")
 
-                    headline_string = headlines[0]
+            if False:
+                one_parse_string = strip_empties(one_parse_string)
 
+            s_e_re_a = re.compile("<segment\s+id=\".*?\"\s+start=\"(.*?)\"\s+end=\"(.*?)\">", re.M|re.S)
+            s_e_re_b = re.compile("<segment\s+id=''.*?''\s+start=''(.*?)''\s+end=''(.*?)''>", re.M|re.S)
 
-                headline_sentence_id_hash = {}
-                for item in on.common.util.sentence_id_para_re.findall(headline_string):
-                    headline_sentence_id_hash[item[2]] = 0
+            self.tree_start_end_tuples_hash[a_file.document_id] = []
+            self.tree_start_end_tuples_hash[a_file.document_id] += s_e_re_a.findall(one_parse_string)
+            self.tree_start_end_tuples_hash[a_file.document_id] += s_e_re_b.findall(one_parse_string)
 
-                on.common.log.debug(headline_sentence_id_hash, on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+        dup_parse_string = "" + one_parse_string
 
-                # initialize the date
-                a_date = None
-                a_list = on.common.util.date_re.findall(dup_parse_string)
-                if(len(a_list) > 0):
-                    a_date = a_list[0]
-                    on.common.log.debug(a_date, on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+        # get headline information
+        headlines = on.common.util.headline_re.findall(dup_parse_string)
 
-                # initialize the doc_no
-                a_doc_no = None
-                a_list = on.common.util.doc_id_re.findall(dup_parse_string)
-                if(len(a_list) > 0):
-                    a_doc_no = a_list[0]
-                    on.common.log.debug(a_doc_no, on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+        headline_string = ""
+        if(len(headlines) > 0):
+            # assuming that there can only be one headline
+            if(len(headlines) != 1):
+                raise Exception("we are assuming that there is only one headline in the document")
 
+            headline_string = headlines[0]
 
-                sentence_id_list = []
-                paragraph_id_list = []
-                headline_flag_list = [] # value of 1 if a headline else 0
-                paragraph_index = -1  # outside paragraphs
-                for item in on.common.util.sentence_id_para_re.findall(dup_parse_string):
-                    if(item[0] == "S"):
-                        on.common.log.debug("adding S", on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
-                        sentence_id_list.append(item[2])
-                        paragraph_id_list.append(paragraph_index)  # sentence is outside a paragraph
-                        if(headline_sentence_id_hash.has_key(item[2])):
-                            headline_flag_list.append(1)
-                        else:
-                            headline_flag_list.append(0)
 
-                    if(item[0] == "P"):
-                        on.common.log.debug("adding P", on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
-                        paragraph_index = paragraph_index + 1
+        headline_sentence_id_hash = {}
+        for item in on.common.util.sentence_id_para_re.findall(headline_string):
+            headline_sentence_id_hash[item[2]] = 0
 
+        on.common.log.debug(headline_sentence_id_hash, on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
 
-                on.common.log.debug("%d: %s" % (len(sentence_id_list), str(sentence_id_list)), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
-                on.common.log.debug("%d: %s" % (len(paragraph_id_list), str(paragraph_id_list)), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
-                on.common.log.debug("%d: %s" % (len(headline_flag_list), str(headline_flag_list)), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+        # initialize the date
+        a_date = None
+        a_list = on.common.util.date_re.findall(dup_parse_string)
+        if(len(a_list) > 0):
+            a_date = a_list[0]
+            on.common.log.debug(a_date, on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
 
+        # initialize the doc_no
+        a_doc_no = None
+        a_list = on.common.util.doc_id_re.findall(dup_parse_string)
+        if(len(a_list) > 0):
+            a_doc_no = a_list[0]
+            on.common.log.debug(a_doc_no, on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
 
-                one_parse_substrings = []
-                for a_line in one_parse_string.split("\n"):
-                    if not a_line.startswith(";"):
-                        one_parse_substrings.append(a_line)
-                one_parse_string = "\n".join(one_parse_substrings)
 
+        sentence_id_list = []
+        paragraph_id_list = []
+        headline_flag_list = [] # value of 1 if a headline else 0
+        paragraph_index = -1  # outside paragraphs
+        for item in on.common.util.sentence_id_para_re.findall(dup_parse_string):
+            if(item[0] == "S"):
+                on.common.log.debug("adding S", on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+                sentence_id_list.append(item[2])
+                paragraph_id_list.append(paragraph_index)  # sentence is outside a paragraph
+                if(headline_sentence_id_hash.has_key(item[2])):
+                    headline_flag_list.append(1)
+                else:
+                    headline_flag_list.append(0)
+
+            if(item[0] == "P"):
+                on.common.log.debug("adding P", on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+                paragraph_index = paragraph_index + 1
+
+
+        on.common.log.debug("%d: %s" % (len(sentence_id_list), str(sentence_id_list)), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+        on.common.log.debug("%d: %s" % (len(paragraph_id_list), str(paragraph_id_list)), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+        on.common.log.debug("%d: %s" % (len(headline_flag_list), str(headline_flag_list)), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
 
-                #----- ONLY THE CHINESE FILES HAVE SGML TAGS IN THEM. DOING THIS FOR THE ENGLISH TEXT CAN DELETE LEGITIMATE TEXT -----#
-                one_parse_string_with_sgml = None
-                if(a_subcorpus.language_id == "ch"):
-                    # now strip the parse_string of any sgml tags
-                    one_parse_string = on.common.util.doc_id_re.sub("", one_parse_string)
-                    one_parse_string = on.common.util.date_re.sub("", one_parse_string)
 
-                    one_parse_string_with_sgml = one_parse_string
-                    one_parse_string = on.common.util.sgml_tag_re.sub("", one_parse_string)
+        one_parse_substrings = []
+        for a_line in one_parse_string.split("\n"):
+            if not a_line.startswith(";"):
+                one_parse_substrings.append(a_line)
+        one_parse_string = "\n".join(one_parse_substrings)
 
 
-                one_parse_string = re.sub("\n+", "\n", one_parse_string)
-                one_parse_string = one_parse_string.strip()
-                on.common.log.debug("'%s'" % (one_parse_string), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
+        #----- ONLY THE CHINESE FILES HAVE SGML TAGS IN THEM. DOING THIS FOR THE ENGLISH TEXT CAN DELETE LEGITIMATE TEXT -----#
+        one_parse_string_with_sgml = None
+        if(self.subcorpus.language_id == "ch"):
+            # now strip the parse_string of any sgml tags
+            one_parse_string = on.common.util.doc_id_re.sub("", one_parse_string)
+            one_parse_string = on.common.util.date_re.sub("", one_parse_string)
 
-                # list of parses
-                parse_list = one_parse_string.split("\n(")
+            one_parse_string_with_sgml = one_parse_string
+            one_parse_string = on.common.util.sgml_tag_re.sub("", one_parse_string)
 
-                # reintroduce the ( in the 1 to nth parses (excluding the 0th)
-                k=0
-                for k in range(1, len(parse_list)):
-                    parse_list[k] = "(" + parse_list[k]
 
-                l=0
-                for l in range(0, len(parse_list)):
-                    parse_list[l] = on.common.util.compress_space(parse_list[l]).strip()
-                    parse_list[l] = on.common.util.tighten_curly_braces(parse_list[l]).strip()
-                    parse_list[l] = re.sub(r"^\( ", "(TOP ", parse_list[l]).strip()
-                    parse_list[l] = re.sub(r"^\(\(", "(TOP (", parse_list[l]).strip()
+        one_parse_string = re.sub("\n+", "\n", one_parse_string)
+        one_parse_string = one_parse_string.strip()
+        on.common.log.debug("'%s'" % (one_parse_string), on.common.log.DEBUG, on.common.log.MAX_VERBOSITY)
 
+        # list of parses
+        parse_list = one_parse_string.split("\n(")
 
-                # now fill the hash
-                m=0
-                for m in range(0, len(parse_list)):
-                    key = "%s@%s" % (m, document_id)
-                    self.tree_ids.append(key)
+        # reintroduce the ( in the 1 to nth parses (excluding the 0th)
+        k=0
+        for k in range(1, len(parse_list)):
+            parse_list[k] = "(" + parse_list[k]
 
-                    self.tree_hash[key] = parse_list[m]
+        l=0
+        for l in range(0, len(parse_list)):
+            parse_list[l] = on.common.util.compress_space(parse_list[l]).strip()
+            parse_list[l] = on.common.util.tighten_curly_braces(parse_list[l]).strip()
+            parse_list[l] = re.sub(r"^\( ", "(TOP ", parse_list[l]).strip()
+            parse_list[l] = re.sub(r"^\(\(", "(TOP (", parse_list[l]).strip()
 
-                    self.num_trees = self.num_trees + 1
 
+        # now fill the hash
+        m=0
+        for m in range(0, len(parse_list)):
+            key = "%s@%s" % (m, document_id)
+            if key not in self.tree_hash: # documents dropped in lazy mode are read again
+                self.tree_ids.append(key)
+                self.num_trees = self.num_trees + 1
 
-                if (a_subcorpus.language_id == "ch" and
-                    self.tree_start_end_tuples_hash.has_key(a_file.document_id) and
-                    self.tree_start_end_tuples_hash[a_file.document_id] and
-                    len(self.tree_start_end_tuples_hash[a_file.document_id]) != len(parse_list)):
+            self.tree_hash[key] = parse_list[m]
 
-                    raise Exception("""
+
+        if (self.subcorpus.language_id == "ch" and
+            self.tree_start_end_tuples_hash.has_key(a_file.document_id) and
+            self.tree_start_end_tuples_hash[a_file.document_id] and
+            len(self.tree_start_end_tuples_hash[a_file.document_id]) != len(parse_list)):
+
+            raise Exception("""
 there is something wrong in the assumptions of timings for chinese parses, please check
 whether there are more than one parses per timing range, and correct accordingly:
 
@@ -4975,15 +5572,33 @@ whether there are more than one parses per timing range, and correct accordingly
          number of parses: %s
     """ % (len(self.tree_start_end_tuples_hash[a_file.document_id]), len(parse_list)))
 
-                # create a tree_document object out of the list of parses for this tree_document
-                a_tree_document = tree_document(document_id, parse_list, sentence_id_list, headline_flag_list,
-                                                paragraph_id_list, filename, self, self.subcorpus.id, extension=self.extension)
-                self.append(a_tree_document)
+        # create a tree_document object out of the list of parses for this tree_document
+        a_tree_document = tree_document(document_id, parse_list, sentence_id_list, headline_flag_list,
+                                        paragraph_id_list, filename, self, self.subcorpus.id, extension=self.extension,
+                                        parse_engine=self.parse_engine)
+        return a_tree_document
 
-            sys.stderr.write(" %s trees in the treebank\n" % self.num_trees)
-        else:
-            pass
+    def _read_compiled_tree_document(self, a_file, document_id):
+        """ build the :class:`tree_document` for a_file from :attr:`compiled` without reading or parsing a_file """
 
+        fields = self.compiled.tree_document_fields(a_file.document_id)
+
+        if fields.timings:
+            self.tree_start_end_tuples_hash[a_file.document_id] = fields.timings
+
+        for m, a_parse in enumerate(fields.parse_strings):
+            key = "%s@%s" % (m, document_id)
+            if key not in self.tree_hash:
+                self.tree_ids.append(key)
+                self.num_trees = self.num_trees + 1
+            self.tree_hash[key] = a_parse
+
+        def tree_builder(i, document_tag):
+            return self.compiled.build_tree(fields.first_tree + i, document_tag)
+
+        return tree_document(document_id, fields.parse_strings, fields.sentence_id_list, fields.headline_flag_list,
+                             fields.paragraph_id_list, fields.filename, self, self.subcorpus.id, extension=self.extension,
+                             parse_engine=self.parse_engine, tree_builder=tree_builder)
 
     def write_timing_file(self):
         for a_document_id in self.tree_start_end_tuples_hash:
@@ -4993,11 +5608,73 @@ whether there are more than one parses per timing range, and correct accordingly
             a_timings_file.close()
 
 
+    def _materialize(self, document_id):
+        """ return the tree document for document_id, parsing it first if lazy and needed """
+
+        if document_id in self._document_hash:
+            if document_id in self._resident_document_ids:
+                self._resident_document_ids.move_to_end(document_id)
+            return self._document_hash[document_id]
+
+        if not self.lazy or document_id not in self._lazy_file_hash:
+            raise KeyError(document_id)
+
+        a_tree_document = self._read_tree_document(self._lazy_file_hash[document_id])
+        if a_tree_document is None:
+            del self._lazy_file_hash[document_id]
+            self._remove_document_id(document_id)
+            raise KeyError(document_id)
+
+        self._document_hash[document_id] = a_tree_document
+        self._resident_document_ids[document_id] = True
+
+        if self.max_resident_documents:
+            while len(self._resident_document_ids) > self.max_resident_documents:
+                evicted_document_id, ignored = self._resident_document_ids.popitem(last=False)
+                del self._document_hash[evicted_document_id]
+
+        return a_tree_document
+
+    def get_document(self, a_document_id_or_instance):
+        if not self.lazy:
+            return abstract_bank.get_document(self, a_document_id_or_instance)
+
+        if hasattr(a_document_id_or_instance, "document_id"):
+            a_document_id_or_instance = a_document_id_or_instance.document_id
+        return self._materialize(a_document_id_or_instance)
+
+    def __getitem__(self, index):
+        if not self.lazy:
+            return abstract_bank.__getitem__(self, index)
+
+        while True:
+            document_id = self._document_id_list[index]
+            try:
+                return self._materialize(document_id)
+            except KeyError:
+                if document_id in self._document_id_set:
+                    raise
+                # the file didn't hold parses and was dropped; index now refers to the next document
+
+    def __delitem__(self, index):
+        if not self.lazy:
+            return abstract_bank.__delitem__(self, index)
+
+        document_id = self._document_id_list[index]
+        self._document_hash.pop(document_id, None)
+        self._lazy_file_hash.pop(document_id, None)
+        self._resident_document_ids.pop(document_id, None)
+        del self._document_ids[index]
+        self._document_id_set.discard(document_id)
+
     def inform_enriched(self, a_bank):
         """ record that we've been enriched with this bank
         """
 
         potential_bank = a_bank.extension.split("_")[-1]
+        if self.max_resident_documents:
+            raise Exception("Treebank %s drops documents beyond max_resident_documents, so can't be enriched with %s" % (
+                self.id, a_bank.extension))
         if potential_bank in self.banks:
             raise Exception("Treebank %s already has attribute %s" % (self.id, potential_bank))
         self.banks[potential_bank] = a_bank
@@ -5023,8 +5700,12 @@ whether there are more than one parses per timing range, and correct accordingly
         raise Exception("treebank.copy_to_different_trees not supported")
 
     def copy_banks_from(self, from_treebank, banks=None, map_differences=True, trace_statistics_callback=None,
-                        ignore_errors=False, alignment_mode="auto"):
-        """ copy from_treebank.banks to this treebank, dealing with parsing differences """
+                        ignore_errors=False, alignment_mode="auto", diff_engine="diff"):
+        """ copy from_treebank.banks to this treebank, dealing with parsing differences
+
+        diff_engine is passed to :meth:`tree_document.align_to`.
+
+        """
 
         if banks == None:
             banks = from_treebank.banks.keys()
@@ -5088,7 +5769,8 @@ whether there are more than one parses per timing range, and correct accordingly
 
             from_to = from_tree_document.align_to(to_tree_document, map_differences,
                                                   trace_statistics_callback=trace_statistics_callback,
-                                                  alignment_mode=alignment_mode,junk_leaf=junk_leaf)
+                                                  alignment_mode=alignment_mode,junk_leaf=junk_leaf,
+                                                  diff_engine=diff_engine)
             to_from = defaultdict(list)
 
             try:
@@ -5183,6 +5865,10 @@ whether there are more than one parses per timing range, and correct accordingly
                 assert to_bank is existant_to_bank
 
     sql_table_name = "treebank"
+    sql_document_rows = [("lemma", "document_id = %(document_id)s"),
+                         ("syntactic_link", "reference_subtree_id in (select id from tree where document_id = %(document_id)s)"),
+                         ("compound_function_tag", "id in (select function_tag_id from tree where document_id = %(document_id)s)"),
+                         ("tree", "document_id = %(document_id)s")]
 
     sql_create_statement = \
 """
@@ -5212,39 +5898,48 @@ insert into treebank
 
 
     @classmethod
-    def from_db(cls, a_subcorpus, a_tag, a_cursor, affixes=None):
+    def from_db(cls, a_subcorpus, a_tag, a_cursor, affixes=None, parse_engine="regex"):
         sys.stderr.write("reading the treebank ...")
         a_cursor.execute("""select * from treebank where subcorpus_id = '%s';""" % (a_subcorpus.id))
 
-        a_treebank = treebank(a_subcorpus, a_tag, a_cursor)
+        a_treebank = treebank(a_subcorpus, a_tag, a_cursor, parse_engine=parse_engine)
 
         # now get document ids for this treebank
         a_cursor.execute("""select document.id from document where subcorpus_id = '%s';""" % (a_subcorpus.id))
-        document_rows = a_cursor.fetchall()
 
-        # and process each document
-        for document_row in document_rows:
-            a_document_id = document_row["id"]
+        tree_rows_by_document_id = {}
+        for document_row in a_cursor.fetchall():
+            if on.common.util.matches_an_affix(document_row["id"], affixes):
+                tree_rows_by_document_id[document_row["id"]] = []
 
-            if not on.common.util.matches_an_affix(a_document_id, affixes):
-                continue
+        # then all their root trees at once
+        with on.common.util.streaming_cursor(a_cursor) as a_streaming_cursor:
+            a_streaming_cursor.execute("""select tree.id, tree.document_id, tree.parse, tree.coref_section
+                                          from tree join document on tree.document_id = document.id
+                                          where document.subcorpus_id = '%s' and tree.parent_id is null;""" % (a_subcorpus.id))
+
+            for tree_row in a_streaming_cursor:
+                if tree_row["document_id"] in tree_rows_by_document_id:
+                    tree_rows_by_document_id[tree_row["document_id"]].append(tree_row)
 
+        # and all their lemmas
+        lemma_rows_by_leaf_id = cls.rows_from_db(a_subcorpus, a_cursor, "lemma", key="leaf_id") if tree_rows_by_document_id else {}
+
+        # and process each document
+        for a_document_id in sorted(tree_rows_by_document_id):
             sys.stderr.write(".")
 
             # create an empty tree_document
             a_tree_document = tree_document(a_document_id, [], [], [], [], [], a_treebank, a_subcorpus.id,
                                             a_cursor, extension=a_treebank.extension)
 
+            # tree ids are sentence_index@document_id
+            tree_rows = sorted(tree_rows_by_document_id[a_document_id],
+                               key=lambda tree_row: int(tree_row["id"].split("@", 1)[0]))
 
-
-            # now get the sentences in this document
-            a_cursor.execute("""select tree.id from tree where document_id = '%s'""" % (a_document_id))
-            tree_rows = a_cursor.fetchall()
-
-            a_parse_list = []
             for tree_row in tree_rows:
-                sentence_id = tree_row["id"]
-                a_tree = on.corpora.tree.tree.from_db_fast(sentence_id, a_cursor)
+                a_tree = tree.from_string(tree_row["parse"], id=tree_row["id"], engine=parse_engine)
+                a_tree.coref_section = tree_row["coref_section"]
                 a_tree.document_id = a_document_id
 
                 # process the tree object.  this has to be here fore legacy reasons
@@ -5275,7 +5970,10 @@ insert into treebank
                 a_tree_document.tree_ids.append(a_tree_id)
                 a_tree_document.tree_hash[a_tree_id] = a_tree
 
-                a_tree.load_lemmas_from_db(a_cursor)
+                for a_leaf in a_tree:
+                    a_leaf.lemma_object = lemma.from_db_rows(lemma_rows_by_leaf_id.get(a_leaf.id))
+                    if a_leaf.lemma_object:
+                        a_leaf.lemma = a_leaf.lemma_object.lemma
 
 
             # now add the tree document to the treebank
@@ -5297,6 +5995,29 @@ insert into treebank
                 on.common.log.status("error writing ONF for", a_tree_document.document_id)
                 raise
 
+    def dump_conll(self, out_dir="", extension="v4_gold_conll", workers=1):
+        """ write each document in CoNLL-2012 format, see :meth:`tree_document.conll`
+
+        The treebank should already be enriched with whichever of the
+        sense, prop, name, coref and speaker banks are wanted in the
+        output.  With ``workers`` more than one, documents are
+        formatted and written by that many forked processes.
+
+        """
+
+        if workers <= 1:
+            for a_tree_document in self:
+                _write_conll_document(a_tree_document, out_dir, extension)
+            return
+
+        a_pool = multiprocessing.get_context("fork").Pool(workers, _conll_writer_init, (self, out_dir, extension))
+        try:
+            for document_id in a_pool.imap_unordered(_conll_writer_write, range(len(self))):
+                sys.stderr.write(".")
+            sys.stderr.write("\n")
+        finally:
+            a_pool.terminate()
+
     @staticmethod
     def build_root_to_root(alignment_hash):
         """ turn a leaf to leaf mapping like you get from tree_document.align_to into a root to root mapping """
@@ -5357,3 +6078,25 @@ insert into treebank
 
         return None # even trying other leaves we couldn't find a match
 
+
+
+#---- writing CoNLL files, for treebank.dump_conll ----#
+
+def _write_conll_document(a_tree_document, out_dir, extension):
+    try:
+        with codecs.open(on.common.util.output_file_name(a_tree_document.document_id, extension, out_dir), "w", "utf-8") as f:
+            f.write(a_tree_document.conll())
+    except Exception:
+        on.common.log.status("error writing CoNLL for", a_tree_document.document_id)
+        raise
+    return a_tree_document.document_id
+
+_conll_writer_args = None
+
+def _conll_writer_init(a_treebank, out_dir, extension):
+    global _conll_writer_args
+    _conll_writer_args = a_treebank, out_dir, extension
+
+def _conll_writer_write(document_index):
+    a_treebank, out_dir, extension = _conll_writer_args
+    return _write_conll_document(a_treebank[document_index], out_dir, extension)
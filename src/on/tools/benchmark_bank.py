@@ -0,0 +1,76 @@
+"""
+:mod:`benchmark_bank` -- time document bookkeeping in banks
+-----------------------------------------------------------------
+
+Build a synthetic :class:`on.corpora.abstract_bank` of many documents
+(50,000 by default), appended in shuffled order, then time membership
+tests, lookups by id, in order iteration and deletion:
+
+.. code-block:: bash
+
+  $ python benchmark_bank.py --documents 50000
+
+"""
+
+import random
+import on
+import on.common
+import on.common.util
+import on.corpora
+from on.common.util import bunch
+
+from optparse import OptionParser
+
+def benchmark(num_documents, seed):
+    a_subcorpus = bunch(id="synthetic@en@on")
+    document_ids = ["nw/synthetic/%02d/synthetic_%06d@synthetic@en@on" % (i % 100, i) for i in range(num_documents)]
+    random.Random(seed).shuffle(document_ids)
+
+    a_bank = on.corpora.abstract_bank(a_subcorpus, "gold", "synthetic")
+
+    a_timer = on.common.util.timer("append %s documents" % num_documents)
+    a_timer.start()
+    for document_id in document_ids:
+        a_bank.append(bunch(document_id=document_id))
+    a_timer.stop()
+    a_timer.end()
+
+    a_timer = on.common.util.timer("membership test and get_document for each document")
+    a_timer.start()
+    for document_id in document_ids:
+        assert document_id in a_bank
+        a_bank.get_document(document_id)
+    a_timer.stop()
+    a_timer.end()
+
+    a_timer = on.common.util.timer("iterate in order")
+    a_timer.start()
+    previous_id = None
+    for a_document in a_bank:
+        assert previous_id is None or previous_id < a_document.document_id
+        previous_id = a_document.document_id
+    a_timer.stop()
+    a_timer.end()
+
+    a_timer = on.common.util.timer("index and delete 1000 documents")
+    a_timer.start()
+    for document_id in document_ids[:1000]:
+        a_bank.delete_document(document_id)
+    a_timer.stop()
+    a_timer.end()
+
+    assert len(a_bank) == num_documents - min(1000, num_documents)
+
+if __name__ == "__main__":
+    parser = OptionParser(usage="usage: %prog [options]")
+    parser.add_option("-n", "--documents", type="int", default=50000,
+                      help="how many documents to put in the bank")
+    parser.add_option("-s", "--seed", type="int", default=0,
+                      help="seed for shuffling the order documents are appended in")
+
+    options, args = parser.parse_args()
+
+    if args:
+        parser.error("expected no positional arguments")
+
+    benchmark(options.documents, options.seed)
@@ -0,0 +1,91 @@
+"""
+:mod:`benchmark_db_indexes` -- time reading from the db with and without indexes
+------------------------------------------------------------------------------
+
+Time the queries reading from the database depends on, first with
+none of the secondary indexes :meth:`on.ontonotes.initialize_db`
+makes and then with all of them, against a database already loaded
+with :mod:`on.tools.load_to_db`:
+
+.. code-block:: bash
+
+  $ python benchmark_db_indexes.py -c config.conf
+
+Two things are timed:
+
+ - for each index, looking rows up by its first column, the way
+   reading a document's annotation looks them up by document id or
+   parent id, for up to ``--lookups`` values from the table
+ - loading the banks in ``corpus.banks`` for each subcorpus, up to
+   ``--subcorpora`` of them
+
+The indexes are dropped for the first round and the ones that could
+be dropped are made again for the second.
+
+"""
+
+import on
+import on.common
+import on.common.util
+
+from optparse import OptionParser
+
+def time_lookups(a_cursor, indexes, num_lookups):
+    for table_name, index_name, index_columns in indexes:
+        column = index_columns.split(",")[0].strip()
+
+        a_cursor.execute("""select distinct %s from %s where %s is not null limit %s""" % (column, table_name, column, num_lookups))
+        values = [row[column] for row in a_cursor.fetchall()]
+        if not values:
+            continue
+
+        a_timer = on.common.util.timer("look up %s rows by %s" % (table_name, column))
+        for value in values:
+            a_timer.start()
+            a_cursor.execute("""select * from %s where %s = %%s""" % (table_name, column), (value,))
+            a_cursor.fetchall()
+            a_timer.stop()
+        a_timer.end()
+
+def time_loads(a_ontonotes, num_subcorpora):
+    a_timer = on.common.util.timer("load the banks of a subcorpus")
+    for a_subcorpus_id in a_ontonotes.subcorpus_id_list[:num_subcorpora]:
+        a_timer.start()
+        a_ontonotes.get_subcorpus(a_subcorpus_id, banks_loaded=True, use_cache=False)
+        a_timer.stop()
+    if a_timer.list_of_deltas:
+        a_timer.end()
+
+def benchmark(config, num_lookups, num_subcorpora):
+    a_ontonotes = on.ontonotes(config, data_source="db")
+    a_cursor = a_ontonotes.db_cursor(config)
+    indexes = a_ontonotes.db_indexes()
+
+    dropped_indexes = a_ontonotes.drop_db_indexes(a_cursor)
+    try:
+        print("---- without indexes ----")
+        time_lookups(a_cursor, indexes, num_lookups)
+        time_loads(a_ontonotes, num_subcorpora)
+    finally:
+        a_ontonotes.create_db_indexes(a_cursor, dropped_indexes)
+
+    print("---- with indexes ----")
+    time_lookups(a_cursor, indexes, num_lookups)
+    time_loads(a_ontonotes, num_subcorpora)
+
+if __name__ == "__main__":
+    parser = OptionParser(usage="usage: %prog -c config.conf [options]")
+    parser.add_option("-c", "--config", help="config file with a db section and corpus.banks")
+    parser.add_option("-n", "--lookups", type="int", default=100,
+                      help="how many values to look rows up by for each index")
+    parser.add_option("-s", "--subcorpora", type="int", default=10,
+                      help="how many subcorpora to load")
+
+    options, args = parser.parse_args()
+
+    if args:
+        parser.error("expected no positional arguments")
+    if not options.config:
+        parser.error("a config file is required")
+
+    benchmark(on.common.util.load_config(options.config), options.lookups, options.subcorpora)
@@ -0,0 +1,73 @@
+"""
+:mod:`benchmark_diff_align` -- compare the diff_align engines
+-----------------------------------------------------------------
+
+Re-align whole treebanks with each engine
+:func:`on.common.util.diff_align` supports and report how long each
+took.  Every tree document of the ``from`` treebank is aligned to the
+matching document of the ``to`` treebank with
+:meth:`on.corpora.tree.tree_document.align_to`, the same job
+:meth:`on.corpora.tree.treebank.copy_banks_from` does.
+
+Usage: python benchmark_diff_align.py -c config_file
+
+with, for example, ``corpus.banks=parse auto_parse`` and:
+
+.. code-block:: ini
+
+  [BenchmarkDiffAlign]
+  from: parse
+  to: auto_parse
+  engines: diff myers
+
+"""
+
+import on
+import on.common
+import on.common.util
+from on.common.util import register_config
+
+@register_config("BenchmarkDiffAlign", "from", doc="extension of the treebank to align from; defaults to parse")
+@register_config("BenchmarkDiffAlign", "to", doc="extension of the treebank to align to; defaults to parse")
+@register_config("BenchmarkDiffAlign", "engines", allow_multiple=True,
+                 allowed_values=on.common.util.DIFF_ALIGN_ENGINES,
+                 doc="which engines to time; defaults to all of them")
+def start():
+    config = on.common.util.load_options(positional_args=False)
+
+    def option(key, default):
+        if config.has_option("BenchmarkDiffAlign", key):
+            return config["BenchmarkDiffAlign", key]
+        return default
+
+    from_extension = option("from", "parse")
+    to_extension = option("to", "parse")
+    engines = option("engines", " ".join(on.common.util.DIFF_ALIGN_ENGINES)).split()
+
+    timers = dict((engine, on.common.util.timer("diff_align engine %s, %s -> %s" % (engine, from_extension, to_extension)))
+                  for engine in engines)
+
+    a_ontonotes = on.ontonotes(config)
+
+    for a_subcorpus in a_ontonotes:
+        print("Aligning", a_subcorpus.id)
+
+        from_treebank = a_subcorpus[from_extension]
+        to_treebank = a_subcorpus[to_extension]
+
+        for from_tree_document in from_treebank:
+            if from_tree_document not in to_treebank:
+                continue
+            to_tree_document = to_treebank.get_document(from_tree_document)
+
+            for engine in engines:
+                timers[engine].start()
+                from_tree_document.align_to(to_tree_document, diff_engine=engine)
+                timers[engine].stop()
+
+    for engine in engines:
+        if timers[engine].list_of_deltas:
+            timers[engine].end()
+
+if __name__ == "__main__":
+    start()
@@ -0,0 +1,98 @@
+"""
+:mod:`benchmark_parse` -- compare the tree parsing engines
+-----------------------------------------------------------------
+
+Time the two engines :meth:`on.corpora.tree.tree.from_string` can
+use to build trees -- the recursive ``regex`` engine and the single
+pass ``iterative`` one -- over every ``.parse`` file in a directory,
+normally a full English newswire section:
+
+.. code-block:: bash
+
+  $ python benchmark_parse.py /path/to/the/data/english/annotations/nw/wsj/00
+
+Both engines are checked to build identical trees, spans included.
+
+"""
+
+import sys
+import re
+import codecs
+import on
+import on.common
+import on.common.util
+import on.corpora.tree
+
+from optparse import OptionParser
+
+def read_parses(section_dir):
+    """ return the list of parse strings in all the .parse files of section_dir
+
+    Parses are split one per line the way :class:`on.corpora.tree.treebank` does it.
+
+    """
+
+    parse_list = []
+    for fname, full_fname in on.common.util.listdir_both(section_dir):
+        if not fname.endswith(".parse"):
+            continue
+
+        with codecs.open(full_fname, "r", "utf-8") as f:
+            one_parse_string = re.sub("\n+", "\n", f.read()).strip()
+
+        for i, a_parse in enumerate(one_parse_string.split("\n(")):
+            if i:
+                a_parse = "(" + a_parse
+            a_parse = on.common.util.compress_space(a_parse).strip()
+            a_parse = re.sub(r"^\( ", "(TOP ", a_parse).strip()
+            a_parse = re.sub(r"^\(\(", "(TOP (", a_parse).strip()
+            if a_parse:
+                parse_list.append(on.corpora.tree.tree.EMPTY_NODE_MATCHER.sub(r'', a_parse))
+
+    return parse_list
+
+def tree_signature(a_tree):
+    return (a_tree.tag, a_tree.word, a_tree.start, a_tree.end,
+            [tree_signature(a_child) for a_child in a_tree.children])
+
+def benchmark(parse_list, repeat):
+    t = on.corpora.tree.tree
+
+    engines = [("regex", lambda a_parse: t.from_string_helper(a_parse, 0)[0]),
+               ("iterative", lambda a_parse: t.from_string_iterative(a_parse))]
+
+    for a_parse in parse_list:
+        a, b = [build(a_parse) for name, build in engines]
+        if tree_signature(a) != tree_signature(b):
+            raise Exception("engines disagree on parse:\n" + a_parse)
+
+    for name, build in engines:
+        a_timer = on.common.util.timer("%s engine, %s parses" % (name, len(parse_list)))
+        for i in range(repeat):
+            a_timer.start()
+            for a_parse in parse_list:
+                build(a_parse)
+            a_timer.stop()
+        a_timer.end()
+
+if __name__ == "__main__":
+
+    positional_args = "section_dir".split()
+
+    parser = OptionParser(usage="usage: %prog [options] " + " ".join(positional_args))
+    parser.add_option("-r", "--repeat", type="int", default=3,
+                      help="how many times to parse the whole section with each engine")
+
+    options, args = parser.parse_args()
+
+    if len(args) != len(positional_args):
+        parser.error("expected %d positional arguments: %s" % ( len(positional_args), ", ".join(positional_args)))
+
+    # the regex engine recurses once per node
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+    parse_list = read_parses(args[0])
+    if not parse_list:
+        parser.error("no .parse files found in %s" % args[0])
+
+    benchmark(parse_list, options.repeat)
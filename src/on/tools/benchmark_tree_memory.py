@@ -0,0 +1,127 @@
+"""
+:mod:`benchmark_tree_memory` -- measure how much memory trees take
+-----------------------------------------------------------------
+
+Build a :class:`on.corpora.tree.tree` for every parse in the ``.parse``
+files of a directory, normally a full English newswire section, and
+report the bytes allocated per tree node:
+
+.. code-block:: bash
+
+  $ python benchmark_tree_memory.py /path/to/the/data/english/annotations/nw/wsj/00
+
+Two figures are reported: for the trees as loaded, and for the same
+trees once every annotation list of every node (names, coreference
+links, proposition nodes, translations, ...) has been allocated, which
+is what each node paid up front before these lists were allocated
+lazily.
+
+Both are measured twice, with the strings of the trees interned in
+:data:`on.corpora.tree.tree_strings` and without.  With ``--recursive``
+every ``.parse`` file under the directory is used, so for a full English
+load:
+
+.. code-block:: bash
+
+  $ python benchmark_tree_memory.py --recursive /path/to/the/data/english/annotations
+
+"""
+
+import os
+import sys
+import gc
+import tracemalloc
+import on
+import on.common
+import on.common.util
+import on.corpora.tree
+
+from optparse import OptionParser
+from on.tools.benchmark_parse import read_parses
+
+ANNOTATION_LISTS = """start_named_entity_list end_named_entity_list
+                      start_coreference_link_list end_coreference_link_list
+                      predicate_node_list argument_node_list link_node_list
+                      translations originals reference_leaves
+                      syntactic_links subtree_ids""".split()
+
+def count_nodes(tree_list):
+    num_nodes = 0
+    node_list = list(tree_list)
+    while node_list:
+        a_node = node_list.pop()
+        num_nodes += 1
+        node_list.extend(a_node.children)
+    return num_nodes
+
+def allocate_annotation_lists(tree_list):
+    node_list = list(tree_list)
+    while node_list:
+        a_node = node_list.pop()
+        for attr in ANNOTATION_LISTS:
+            a_list = getattr(a_node, attr)
+            a_list.append(None)
+            a_list.pop()
+        node_list.extend(a_node.children)
+
+def measure(parse_list):
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    tree_list = []
+    for i, a_parse in enumerate(parse_list):
+        a_tree = on.corpora.tree.tree.from_string(a_parse, id="%s@benchmark" % i)
+        a_tree.check_subtrees_fix_quotes()
+        a_tree.initialize_ids("en")
+        tree_list.append(a_tree)
+
+    gc.collect()
+    as_loaded = tracemalloc.get_traced_memory()[0] - baseline
+
+    allocate_annotation_lists(tree_list)
+
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    return len(tree_list), count_nodes(tree_list), as_loaded, allocated
+
+def benchmark(parse_list):
+    for intern in [False, True]:
+        on.corpora.tree.tree_strings.enabled = intern
+        num_trees, num_nodes, as_loaded, allocated = measure(parse_list)
+
+        print("%s trees, %s nodes, strings %s" % (num_trees, num_nodes, "interned" if intern else "not interned"))
+        print("  as loaded:                  %10d bytes, %6.1f bytes per node" % (as_loaded, float(as_loaded) / num_nodes))
+        print("  annotation lists allocated: %10d bytes, %6.1f bytes per node" % (allocated, float(allocated) / num_nodes))
+
+    print("%s distinct strings interned" % len(on.corpora.tree.tree_strings))
+
+if __name__ == "__main__":
+
+    positional_args = "section_dir".split()
+
+    parser = OptionParser(usage="usage: %prog [options] " + " ".join(positional_args))
+    parser.add_option("-R", "--recursive", action="store_true", default=False,
+                      help="use the .parse files of every directory under section_dir")
+
+    options, args = parser.parse_args()
+
+    if len(args) != len(positional_args):
+        parser.error("expected %d positional arguments: %s" % ( len(positional_args), ", ".join(positional_args)))
+
+    # building trees recurses once per node
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+    if options.recursive:
+        parse_list = []
+        for dirpath, dirnames, filenames in sorted(os.walk(args[0])):
+            parse_list.extend(read_parses(dirpath))
+    else:
+        parse_list = read_parses(args[0])
+
+    if not parse_list:
+        parser.error("no .parse files found in %s" % args[0])
+
+    benchmark(parse_list)
@@ -0,0 +1,64 @@
+"""
+Usage: python compile_treebanks.py -c compile_treebanks.conf
+
+Compile the treebanks of each subcorpus read from files into
+corpus.compiled-dir, in the format of :mod:`on.corpora.compiled`.  Every
+parse bank in corpus.banks (``parse``, ``auto_parse``, ...) is compiled.
+Later runs with the same corpus.compiled-dir build those treebanks from
+the compiled files instead of parsing them:
+
+.. code-block:: ini
+
+  [corpus]
+  data_in: /path/to/the/data
+  load: english
+  banks: parse
+  compiled-dir: /path/to/compiled
+
+"""
+
+from __future__ import with_statement
+
+import os
+import on
+import on.common
+import on.common.util
+import on.corpora.tree
+import on.corpora.compiled
+
+def compile_treebanks():
+    config = on.common.util.load_options(positional_args=False)
+
+    if not config.has_option("corpus", "compiled-dir"):
+        raise Exception("compile_treebanks: set corpus.compiled-dir to say where to put the compiled treebanks")
+    compiled_dir = config["corpus", "compiled-dir"]
+
+    def option(key, default):
+        if config.has_option("corpus", key):
+            return config["corpus", key]
+        return default
+
+    extensions = [extension.split(":")[0] for extension in option("banks", "parse").replace(",", " ").split()]
+    extensions = [extension for extension in extensions if extension.split("_")[-1] == "parse"]
+
+    if not os.path.exists(compiled_dir):
+        os.makedirs(compiled_dir)
+
+    a_ontonotes = on.ontonotes(config)
+
+    for a_subcorpus_id in a_ontonotes.subcorpus_id_list:
+        a_subcorpus = a_ontonotes.get_subcorpus(a_subcorpus_id)
+        if a_subcorpus.backed_by() != "fs":
+            print("Skipping", a_subcorpus_id, "-- only subcorpora read from files can be compiled")
+            continue
+
+        for extension in extensions:
+            tag = extension.rsplit("_", 1)[0] if "_" in extension else "gold"
+            a_treebank = on.corpora.tree.treebank(a_subcorpus, tag, file_input_extension=extension,
+                                                  parse_engine=option("parse-engine", "regex"))
+
+            on.corpora.compiled.compiled_treebank.write(
+                on.corpora.compiled.compiled_treebank.fname(compiled_dir, a_subcorpus_id, extension), a_treebank)
+
+if __name__ == "__main__":
+    compile_treebanks()
@@ -0,0 +1,49 @@
+"""
+Usage: python create_conll.py -c create_conll.conf
+
+Write every document as CoNLL-2012 ``*_gold_conll`` files under
+out.out_dir, laid out like the annotations directory they came from.
+For the full set of columns, load the enriched banks, as in:
+
+.. code-block:: ini
+
+  [corpus]
+  banks: parse sense prop name coref speaker
+
+  [out]
+  out_dir: /path/to/conll-2012
+  workers: 8
+
+"""
+
+from __future__ import with_statement
+
+import on
+import on.common
+import on.common.util
+from on.common.util import register_config
+
+@register_config("out", "out_dir", required=True, section_required=True)
+@register_config("out", "extension", doc="extension of the files written; defaults to v4_gold_conll")
+@register_config("out", "workers", doc="how many processes to write each subcorpus's documents with; defaults to 1")
+def create_conll():
+    """ Reads a configuration from config_fname to decide what documents
+    to write out in CoNLL format.
+    """
+    config = on.common.util.load_options(positional_args=False)
+
+    def option(key, default):
+        if config.has_option("out", key):
+            return config["out", key]
+        return default
+
+    a_ontonotes = on.ontonotes(config)
+
+    for a_subcorpus in a_ontonotes:
+        print("Writing", a_subcorpus.id)
+        a_subcorpus["parse"].dump_conll(out_dir=config["out", "out_dir"],
+                                        extension=option("extension", "v4_gold_conll"),
+                                        workers=int(option("workers", "1")))
+
+if __name__ == "__main__":
+    create_conll()
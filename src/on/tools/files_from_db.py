@@ -1,5 +1,8 @@
 """
 Usage: python files_from_db.py -c config_file
+
+Big reads from the db stream rows from the server unless db.streaming
+is set to false.
 """
 
 import on
@@ -9,6 +12,9 @@ import on.common.util
 @on.common.util.register_config("FilesFromDb", "out_dir", required=True, section_required=True)
 def start():
     config = on.common.util.load_options(positional_args=False)
+    if config.has_section("db") and not config.has_option("db", "streaming"):
+        config.set("db", "streaming", "true")
+
     a_ontonotes = on.ontonotes(config)
     
     a_cursor = on.ontonotes.db_cursor(config)
@@ -0,0 +1,59 @@
+"""
+Usage: python index_annotations.py -c index_annotations.conf
+
+Build or bring up to date the :class:`on.corpora.annotation_index.annotation_index`
+in Index.file with the documents selected by the corpus section, enriched
+with corpus.banks.  Only documents whose files changed since they were
+last indexed are read again.  Then print where each Index.query matches,
+if any are given:
+
+.. code-block:: ini
+
+  [corpus]
+  banks: parse sense prop name
+
+  [Index]
+  file: /path/to/annotations.index
+  query: lemma:join sense:join-v.1
+
+"""
+
+from __future__ import with_statement
+
+import on
+import on.common
+import on.common.util
+import on.corpora.annotation_index
+from on.common.util import register_config
+
+@register_config("Index", "file", required=True, section_required=True,
+                 doc="the sqlite file to keep the index in")
+@register_config("Index", "query", allow_multiple=True,
+                 doc="space separated field:value constraints that must all hold at the same leaf")
+@register_config("Index", "update", allowed_values=["true", "false"],
+                 doc="whether to update the index before querying it; defaults to true")
+def index_annotations():
+    config = on.common.util.load_options(positional_args=False)
+
+    def option(key, default):
+        if config.has_option("Index", key):
+            return config["Index", key]
+        return default
+
+    a_index = on.corpora.annotation_index.annotation_index(config["Index", "file"])
+
+    if option("update", "true") == "true":
+        a_ontonotes = on.ontonotes(config)
+        indexed, unchanged, removed = a_index.update(a_ontonotes)
+        print("Indexed %s documents, %s unchanged, %s dropped" % (indexed, unchanged, removed))
+
+    a_query = option("query", "")
+    if a_query:
+        constraints = dict(a_constraint.split(":", 1) for a_constraint in a_query.split())
+        for a_pointer in a_index.query(**constraints):
+            print("%s %s %s" % a_pointer)
+
+    a_index.close()
+
+if __name__ == "__main__":
+    index_annotations()
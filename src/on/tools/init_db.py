@@ -7,6 +7,15 @@ tables) and optionally loads the sense inventories and frame files.
 This needs to happen before data can be loaded to the database with
 the :mod:`on.tools.load_to_db` command.
 
+A database made by an older version lacks columns that loading and
+reading now use, and they refuse it.  ``--upgrade`` adds those columns
+and fills them in from the rows already there (see
+:meth:`on.ontonotes.upgrade_db` ).
+
+With ``--workers`` the sense inventories are parsed in that many
+processes at once.  With ``--backend sqlite`` the database is the
+sqlite file ``db_name`` instead of a mysql database.
+
 For usage information, run this command with no arguments:
 
 .. code-block:: bash
@@ -24,12 +33,12 @@ try:
     import MySQLdb
 except ImportError:
     on.common.log.warning("Unable to import MySQLdb.  Will not be able to write"
-                          + " or read from a database, but otherwise should be"
+                          + " or read from a mysql database, but otherwise should be"
                           + " functional.")
 
 from optparse import OptionParser
 
-def load_sense_inventories(a_cursor, frame_set_hash, lang, top_dir):
+def load_sense_inventories(a_cursor, frame_set_hash, lang, top_dir, workers=1):
 
     sb = on.corpora.sense.sense_bank
 
@@ -37,10 +46,17 @@ def load_sense_inventories(a_cursor, frame_set_hash, lang, top_dir):
         on.common.log.status("Not loading %s sense-inventories because they don't exist")
         return
 
-    sb.write_sense_inventory_hash_to_db(
-        sb.build_sense_inventory_hash(lang, top_dir + lang,
-                                      lemma_pos_hash=None,
-                                      a_frame_set_hash=frame_set_hash), a_cursor)
+    if workers > 1 and on.common.util.is_db_ref(frame_set_hash):
+        # worker processes can't share the connection; check frame
+        # references against the framesets read from it once here
+        frame_set_hash = on.corpora.proposition.proposition_bank.frame_set_ids_from_db(frame_set_hash["DB"])
+
+    with on.common.util.BufferedCursor(a_cursor, table_order=on.ontonotes.db_table_order()) as a_buffered_cursor:
+        sb.write_sense_inventory_hash_to_db(
+            sb.build_sense_inventory_hash(lang, top_dir + lang,
+                                          lemma_pos_hash=None,
+                                          a_frame_set_hash=frame_set_hash,
+                                          workers=workers), a_buffered_cursor)
 
 def load_frames(a_cursor, lang, top_dir):
     pb = on.corpora.proposition.proposition_bank
@@ -49,8 +65,9 @@ def load_frames(a_cursor, lang, top_dir):
         on.common.log.status("Not loading %s frames because they don't exist")
         return
 
-    pb.write_frame_set_hash_to_db(
-        pb.build_frame_set_hash(top_dir + lang, lang[:2]), a_cursor)
+    with on.common.util.BufferedCursor(a_cursor, table_order=on.ontonotes.db_table_order()) as a_buffered_cursor:
+        pb.write_frame_set_hash_to_db(
+            pb.build_frame_set_hash(top_dir + lang, lang[:2]), a_buffered_cursor)
 
 if __name__ == "__main__":
 
@@ -63,6 +80,13 @@ if __name__ == "__main__":
     parser.add_option("-i", "--init",
                       action="store_true", dest="init", default=False,
                       help="initialize the db before doing anything else")
+    parser.add_option("-u", "--upgrade",
+                      action="store_true", dest="upgrade", default=False,
+                      help="add the columns a db made by an older version lacks")
+    parser.add_option("-w", "--workers", type="int", default=1,
+                      help="how many processes to parse sense inventories in")
+    parser.add_option("-b", "--backend", default="mysql", choices=["mysql", "sqlite"],
+                      help="mysql (the default), or sqlite to use the file db_name; db_host and db_user are then ignored")
 
 
     options, args = parser.parse_args()
@@ -73,12 +97,15 @@ if __name__ == "__main__":
     a_cursor = on.ontonotes.get_db_cursor(
         a_db   = args[0],
         a_host = args[1],
-        a_user = args[2])
+        a_user = args[2],
+        backend = options.backend)
 
     top_dir = args[3] + "/data/"
 
     if options.init:
         on.ontonotes.initialize_db(a_cursor)
+    elif options.upgrade:
+        on.ontonotes.upgrade_db(a_cursor)
 
     a_frame_set_hash = {}
     if options.frames:
@@ -90,7 +117,7 @@ if __name__ == "__main__":
 
     if options.sense_inventories:
         for lang in options.sense_inventories.split(","):
-            load_sense_inventories(a_cursor, a_frame_set_hash, lang, top_dir)
+            load_sense_inventories(a_cursor, a_frame_set_hash, lang, top_dir, options.workers)
 
     on.ontonotes.write_type_tables_to_db(a_cursor, write_closed_type_tables=True)
 
@@ -8,21 +8,71 @@ database needs to have already been initialized and the sense
 inventories and frames need to have already been loaded.  See
 :mod:`on.tools.init_db` to see how to do that.
 
+To bring a database already loaded this way up to date with the files,
+set ``db.delta``:
+
+.. code-block:: bash
+
+  $ python load_to_db.py -c config.conf db.delta=true
+
+Each document of each bank is written with a hash of the files it was
+read from (see :class:`on.corpora.bank_document_hash`), so on a delta
+load only the documents whose files changed are deleted and written
+again.  Only the files are hashed, so after changing options that
+affect how they are read, load without ``db.delta``, into a freshly
+initialized database.
+
+To write several subcorpora at once, each over a db connection of its
+own, set ``db.writers`` to how many processes to load and write them
+in:
+
+.. code-block:: bash
+
+  $ python load_to_db.py -c config.conf db.writers=4
+
+Those processes take the place of ``corpus.workers``.  With a single
+writer, as sqlite is best loaded with, ``corpus.workers`` processes
+still load subcorpora ahead of the one being written.
+
+Each subcorpus is reported as it's written, and the type tables are
+written once, after the last one.  A subcorpus that fails to load or
+write is reported and the rest are still written, then the load exits
+with an error listing the ones that failed.
+
+For a big load, ``db.fast_load`` drops the secondary indexes before
+writing anything and makes them again at the end, which is much faster
+than updating them with every insert.  Foreign keys are not checked
+while loading.  With ``db.delta`` the indexes are kept, as finding the
+rows of changed documents needs them.  Reads from the database are slow
+until the indexes are back, and if the load is killed they need to be made again with
+:meth:`on.ontonotes.create_db_indexes` .  See
+:mod:`on.tools.benchmark_db_indexes` for what the indexes are worth.
+
 """
 
 import on
 import on.common
 import on.common.util
 
+from on.common.util import register_config
+
+@register_config("db", "delta", allowed_values=["true", "false"],
+                 doc="If true, only write the documents whose files changed since the last load.")
+@register_config("db", "writers",
+                 doc="How many processes to load and write subcorpora in, each with its own db connection.  Defaults to 1.")
+@register_config("db", "fast_load", allowed_values=["true", "false"],
+                 doc="If true, drop the secondary indexes while loading and make them again after.")
 def load_to_db():
 
     config = on.common.util.load_options(positional_args=False)
     a_ontonotes = on.ontonotes(config)
     a_cursor = a_ontonotes.db_cursor(config)
 
-    for a_subcorpus in a_ontonotes:
-        a_subcorpus.write_to_db(a_cursor)
-    a_ontonotes.write_type_tables_to_db(a_cursor)
+    delta = config.has_option("db", "delta") and on.common.util.make_bool(config["db", "delta"])
+    writers = int(config["db", "writers"]) if config.has_option("db", "writers") else 1
+    fast_load = config.has_option("db", "fast_load") and on.common.util.make_bool(config["db", "fast_load"])
+
+    a_ontonotes.write_subcorpora_to_db(a_cursor, writers=writers, delta=delta, fast_load=fast_load)
 
 if __name__ == "__main__":
     load_to_db()
@@ -0,0 +1,132 @@
+import os
+import re
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+PARSE = """\
+(TOP (S (NP-SBJ (NP (NNP Pierre) (NNP Vinken)) (, ,) (ADJP (NP (CD 61) (NNS years)) (JJ old)) (, ,)) (VP (MD will) (VP (VB join) (NP (DT the) (NN board)) (PP-CLR (IN as) (NP (DT a) (JJ nonexecutive) (NN director))) (NP-TMP (NNP Nov.) (CD 29)))) (. .)))
+
+(TOP (S (NP-SBJ (NNP Mr.) (NNP Vinken)) (VP (VBZ is) (NP-PRD (NP (NN chairman)) (PP (IN of) (NP (NP (NNP Elsevier) (NNP N.V.)) (, ,) (NP (DT the) (NNP Dutch) (VBG publishing) (NN group)))))) (. .)))
+"""
+
+PROP = """\
+%(document_id)s 0 8 gold join-v join.01 ----- 8:0-rel 0:2-ARG0 7:0-ARGM-MOD 9:1,11:1-ARG1 15:1-ARGM-TMP
+%(document_id)s 1 2 gold be-v be.01 ----- 2:0-rel 0:1-ARG1 3:1-ARG2
+"""
+
+COREF = """\
+<DOC DOCNO="%(document_path)s">
+<TEXT PARTNO="000">
+<COREF ID="8" TYPE="IDENT">Pierre Vinken</COREF> , 61 years old , will join <COREF ID="9" TYPE="IDENT">the board</COREF> as a nonexecutive director Nov. 29 .
+<COREF ID="8" TYPE="IDENT">Mr. Vinken</COREF> is chairman of <COREF ID="10" TYPE="IDENT">Elsevier N.V. , the Dutch publishing group</COREF> .
+</TEXT>
+</DOC>
+"""
+
+FRAMES = {
+    "join-v.xml": """<frameset><predicate lemma="join"><roleset id="join.01" name="attach"><roles><role n="0" descr="agent"/><role n="1" descr="thing"/><role n="2" descr="x"/></roles></roleset></predicate></frameset>""",
+    "be-v.xml": """<frameset><predicate lemma="be"><roleset id="be.01" name="copula"><roles><role n="1" descr="topic"/><role n="2" descr="comment"/></roles></roleset></predicate></frameset>""",
+}
+
+
+def write_file(fname, text):
+    if not os.path.exists(os.path.dirname(fname)):
+        os.makedirs(os.path.dirname(fname))
+    with open(fname, "w") as f:
+        f.write(text)
+
+def write_corpus(top_dir, sections=("00", "01"), documents_per_section=2):
+    """ a small english nw/wsj corpus, each document the same two sentences with parse, prop and coref files """
+
+    english_dir = os.path.join(top_dir, "data", "english")
+    for fname, text in FRAMES.items():
+        write_file(os.path.join(english_dir, "metadata", "frames", fname), text)
+
+    for section in sections:
+        for i in range(1, documents_per_section + 1):
+            document_path = "nw/wsj/%s/wsj_%s%02d" % (section, section, i)
+            fname = os.path.join(english_dir, "annotations", document_path)
+            values = {"document_path": document_path,
+                      "document_id": "%s@%s@wsj@nw@en@on" % (document_path, section)}
+            write_file(fname + ".parse", PARSE)
+            write_file(fname + ".prop", PROP % values)
+            write_file(fname + ".coref", COREF % values)
+
+def skip_unless_loaders_run(a_function, *args):
+    """ call ``a_function`` , skipping the test if it fails on code this interpreter can't run """
+
+    try:
+        return a_function(*args)
+    except AttributeError as e:
+        if re.search(r"has_key|iter(items|keys|values)", str(e)):
+            pytest.skip("the corpus loaders don't run on this python: %s" % e)
+        raise
+
+@pytest.fixture
+def corpus_config(tmp_path):
+    """ a config loading :func:`write_corpus` 's corpus a section at a time """
+
+    import on.common.util
+
+    write_corpus(str(tmp_path))
+    write_file(str(tmp_path / "test.conf"), """\
+[corpus]
+data_in: %(top_dir)s/data
+load: english-nw-wsj
+banks: parse prop coref
+granularity: section
+""" % {"top_dir": tmp_path})
+
+    return skip_unless_loaders_run(on.common.util.load_config, str(tmp_path / "test.conf"))
+
+def make_db(config, db_fname):
+    """ point ``config`` at a new sqlite db in ``db_fname`` , made with its frames as ``init_db.py --init --frames english`` does """
+
+    import on
+    import on.tools.init_db
+
+    if not config.has_section("db"):
+        config.add_section("db")
+    config.set("db", "backend", "sqlite")
+    config.set("db", "db", db_fname)
+
+    a_cursor = on.ontonotes.db_cursor(config)
+    on.ontonotes.initialize_db(a_cursor)
+    skip_unless_loaders_run(on.tools.init_db.load_frames, a_cursor, "english", config["corpus", "data_in"] + "/")
+    on.ontonotes.write_type_tables_to_db(a_cursor, write_closed_type_tables=True)
+    a_cursor.connection.commit()
+    return a_cursor
+
+def dump_db(db_fname, except_tables=()):
+    """ every table of the sqlite db in ``db_fname`` , as a dictionary from table name to its sorted rows """
+
+    a_connection = sqlite3.connect(db_fname)
+    try:
+        return dict((table_name, sorted(a_connection.execute("select * from %s" % table_name).fetchall(), key=repr))
+                    for (table_name,) in a_connection.execute("select name from sqlite_master where type = 'table'")
+                    if table_name not in except_tables)
+    finally:
+        a_connection.close()
+
+@pytest.fixture
+def db_config(corpus_config, tmp_path):
+    """ :func:`corpus_config` with an empty sqlite db to load into """
+
+    make_db(corpus_config, str(tmp_path / "test.db"))
+    return corpus_config
+
+def subcorpora(config):
+    """ the subcorpora ``config`` loads, with their banks not yet loaded """
+
+    import on
+
+    def make_subcorpora():
+        a_ontonotes = on.ontonotes(config)
+        return [a_ontonotes.get_subcorpus(a_subcorpus_id) for a_subcorpus_id in a_ontonotes.subcorpus_id_list]
+
+    return skip_unless_loaders_run(make_subcorpora)
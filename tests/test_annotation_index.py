@@ -0,0 +1,55 @@
+""" building an annotation index and reading trees back through it """
+
+import os
+
+import on.corpora
+from on.corpora.annotation_index import annotation_index
+
+from conftest import skip_unless_loaders_run
+
+
+def make_index(corpus_config, tmp_path):
+    a_ontonotes = skip_unless_loaders_run(on.ontonotes, corpus_config)
+    a_index = annotation_index(str(tmp_path / "index.db"))
+    return a_ontonotes, a_index
+
+def test_update_skips_unchanged_documents(corpus_config, tmp_path):
+    a_ontonotes, a_index = make_index(corpus_config, tmp_path)
+
+    assert a_index.update(a_ontonotes, banks="parse prop") == (4, 0, 0)
+    assert a_index.update(a_ontonotes, banks="parse prop") == (0, 4, 0)
+
+    parse_fname = str(tmp_path / "data" / "english" / "annotations" / "nw" / "wsj" / "00" / "wsj_0001.parse")
+    a_stat = os.stat(parse_fname)
+    os.utime(parse_fname, ns=(a_stat.st_atime_ns, a_stat.st_mtime_ns + 10**9))
+    assert a_index.update(a_ontonotes, banks="parse prop") == (1, 3, 0)
+
+def test_update_follows_frame_files(corpus_config, tmp_path):
+    a_ontonotes, a_index = make_index(corpus_config, tmp_path)
+    a_index.update(a_ontonotes, banks="parse prop")
+
+    frame_fname = str(tmp_path / "data" / "english" / "metadata" / "frames" / "join-v.xml")
+    a_stat = os.stat(frame_fname)
+    os.utime(frame_fname, ns=(a_stat.st_atime_ns, a_stat.st_mtime_ns + 10**9))
+    assert a_index.update(a_ontonotes, banks="parse prop") == (4, 0, 0)
+
+def test_trees_loads_each_subcorpus_once(corpus_config, tmp_path, monkeypatch):
+    a_ontonotes, a_index = make_index(corpus_config, tmp_path)
+    a_index.update(a_ontonotes, banks="parse prop")
+
+    pointers = a_index.query(frameset="join.01")
+    assert len(pointers) == 4
+
+    loaded = []
+    load_banks = on.corpora.subcorpus.load_banks
+    def counting_load_banks(self, *args, **kwargs):
+        loaded.append(sorted(a_file.document_id for a_file in self.file_hash["parse"]))
+        return load_banks(self, *args, **kwargs)
+    monkeypatch.setattr(on.corpora.subcorpus, "load_banks", counting_load_banks)
+
+    leaves = list(a_index.leaves(a_ontonotes, pointers))
+
+    assert loaded == [["nw/wsj/00/wsj_0001", "nw/wsj/00/wsj_0002"],
+                      ["nw/wsj/01/wsj_0101", "nw/wsj/01/wsj_0102"]]
+    assert [a_pointer for a_pointer, a_leaf in leaves] == pointers
+    assert set(a_leaf.word for a_pointer, a_leaf in leaves) == set(["join"])
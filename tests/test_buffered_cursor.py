@@ -0,0 +1,115 @@
+""" BufferedCursor's batching, ordering and errors, and insert_ignoring_dups through it """
+
+import sqlite3
+
+import pytest
+
+from on.common.util import BufferedCursor, SQLiteCursor, insert_ignoring_dups, sql_foreign_keys, sqlite_connect, unbuffered
+
+
+class recording_cursor(object):
+    def __init__(self):
+        self.calls = []
+
+    def executemany(self, statement, rows):
+        self.calls.append((statement, list(rows)))
+
+
+def make_cursor(tmp_path):
+    a_cursor = SQLiteCursor(sqlite_connect(str(tmp_path / "test.db")))
+    a_cursor.execute("create table parent (id varchar(255) not null collate utf8_bin primary key)")
+    a_cursor.execute("create table child (id varchar(255) not null collate utf8_bin primary key, parent_id varchar(255), foreign key (parent_id) references parent.id)")
+    return a_cursor
+
+def ids(a_cursor, table_name):
+    a_cursor.execute("select id from %s order by id" % table_name)
+    return [row["id"] for row in a_cursor.fetchall()]
+
+
+def test_rows_are_held_until_a_batch_builds_up():
+    a_cursor = recording_cursor()
+    a_buffered_cursor = BufferedCursor(a_cursor, batch_size=3)
+
+    a_buffered_cursor.executemany("insert into parent (id) values (%s)", [("a",), ("b",)])
+    assert a_cursor.calls == []
+
+    a_buffered_cursor.executemany("insert into parent (id) values (%s)", [("c",)])
+    assert a_cursor.calls == [("insert into parent (id) values (%s)", [("a",), ("b",), ("c",)])]
+
+def test_parents_go_first_in_table_order():
+    a_cursor = recording_cursor()
+    a_buffered_cursor = BufferedCursor(a_cursor, batch_size=100, table_order=["parent", "child"])
+
+    a_buffered_cursor.executemany("insert into child (id, parent_id) values (%s, %s)", [("x", "a")])
+    a_buffered_cursor.executemany("insert into parent (id) values (%s)", [("a",)])
+    a_buffered_cursor.flush()
+
+    assert [statement.split()[2] for statement, rows in a_cursor.calls] == ["parent", "child"]
+
+def test_statements_keep_their_order_across_flushes():
+    a_cursor = recording_cursor()
+    a_buffered_cursor = BufferedCursor(a_cursor, batch_size=100)
+
+    a_buffered_cursor.executemany("insert into parent (id) values (%s)", [("a",)])
+    a_buffered_cursor.executemany("insert into child (id, parent_id) values (%s, %s)", [("x", "a")])
+    a_buffered_cursor.flush()
+
+    # the child row is written before the parent row within this
+    # flush, but the parent statement was seen first and still goes first
+    a_buffered_cursor.executemany("insert into child (id, parent_id) values (%s, %s)", [("y", "b")])
+    a_buffered_cursor.executemany("insert into parent (id) values (%s)", [("b",)])
+    a_buffered_cursor.flush()
+
+    assert [(statement.split()[2], rows) for statement, rows in a_cursor.calls] == \
+        [("parent", [("a",)]), ("child", [("x", "a")]), ("parent", [("b",)]), ("child", [("y", "b")])]
+
+def test_a_refused_batch_raises_and_rolls_back(tmp_path):
+    a_cursor = make_cursor(tmp_path)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        with BufferedCursor(a_cursor) as a_buffered_cursor:
+            a_buffered_cursor.executemany("insert into parent (id) values (%s)", [("a",), ("b",), ("a",)])
+
+    assert ids(a_cursor, "parent") == []
+
+def test_a_clean_exit_commits(tmp_path):
+    a_cursor = make_cursor(tmp_path)
+
+    with BufferedCursor(a_cursor) as a_buffered_cursor:
+        a_buffered_cursor.executemany("insert into parent (id) values (%s)", [("a",), ("b",)])
+        assert ids(a_buffered_cursor, "parent") == ["a", "b"]
+
+    a_cursor.connection.rollback()
+    assert ids(a_cursor, "parent") == ["a", "b"]
+
+def test_insert_ignoring_dups_sends_held_rows_first(tmp_path):
+    a_cursor = make_cursor(tmp_path)
+
+    with BufferedCursor(a_cursor) as a_buffered_cursor:
+        a_buffered_cursor.executemany("insert into parent (id) values (%s)", [("a",)])
+        insert_ignoring_dups("insert into parent (id) values (%s)", a_buffered_cursor, "a")
+        insert_ignoring_dups("insert into parent (id) values (%s)", a_buffered_cursor, "b")
+
+    assert ids(a_cursor, "parent") == ["a", "b"]
+
+def test_unbuffered():
+    a_cursor = recording_cursor()
+    a_buffered_cursor = BufferedCursor(a_cursor)
+    a_buffered_cursor.executemany("insert into parent (id) values (%s)", [("a",)])
+
+    assert unbuffered(a_buffered_cursor) is a_cursor
+    assert a_cursor.calls == [("insert into parent (id) values (%s)", [("a",)])]
+    assert unbuffered(a_cursor) is a_cursor
+
+def test_sql_foreign_keys():
+    assert sql_foreign_keys("""
+create table lemma
+(
+  id varchar(255) not null collate utf8_bin primary key,
+  leaf_id varchar(255),
+  document_id varchar(255),
+  foreign key (leaf_id) references tree.id,
+  foreign key (document_id) references document.id
+)
+default character set utf8;
+""") == ("lemma", ["tree", "document"])
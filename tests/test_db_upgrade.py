@@ -0,0 +1,149 @@
+""" bringing a db made by an older version up to date, and refusing one that isn't """
+
+import sqlite3
+
+import pytest
+
+import on
+from on.common.util import SQLiteCursor, sqlite_connect
+
+from conftest import dump_db, skip_unless_loaders_run
+
+
+OLD_LEMMA = """
+create table lemma
+(
+  id varchar(255) not null,
+  input_string varchar(255),
+  b_transliteration varchar(255),
+  comment varchar(255),
+  lemma_index varchar(255),
+  lemma_offset varchar(255),
+  unvocalized_string varchar(255),
+  vocalized_string varchar(255),
+  vocalized_input varchar(255),
+  pos varchar(255),
+  gloss varchar(255),
+  lemma varchar(255),
+  coarse_sense varchar(16),
+  leaf_id varchar(255),
+  foreign key (leaf_id) references tree.id
+)
+default character set utf8;
+"""
+
+OLD_TOKEN = """
+create table token
+(
+  id varchar(255) not null primary key,
+  word varchar(255) not null,
+  part_of_speech varchar(255) not null
+)
+
+default character set utf8;
+"""
+
+DOCUMENT_ID = "nw/wsj/00/wsj_0001@00@wsj@nw@en@on"
+
+
+def make_cursor(tmp_path):
+    a_cursor = SQLiteCursor(sqlite_connect(str(tmp_path / "test.db")))
+    on.ontonotes.initialize_db(a_cursor)
+    return a_cursor
+
+def make_old_tables(a_cursor):
+    a_cursor.execute("drop table lemma")
+    a_cursor.execute(OLD_LEMMA)
+    a_cursor.execute("insert into lemma (id, lemma, leaf_id) values (%s, %s, %s)",
+                     ("join@8:0@0@" + DOCUMENT_ID, "join", "8:0@0@" + DOCUMENT_ID))
+    a_cursor.connection.commit()
+
+def make_tables_from_before_delta_loads(a_cursor):
+    """ make a db as it was before token.document_id and bank_document_hash """
+
+    for table_name, index_name in [("token", "token_document_id"),
+                                   ("syntactic_link", "syntactic_link_reference_subtree_id"),
+                                   ("compound_function_tag", "compound_function_tag_id")]:
+        a_cursor.execute("drop index %s on %s" % (index_name, table_name))
+    a_cursor.execute("alter table token rename to new_token")
+    a_cursor.execute(OLD_TOKEN)
+    a_cursor.execute("insert into token select id, word, part_of_speech from new_token")
+    a_cursor.execute("drop table new_token")
+    a_cursor.execute("update tree set document_id = null where parent_id is not null")
+    a_cursor.execute("drop table bank_document_hash")
+    a_cursor.connection.commit()
+
+def index_names(db_fname):
+    a_connection = sqlite3.connect(db_fname)
+    try:
+        return sorted(name for (name,) in a_connection.execute("select name from sqlite_master where type = 'index'"))
+    finally:
+        a_connection.close()
+
+def test_new_dbs_are_up_to_date(tmp_path):
+    a_cursor = make_cursor(tmp_path)
+    on.ontonotes.check_db_schema(a_cursor)
+
+def test_old_dbs_are_refused(tmp_path):
+    a_cursor = make_cursor(tmp_path)
+    make_old_tables(a_cursor)
+
+    with pytest.raises(Exception, match="no lemma.document_id.*--upgrade"):
+        on.ontonotes.check_db_schema(a_cursor)
+
+def test_upgrade_fills_in_lemma_document_ids(tmp_path):
+    a_cursor = make_cursor(tmp_path)
+    make_old_tables(a_cursor)
+
+    on.ontonotes.upgrade_db(a_cursor)
+    on.ontonotes.check_db_schema(a_cursor)
+
+    a_cursor.execute("select leaf_id, document_id from lemma")
+    assert a_cursor.fetchall() == [{"leaf_id": "8:0@0@" + DOCUMENT_ID, "document_id": DOCUMENT_ID}]
+
+    a_cursor.execute("explain query plan select * from lemma where document_id = %s", (DOCUMENT_ID,))
+    assert "lemma_document_id" in " ".join(row["detail"] for row in a_cursor.fetchall())
+
+    # and again does nothing
+    on.ontonotes.upgrade_db(a_cursor)
+    a_cursor.execute("select document_id from lemma")
+    assert a_cursor.fetchall() == [{"document_id": DOCUMENT_ID}]
+
+def test_added_columns_compare_as_in_a_new_db():
+    assert on.common.util.sqlite_statements("alter table lemma add document_id varchar(255)") == \
+        ["alter table lemma add document_id varchar(255) collate nocase"]
+
+def test_dbs_from_before_delta_loads_are_refused(tmp_path):
+    a_cursor = make_cursor(tmp_path)
+    make_tables_from_before_delta_loads(a_cursor)
+
+    with pytest.raises(Exception, match="no bank_document_hash.*--upgrade"):
+        on.ontonotes.check_db_schema(a_cursor)
+
+def test_upgraded_db_is_as_if_loaded_now(db_config):
+    db_fname = db_config["db", "db"]
+
+    def load(delta=False):
+        a_ontonotes = skip_unless_loaders_run(on.ontonotes, db_config)
+        a_ontonotes.write_subcorpora_to_db(on.ontonotes.db_cursor(db_config), delta=delta)
+
+    load()
+    loaded = dump_db(db_fname)
+    loaded_indexes = index_names(db_fname)
+
+    a_cursor = on.ontonotes.db_cursor(db_config)
+    make_tables_from_before_delta_loads(a_cursor)
+    assert dump_db(db_fname)["token"] != loaded["token"]
+    assert dump_db(db_fname)["tree"] != loaded["tree"]
+
+    on.ontonotes.upgrade_db(a_cursor)
+    upgraded = dump_db(db_fname)
+    assert index_names(db_fname) == loaded_indexes
+    for table_name in loaded:
+        if table_name != "bank_document_hash":
+            assert upgraded[table_name] == loaded[table_name], table_name
+
+    # nothing records what was loaded, so a delta load writes it all again
+    assert upgraded["bank_document_hash"] == []
+    load(delta=True)
+    assert dump_db(db_fname) == loaded
@@ -0,0 +1,42 @@
+""" loading only the documents whose files changed, with db.delta """
+
+import os
+
+import on
+
+from conftest import dump_db, make_db, skip_unless_loaders_run
+
+
+def load(config, delta=False):
+    a_ontonotes = skip_unless_loaders_run(on.ontonotes, config)
+    a_ontonotes.write_subcorpora_to_db(on.ontonotes.db_cursor(config), delta=delta)
+
+def annotations(tmp_path, document_path):
+    return os.path.join(str(tmp_path), "data", "english", "annotations", document_path)
+
+def test_delta_load_matches_a_full_load(db_config, tmp_path):
+    load(db_config)
+    unchanged = dump_db(db_config["db", "db"])
+    assert unchanged["token"] and unchanged["coreference_link"] and unchanged["argument_node"]
+
+    # nothing changed, nothing written
+    load(db_config, delta=True)
+    assert dump_db(db_config["db", "db"]) == unchanged
+
+    # change a parse, and delete a coref
+    parse_fname = annotations(tmp_path, "nw/wsj/00/wsj_0001.parse")
+    with open(parse_fname) as f:
+        parse = f.read()
+    with open(parse_fname, "w") as f:
+        f.write(parse.replace("(NN director)", "(NNS director)"))
+    os.remove(annotations(tmp_path, "nw/wsj/01/wsj_0102.coref"))
+
+    load(db_config, delta=True)
+    changed = dump_db(db_config["db", "db"])
+
+    make_db(db_config, str(tmp_path / "full.db"))
+    load(db_config)
+    assert changed == dump_db(str(tmp_path / "full.db"))
+
+    assert changed != unchanged
+    assert not [row for row in changed["coreference_chain"] if "wsj_0102" in repr(row)]
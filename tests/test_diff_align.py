@@ -0,0 +1,101 @@
+""" diff_align's myers engine against difflib, diff and a brute force longest common subsequence """
+
+import difflib
+import random
+import shutil
+
+import pytest
+
+from on.common.util import diff_align, myers_matches
+
+
+def lcs_table(a, b):
+    """ lengths[i][j] is the length of a longest common subsequence of a[:i] and b[:j] """
+
+    lengths = [[0]*(len(b) + 1) for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            if a[i-1] == b[j-1]:
+                lengths[i][j] = lengths[i-1][j-1] + 1
+            else:
+                lengths[i][j] = max(lengths[i-1][j], lengths[i][j-1])
+    return lengths
+
+def num_lcs_matchings(a, b):
+    """ how many different sets of (index in a, index in b) pairs are a longest common subsequence """
+
+    lengths = lcs_table(a, b)
+    counts = [[1]*(len(b) + 1) for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            count = 0
+            if lengths[i-1][j] == lengths[i][j]:
+                count += counts[i-1][j]
+            if lengths[i][j-1] == lengths[i][j]:
+                count += counts[i][j-1]
+            if lengths[i-1][j-1] == lengths[i][j]:
+                count -= counts[i-1][j-1]
+            if a[i-1] == b[j-1] and lengths[i-1][j-1] + 1 == lengths[i][j]:
+                count += counts[i-1][j-1]
+            counts[i][j] = count
+    return counts[len(a)][len(b)]
+
+def random_pairs(seed, num_pairs=300):
+    a_random = random.Random(seed)
+    for i in range(num_pairs):
+        alphabet = "abcd"[:a_random.randint(1, 4)]
+        seq_a = [a_random.choice(alphabet) for j in range(a_random.randint(1, 12))]
+        seq_b = [a_random.choice(alphabet) for j in range(a_random.randint(1, 12))]
+        yield seq_a, seq_b
+
+def difflib_matches(seq_a, seq_b):
+    return [(a_start + i, b_start + i)
+            for a_start, b_start, match_len in difflib.SequenceMatcher(None, seq_a, seq_b, autojunk=False).get_matching_blocks()
+            for i in range(match_len)]
+
+
+def test_myers_matches_are_a_longest_common_subsequence():
+    for seq_a, seq_b in random_pairs(0):
+        matches = myers_matches(seq_a, seq_b)
+
+        assert matches == sorted(matches)
+        assert all(a1 < a2 and b1 < b2 for (a1, b1), (a2, b2) in zip(matches, matches[1:]))
+        assert all(seq_a[a_idx] == seq_b[b_idx] for a_idx, b_idx in matches)
+        assert len(matches) == lcs_table(seq_a, seq_b)[-1][-1]
+
+def test_myers_agrees_with_difflib_except_on_ties():
+    for seq_a, seq_b in random_pairs(1):
+        myers = diff_align(seq_a, seq_b, engine="myers")
+        a_difflib = diff_align(seq_a, seq_b, engine="difflib")
+
+        # difflib doesn't always find a longest common subsequence, myers does
+        assert len(myers) >= len(a_difflib)
+
+        # where there is only one, and difflib found it, they are the same;
+        # on ties either may be returned, as the docstring says
+        if len(a_difflib) == len(myers) and num_lcs_matchings(seq_a, seq_b) == 1:
+            assert myers == a_difflib
+        else:
+            assert myers == dict(myers_matches(seq_a, seq_b))
+
+def test_myers_agrees_with_diff_except_on_ties():
+    if not shutil.which("diff"):
+        pytest.skip("diff isn't installed")
+
+    for seq_a, seq_b in random_pairs(2, num_pairs=100):
+        myers = diff_align(seq_a, seq_b, engine="myers")
+        a_diff = diff_align(seq_a, seq_b, engine="diff")
+
+        assert len(myers) == len(a_diff) == lcs_table(seq_a, seq_b)[-1][-1]
+        if num_lcs_matchings(seq_a, seq_b) == 1:
+            assert myers == a_diff
+
+def test_map_differences_pairs_up_substitutions():
+    assert diff_align(list("axbc"), list("aybc"), engine="myers") == {0: 0, 2: 2, 3: 3}
+    assert diff_align(list("axbc"), list("aybc"), map_differences=True, engine="myers") == {0: 0, 1: 1, 2: 2, 3: 3}
+    assert diff_align(list("axxbc"), list("aybc"), map_differences=True, engine="myers") == {0: 0, 1: 1, 3: 2, 4: 3}
+
+def test_num_lcs_matchings():
+    assert num_lcs_matchings("ab", "ab") == 1
+    assert num_lcs_matchings("ab", "ba") == 2
+    assert num_lcs_matchings("aa", "a") == 2
@@ -0,0 +1,43 @@
+""" lazy treebanks that keep only some of their documents parsed """
+
+import pytest
+
+from conftest import subcorpora
+
+
+def lazy_config(corpus_config, max_resident_documents):
+    corpus_config.set("corpus", "lazy-trees", "true")
+    corpus_config.set("corpus", "max-resident-documents", str(max_resident_documents))
+    return corpus_config
+
+def test_least_recently_used_documents_are_dropped(corpus_config):
+    a_subcorpus = subcorpora(lazy_config(corpus_config, 1))[0]
+    a_subcorpus.load_banks(corpus_config, banks="parse")
+    a_treebank = a_subcorpus["parse"]
+
+    first, second = [a_tree_document.document_id for a_tree_document in a_treebank]
+    assert list(a_treebank._document_hash) == [second]
+
+    a_tree_document = a_treebank.get_document(first)
+    assert a_tree_document.document_id == first
+    assert a_tree_document[0].get_word_string().startswith("Pierre Vinken")
+    assert list(a_treebank._document_hash) == [first]
+
+def test_enriching_is_refused(corpus_config):
+    a_subcorpus = subcorpora(lazy_config(corpus_config, 1))[0]
+
+    with pytest.raises(Exception, match="max-resident-documents"):
+        a_subcorpus.load_banks(corpus_config, banks="parse prop")
+
+    a_subcorpus = subcorpora(lazy_config(corpus_config, 1))[0]
+    a_subcorpus.load_banks(corpus_config, banks="parse")
+
+    with pytest.raises(Exception, match="can't be enriched"):
+        a_subcorpus["parse"].inform_enriched(a_subcorpus["document"])
+
+def test_unbounded_lazy_treebanks_can_be_enriched(corpus_config):
+    a_subcorpus = subcorpora(lazy_config(corpus_config, 0))[0]
+    a_subcorpus.load_banks(corpus_config, banks="parse prop")
+
+    assert "prop" in a_subcorpus["parse"].banks
+    assert len(a_subcorpus["parse"]._document_hash) == 2
@@ -0,0 +1,98 @@
+""" mysql statements translated for sqlite, SQLiteCursor running them, and db configs """
+
+import pytest
+
+import on
+from on.common.util import FancyConfigParser, SQLiteCursor, sqlite_connect, sqlite_statements
+
+
+def make_cursor(tmp_path, buffered=True):
+    return SQLiteCursor(sqlite_connect(str(tmp_path / "test.db")), buffered=buffered)
+
+
+def test_string_literals_are_requoted():
+    assert sqlite_statements("select * from tree where word = \"it's\"") == \
+        ["select * from tree where word = 'it''s'"]
+    assert sqlite_statements(r"select * from tree where word = 'a\'b\nc'") == \
+        ["select * from tree where word = 'a''b\nc'"]
+
+def test_like_escapes_are_kept():
+    assert sqlite_statements(r"select * from tree where id like 'a\_b%'") == \
+        [r"select * from tree where id like 'a\_b%'"]
+
+def test_parameter_markers():
+    assert sqlite_statements("insert into tree (id, word) values (%s, %s)", with_parameters=True) == \
+        ["insert into tree (id, word) values (?, ?)"]
+    assert sqlite_statements("delete from tree where document_id = %(document_id)s", with_parameters=True) == \
+        ["delete from tree where document_id = :document_id"]
+    assert sqlite_statements("select * from tree where word like '%s'") == ["select * from tree where word like '%s'"]
+
+def test_mysql_only_statements():
+    assert sqlite_statements("insert ignore into tree (id) values (%s)", with_parameters=True) == \
+        ["insert or ignore into tree (id) values (?)"]
+    assert sqlite_statements("show tables") == ["select name from sqlite_master where type = 'table'"]
+    assert sqlite_statements("describe tree") == ["pragma table_info(tree)"]
+    assert sqlite_statements("drop index tree_document_id on tree") == ["drop index if exists tree_document_id"]
+    assert sqlite_statements("set foreign_key_checks = 0") == ["pragma foreign_keys"]
+
+def test_create_table():
+    assert sqlite_statements("""
+create table tree
+(
+  id varchar(255) not null collate utf8_bin primary key,
+  word varchar(255),
+  document_id varchar(255) not null,
+  unique key (id, word),
+  index tree_document_id (document_id),
+  foreign key (document_id) references document.id
+)
+default character set utf8;
+""") == ["""create table tree (
+  id varchar(255) not null primary key,
+  word varchar(255) collate nocase,
+  document_id varchar(255) collate nocase not null,
+  unique (id, word),
+  foreign key (document_id) references document(id)
+)""", "create index tree_document_id on tree (document_id)"]
+
+def test_cursor_reads_rows_as_dictionaries(tmp_path):
+    a_cursor = make_cursor(tmp_path)
+    a_cursor.execute("create table tree (id varchar(255) not null collate utf8_bin primary key, word varchar(255)) default character set utf8")
+    assert a_cursor.executemany("insert into tree (id, word) values (%s, %s)", [("a", "It"), ("b", "'s")]) == 2
+
+    assert a_cursor.execute("select * from tree order by id") == 2
+    assert a_cursor.fetchone() == {"id": "a", "word": "It"}
+    assert a_cursor.fetchall() == [{"id": "b", "word": "'s"}]
+    assert a_cursor.fetchone() is None
+
+    # text compares case insensitively, as in mysql, unless it's binary
+    a_cursor.execute("select id from tree where word = %s", ("it",))
+    assert a_cursor.fetchall() == [{"id": "a"}]
+    a_cursor.execute("select id from tree where id = %s", ("A",))
+    assert a_cursor.fetchall() == []
+
+def test_streaming_cursor_reads_rows_as_fetched(tmp_path):
+    a_cursor = make_cursor(tmp_path, buffered=False)
+    a_cursor.execute("create table tree (id varchar(255) not null primary key)")
+    a_cursor.executemany("insert into tree (id) values (%s)", [("a",), ("b",), ("c",)])
+
+    a_cursor.execute("select id from tree order by id")
+    assert a_cursor.fetchmany(2) == [{"id": "a"}, {"id": "b"}]
+    assert [row["id"] for row in a_cursor] == ["c"]
+
+def test_regexp(tmp_path):
+    a_cursor = make_cursor(tmp_path)
+    a_cursor.execute("create table tree (id varchar(255) not null primary key)")
+    a_cursor.executemany("insert into tree (id) values (%s)", [("wsj_0001",), ("cnn_0001",)])
+
+    a_cursor.execute("select id from tree where id regexp '^wsj'")
+    assert a_cursor.fetchall() == [{"id": "wsj_0001"}]
+
+def test_mysql_config_needs_host_and_user():
+    config = FancyConfigParser()
+    config.add_section("db")
+    config.set("db", "db", "ontonotes")
+    config.set("db", "user", "ontonotes")
+
+    with pytest.raises(Exception, match="db.host must be set"):
+        on.ontonotes.db_cursor(config)
@@ -0,0 +1,21 @@
+""" splitting subcorpora read from files """
+
+from conftest import subcorpora
+
+
+def test_split_by_document(corpus_config):
+    for a_subcorpus in subcorpora(corpus_config):
+        section = a_subcorpus.id.split("@")[0]
+        document_ids = ["nw/wsj/%s/wsj_%s01" % (section, section), "nw/wsj/%s/wsj_%s02" % (section, section)]
+
+        split = list(a_subcorpus.split_by_document())
+        assert len(split) == 2
+
+        for document_id, a_document_subcorpus in zip(document_ids, split):
+            assert a_document_subcorpus.id == a_subcorpus.id
+            assert sorted(a_document_subcorpus.file_hash) == ["coref", "parse", "prop"]
+            for extension in a_subcorpus.file_hash:
+                assert [a_file.document_id for a_file in a_document_subcorpus.file_hash[extension]] == [document_id]
+
+        [a_document_subcorpus] = a_subcorpus.split_by_document(document_ids=[document_ids[1], "nw/wsj/99/wsj_9901"])
+        assert a_document_subcorpus.file_hash["parse"][0].document_id == document_ids[1]
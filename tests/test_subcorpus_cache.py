@@ -0,0 +1,46 @@
+""" keys of the cache of enriched subcorpora """
+
+import os
+
+import on
+from on.common.util import metadata_signature
+
+from conftest import subcorpora, write_corpus
+
+
+def touch(fname, text=None):
+    if text is not None:
+        with open(fname, "w") as f:
+            f.write(text)
+    a_stat = os.stat(fname)
+    os.utime(fname, ns=(a_stat.st_atime_ns, a_stat.st_mtime_ns + 10**9))
+
+def test_metadata_signature_sees_files_edited_in_place(tmp_path):
+    write_corpus(str(tmp_path))
+    top_dir = str(tmp_path / "data" / "english")
+    frame_fname = str(tmp_path / "data" / "english" / "metadata" / "frames" / "join-v.xml")
+
+    before = metadata_signature(top_dir)
+    assert metadata_signature(top_dir) == before
+
+    # same size and directory, only the modification time changes
+    touch(frame_fname)
+    assert metadata_signature(top_dir) != before
+
+    before = metadata_signature(top_dir)
+    os.makedirs(str(tmp_path / "data" / "english" / "metadata" / "sense-inventories"))
+    touch(str(tmp_path / "data" / "english" / "metadata" / "sense-inventories" / "join-v.xml"), "<inventory/>")
+    assert metadata_signature(top_dir) != before
+
+def test_cache_key_follows_frame_files(corpus_config, tmp_path):
+    a_subcorpus = subcorpora(corpus_config)[0]
+    frame_fname = str(tmp_path / "data" / "english" / "metadata" / "frames" / "join-v.xml")
+
+    a_cache = on._subcorpus_cache(a_subcorpus.ontonotes, str(tmp_path / "cache"), 10)
+    before = a_cache._key(a_subcorpus)
+
+    touch(frame_fname)
+
+    # the frames are stat'd once per cache, that is once per run
+    assert a_cache._key(a_subcorpus) == before
+    assert on._subcorpus_cache(a_subcorpus.ontonotes, str(tmp_path / "cache"), 10)._key(a_subcorpus) != before
@@ -0,0 +1,89 @@
+""" pickling loaded subcorpora between processes, and handing them back in order """
+
+import io
+import pickle
+
+import pytest
+
+import on
+import on.corpora.tree
+from on.common.util import FancyConfigParser, SQLiteCursor
+
+from conftest import skip_unless_loaders_run
+
+
+def round_trip(obj, a_ontonotes=None):
+    a_file = io.BytesIO()
+    on._subcorpus_pickler(a_file, a_ontonotes).dump(obj)
+    return on._subcorpus_unpickler(io.BytesIO(a_file.getvalue()), a_ontonotes).load()
+
+def deep_tree(depth):
+    return on.corpora.tree.tree.from_string_iterative(
+        "(TOP " + "(S (NP (NN a)) (VP (VB b) " * depth + "(NP (NN c))" + "))" * depth + ")")
+
+def test_deep_trees_pickle_without_deep_recursion():
+    a_tree = deep_tree(100)
+
+    # far deeper than the recursion limit lets pickle go by itself
+    with pytest.raises(RecursionError):
+        pickle.dumps(a_tree, pickle.HIGHEST_PROTOCOL)
+
+    a_copy, a_leaf_copy = round_trip([a_tree, a_tree.leaves()[-1]])
+
+    assert a_copy.to_string() == a_tree.to_string()
+    assert a_leaf_copy is a_copy.leaves()[-1]
+    assert a_leaf_copy.get_root() is a_copy
+    assert [a_subtree.tag for a_subtree in a_copy.subtrees()] == [a_subtree.tag for a_subtree in a_tree.subtrees()]
+
+def test_shared_objects_stay_shared():
+    a_tree = deep_tree(2)
+    shared = ["not an on.corpora object"]
+    a_tree.shared = shared
+    a_tree.leaves()[0].shared = shared
+
+    a_copy = round_trip(a_tree)
+    assert a_copy.shared is a_copy.leaves()[0].shared
+    assert a_copy.shared == shared
+
+class fake_ontonotes(object):
+    def __init__(self, db_fname):
+        self.config = FancyConfigParser()
+        self.config.add_section("db")
+        self.config.set("db", "backend", "sqlite")
+        self.config.set("db", "db", db_fname)
+
+def test_db_handles_are_one_cursor(tmp_path):
+    a_ontonotes = fake_ontonotes(str(tmp_path / "test.db"))
+    a_cursor = on.ontonotes.db_cursor(a_ontonotes.config)
+    another_cursor = on.ontonotes.db_cursor(a_ontonotes.config)
+
+    copied = round_trip({"ontonotes": a_ontonotes, "cursors": [a_cursor, another_cursor, a_cursor]},
+                        a_ontonotes)
+
+    assert copied["ontonotes"] is a_ontonotes
+    first, second, third = copied["cursors"]
+    assert isinstance(first, SQLiteCursor)
+    assert first is second is third
+
+def loaded_subcorpora(corpus_config, workers):
+    corpus_config.set("corpus", "workers", str(workers))
+    a_ontonotes = skip_unless_loaders_run(on.ontonotes, corpus_config)
+    return [(a_subcorpus.id, [(a_tree.id, a_tree.to_string(), a_tree.leaves()[8].proposition is not None)
+                              for a_tree_document in a_subcorpus["parse"] for a_tree in a_tree_document])
+            for a_subcorpus in a_ontonotes]
+
+def test_workers_hand_subcorpora_back_in_order(corpus_config):
+    in_process = loaded_subcorpora(corpus_config, 1)
+    assert [subcorpus_id for subcorpus_id, trees in in_process] == ["00@wsj@nw@en@on", "01@wsj@nw@en@on"]
+    assert in_process[0][1][0][2] # enriched
+
+    assert loaded_subcorpora(corpus_config, 2) == in_process
+
+def test_subcorpora_that_cannot_be_pickled_are_loaded_here(corpus_config, monkeypatch):
+    in_process = loaded_subcorpora(corpus_config, 1)
+
+    def refuse(self, obj):
+        raise RecursionError("too deep")
+    monkeypatch.setattr(on._subcorpus_pickler, "dump", refuse)
+
+    assert loaded_subcorpora(corpus_config, 2) == in_process